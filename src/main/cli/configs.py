@@ -124,12 +124,48 @@ class ALGO_PARAMS(Enum):
 class PROCESSING_PARAMS(Enum):
     LEVEL = '--level'
     PATH = 'path'
+    WORKERS = '--workers'
+    TESTS_CACHE = '--tests_cache'
+    JVM_HARNESS = '--jvm_harness'
+    COMPILATION_CACHE = '--compilation_cache'
+    CPP_PCH = '--cpp_pch'
+    CPP_SYNTAX_FIRST = '--cpp_syntax_first'
+    PYTHON_FORK = '--python_fork'
+    LIMIT_RESOURCES = '--limit_resources'
+    TESTS_STATISTICS = '--tests_statistics'
+    NORMALIZE_FRAGMENTS = '--normalize_fragments'
+    TESTS_JOURNAL = '--tests_journal'
+    WORK_QUEUE = '--work_queue'
+    PROBE_TASKS = '--probe_tasks'
 
     @classmethod
     def params(cls) -> List[PROCESSING_PARAMS]:
         return [p for p in PROCESSING_PARAMS]
 
 
+class TESTS_WORKER_PARAMS(Enum):
+    QUEUE_PATH = 'queue_path'
+    SANDBOX_ROOT = '--sandbox_root'
+
+    @classmethod
+    def params(cls) -> List[TESTS_WORKER_PARAMS]:
+        return [p for p in TESTS_WORKER_PARAMS]
+
+
+class SCORING_BENCHMARK_PARAMS(Enum):
+    OUTPUT = 'output'
+    LANGUAGES = '--languages'
+    FRAGMENTS = '--fragments'
+    TIMEOUT_FRAGMENTS = '--timeout_fragments'
+    SEED = '--seed'
+    ALL_TESTS = '--all_tests'
+    SANDBOX_ROOT = '--sandbox_root'
+
+    @classmethod
+    def params(cls) -> List[SCORING_BENCHMARK_PARAMS]:
+        return [p for p in SCORING_BENCHMARK_PARAMS]
+
+
 class PLOTS_PARAMS(Enum):
     PATH = 'path'
     PLOT_TYPE = 'plot_type'
@@ -2,11 +2,14 @@
 
 import sys
 import logging
+import argparse
+from typing import Dict, Any
 
 sys.path.append('.')
 from src.main.util import consts
 from src.main.cli.util import ICli
 from src.main.cli.configs import PROCESSING_LEVEL, PROCESSING_PARAMS
+from src.main.task_scoring.task_checker import TaskCheckerOptions
 from src.main.util.log_util import configure_logger, add_console_stream
 
 log = logging.getLogger(consts.LOGGER_NAME)
@@ -18,16 +21,97 @@ class PreprocessingCli(ICli):
         super().__init__()
         self._path = None
         self._level = None
+        self._workers = 1
+        self._tests_cache = None
+        self._jvm_harness = False
+        self._compilation_cache = None
+        self._cpp_pch = False
+        self._cpp_syntax_first = False
+        self._python_fork = False
+        self._limit_resources = False
+        self._tests_statistics = None
+        self._normalize_fragments = False
+        self._tests_journal = None
+        self._work_queue = None
+        self._probe_tasks = False
+
+    @classmethod
+    def str_to_workers(cls, value: str) -> int:
+        message = f'{value} is not a valid workers number. It has to be a positive integer number'
+        try:
+            workers = int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(message)
+        if workers < 1:
+            raise argparse.ArgumentTypeError(message)
+        return workers
 
     def configure_args(self) -> None:
         self._parser.add_argument(PROCESSING_PARAMS.PATH.value, type=str, nargs=1, help='data path')
         self._parser.add_argument(PROCESSING_PARAMS.LEVEL.value, nargs='?', const=3, default=3,
                                   help=PROCESSING_LEVEL.description())
+        self._parser.add_argument(PROCESSING_PARAMS.WORKERS.value, type=self.str_to_workers, nargs='?', const=1,
+                                  default=1, help='number of processes to merge the task folders and to run tests '
+                                                  'on the fragments in parallel')
+        self._parser.add_argument(PROCESSING_PARAMS.TESTS_CACHE.value, type=str, nargs='?', default=None,
+                                  help='path to the persistent cache of the tests results')
+        self._parser.add_argument(PROCESSING_PARAMS.JVM_HARNESS.value, type=self.str_to_bool, nargs='?', const=True,
+                                  default=False, help='to run Java and Kotlin tests in the long-lived JVM')
+        self._parser.add_argument(PROCESSING_PARAMS.COMPILATION_CACHE.value, type=str, nargs='?', default=None,
+                                  help='path to the persistent cache of the compiled Kotlin and C++ fragments')
+        self._parser.add_argument(PROCESSING_PARAMS.CPP_PCH.value, type=self.str_to_bool, nargs='?', const=True,
+                                  default=False, help='to compile C++ fragments with precompiled headers')
+        self._parser.add_argument(PROCESSING_PARAMS.CPP_SYNTAX_FIRST.value, type=self.str_to_bool, nargs='?',
+                                  const=True, default=False,
+                                  help='to check only the syntax of C++ fragments, which are not run on tests')
+        self._parser.add_argument(PROCESSING_PARAMS.PYTHON_FORK.value, type=self.str_to_bool, nargs='?', const=True,
+                                  default=False, help='to run Python tests in the forked processes')
+        self._parser.add_argument(PROCESSING_PARAMS.LIMIT_RESOURCES.value, type=self.str_to_bool, nargs='?',
+                                  const=True, default=False,
+                                  help='to limit the memory, the CPU time and the output of the tests')
+        self._parser.add_argument(PROCESSING_PARAMS.TESTS_STATISTICS.value, type=str, nargs='?', default=None,
+                                  help='path to the tests failures statistics to run the most failing tests first')
+        self._parser.add_argument(PROCESSING_PARAMS.NORMALIZE_FRAGMENTS.value, type=self.str_to_bool, nargs='?',
+                                  const=True, default=False,
+                                  help='to check once the fragments, which differ only in whitespace and comments')
+        self._parser.add_argument(PROCESSING_PARAMS.TESTS_JOURNAL.value, type=str, nargs='?', default=None,
+                                  help='path to the journal of the tests results to resume the interrupted running')
+        self._parser.add_argument(PROCESSING_PARAMS.WORK_QUEUE.value, type=str, nargs='?', default=None,
+                                  help='path to the work queue on a shared file system to run tests by the workers')
+        self._parser.add_argument(PROCESSING_PARAMS.PROBE_TASKS.value, type=self.str_to_bool, nargs='?', const=True,
+                                  default=False, help='to run tests on the files with unknown tasks, fully testing '
+                                                      'only the tasks, whose first tests are passed')
 
     def parse_args(self) -> None:
         args = self._parser.parse_args()
         self._path = self.handle_path(args.path[0])
         self._level = self.str_to_preprocessing_level(args.level)
+        self._workers = args.workers
+        self._tests_cache = args.tests_cache
+        self._jvm_harness = args.jvm_harness
+        self._compilation_cache = args.compilation_cache
+        self._cpp_pch = args.cpp_pch
+        self._cpp_syntax_first = args.cpp_syntax_first
+        self._python_fork = args.python_fork
+        self._limit_resources = args.limit_resources
+        self._tests_statistics = args.tests_statistics
+        self._normalize_fragments = args.normalize_fragments
+        self._tests_journal = args.tests_journal
+        self._work_queue = args.work_queue
+        self._probe_tasks = args.probe_tasks
+
+    # Some levels have additional arguments, which can be set from the command line
+    def __get_level_kwargs(self, level: PROCESSING_LEVEL) -> Dict[str, Any]:
+        if level == PROCESSING_LEVEL.MERGE:
+            return {'workers': self._workers}
+        if level == PROCESSING_LEVEL.TESTS_RESULTS:
+            checker_options = TaskCheckerOptions(self._jvm_harness, self._compilation_cache, self._cpp_pch,
+                                                 self._cpp_syntax_first, self._python_fork, self._limit_resources)
+            return {'workers': self._workers, 'cache_path': self._tests_cache, 'checker_options': checker_options,
+                    'tests_statistics_path': self._tests_statistics,
+                    'to_normalize_fragments': self._normalize_fragments, 'journal_path': self._tests_journal,
+                    'queue_path': self._work_queue, 'to_probe_tasks': self._probe_tasks}
+        return {}
 
     def main(self) -> None:
         self.parse_args()
@@ -35,7 +119,7 @@ class PreprocessingCli(ICli):
         for level_index in range(0, self._level.value + 1):
             current_level = PROCESSING_LEVEL(level_index)
             self._log.info(f'Current action is {current_level.level_handler()}')
-            path = current_level.level_handler()(path)
+            path = current_level.level_handler()(path, **self.__get_level_kwargs(current_level))
         self._log.info(f'Folder with data: {path}')
         print(f'Folder with data: {path}')
 
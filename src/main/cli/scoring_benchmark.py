@@ -0,0 +1,101 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+sys.path.append('.')
+from src.main.util import consts
+from src.main.cli.util import ICli
+from src.main.util.file_util import create_file
+from src.main.util.consts import LANGUAGE, BENCHMARK_FRAGMENT_KIND
+from src.main.cli.configs import SCORING_BENCHMARK_PARAMS
+from src.main.util.log_util import configure_logger, add_console_stream
+from src.main.task_scoring.scoring_benchmark import run_scoring_benchmark, DEFAULT_KIND_TO_FRAGMENTS_NUMBER, \
+    DEFAULT_SEED, LANGUAGE_TO_TOOLS
+
+log = logging.getLogger(consts.LOGGER_NAME)
+
+
+class ScoringBenchmarkCli(ICli):
+    description = 'TaskTracker postprocessing: the benchmark of the tests running.'
+
+    def __init__(self):
+        super().__init__()
+        self._languages = None
+        self._kind_to_fragments_number = None
+        self._seed = DEFAULT_SEED
+        self._all_tests = False
+        self._sandbox_root = None
+        self._output = None
+
+    @classmethod
+    def str_to_language(cls, value: str) -> LANGUAGE:
+        for language in LANGUAGE_TO_TOOLS.keys():
+            if value.lower() == language.value:
+                return language
+        available_values_message = ', '.join(l.value for l in LANGUAGE_TO_TOOLS.keys())
+        raise argparse.ArgumentTypeError(f'{value} is not a valid language. '
+                                         f'Available values: {available_values_message}')
+
+    @classmethod
+    def str_to_fragments_number(cls, value: str) -> int:
+        message = f'{value} is not a valid fragments number. It has to be a non-negative integer number'
+        try:
+            fragments_number = int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(message)
+        if fragments_number < 0:
+            raise argparse.ArgumentTypeError(message)
+        return fragments_number
+
+    def configure_args(self) -> None:
+        self._parser.add_argument(SCORING_BENCHMARK_PARAMS.OUTPUT.value, type=str, nargs=1,
+                                  help='path to the json report')
+        self._parser.add_argument(SCORING_BENCHMARK_PARAMS.LANGUAGES.value, type=self.str_to_language, nargs='+',
+                                  default=None, help='languages to run the benchmark on, all languages by default')
+        self._parser.add_argument(SCORING_BENCHMARK_PARAMS.FRAGMENTS.value, type=self.str_to_fragments_number,
+                                  nargs='?', default=None,
+                                  help='number of the correct, incorrect and too short fragments for each task')
+        self._parser.add_argument(SCORING_BENCHMARK_PARAMS.TIMEOUT_FRAGMENTS.value,
+                                  type=self.str_to_fragments_number, nargs='?',
+                                  default=DEFAULT_KIND_TO_FRAGMENTS_NUMBER[BENCHMARK_FRAGMENT_KIND.TIMEOUT],
+                                  help='number of the timeout fragments for each task')
+        self._parser.add_argument(SCORING_BENCHMARK_PARAMS.SEED.value, type=int, nargs='?', default=DEFAULT_SEED,
+                                  help='seed of the fragments corpora')
+        self._parser.add_argument(SCORING_BENCHMARK_PARAMS.ALL_TESTS.value, type=self.str_to_bool, nargs='?',
+                                  const=True, default=False,
+                                  help='to run all tests of the task instead of stopping after the first failed one')
+        self._parser.add_argument(SCORING_BENCHMARK_PARAMS.SANDBOX_ROOT.value, type=str, nargs='?', default=None,
+                                  help='folder for the temporary source and compiled files, for example, /dev/shm')
+
+    def parse_args(self) -> None:
+        args = self._parser.parse_args()
+        self._languages = args.languages
+        self._kind_to_fragments_number = dict(DEFAULT_KIND_TO_FRAGMENTS_NUMBER)
+        if args.fragments is not None:
+            self._kind_to_fragments_number.update({kind: args.fragments for kind in BENCHMARK_FRAGMENT_KIND
+                                                   if kind != BENCHMARK_FRAGMENT_KIND.TIMEOUT})
+        self._kind_to_fragments_number[BENCHMARK_FRAGMENT_KIND.TIMEOUT] = args.timeout_fragments
+        self._seed = args.seed
+        self._all_tests = args.all_tests
+        self._sandbox_root = args.sandbox_root
+        self._output = os.path.abspath(args.output[0])
+
+    def main(self) -> None:
+        self.parse_args()
+        report = run_scoring_benchmark(self._languages, kind_to_fragments_number=self._kind_to_fragments_number,
+                                       seed=self._seed, stop_after_first_false=not self._all_tests,
+                                       sandbox_root=self._sandbox_root)
+        create_file(json.dumps(report, indent=2), self._output)
+        print(f'The report is written to {self._output}')
+
+
+if __name__ == '__main__':
+    configure_logger(to_delete_previous_logs=True)
+    add_console_stream(log)
+
+    scoring_benchmark_cli = ScoringBenchmarkCli()
+    scoring_benchmark_cli.main()
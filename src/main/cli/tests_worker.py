@@ -0,0 +1,46 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import sys
+import logging
+
+sys.path.append('.')
+from src.main.util import consts
+from src.main.cli.util import ICli
+from src.main.cli.configs import TESTS_WORKER_PARAMS
+from src.main.task_scoring.tasks_tests_handler import run_tests_worker
+from src.main.util.log_util import configure_logger, add_console_stream
+
+log = logging.getLogger(consts.LOGGER_NAME)
+
+
+class TestsWorkerCli(ICli):
+    description = 'TaskTracker postprocessing: a worker of the distributed tests running.'
+
+    def __init__(self):
+        super().__init__()
+        self._queue_path = None
+        self._sandbox_root = None
+
+    def configure_args(self) -> None:
+        self._parser.add_argument(TESTS_WORKER_PARAMS.QUEUE_PATH.value, type=str, nargs=1,
+                                  help='path to the work queue, which is set by --work_queue in processing.py')
+        self._parser.add_argument(TESTS_WORKER_PARAMS.SANDBOX_ROOT.value, type=str, nargs='?', default=None,
+                                  help='folder for the temporary source and compiled files, for example, /dev/shm')
+
+    def parse_args(self) -> None:
+        args = self._parser.parse_args()
+        self._queue_path = args.queue_path[0]
+        self._sandbox_root = args.sandbox_root
+
+    def main(self) -> None:
+        self.parse_args()
+        checked_fragments = run_tests_worker(self._queue_path, self._sandbox_root)
+        print(f'Checked fragments: {checked_fragments}')
+
+
+if __name__ == '__main__':
+    configure_logger(to_delete_previous_logs=True)
+    add_console_stream(log)
+
+    tests_worker_cli = TestsWorkerCli()
+    tests_worker_cli.main()
@@ -1,43 +1,58 @@
 # Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
 
 import logging
-import datetime
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional
 
+import numpy as np
 import pandas as pd
 
 from src.main.util import consts
 from src.main.util.log_util import log_and_raise_error
-from src.main.util.time_util import get_datetime_by_format
+from src.main.util.time_util import get_timestamps_by_format
 from src.main.util.language_util import get_extension_by_language
 from src.main.util.file_util import get_name_from_path, get_original_file_name_with_extension
 
 log = logging.getLogger(consts.LOGGER_NAME)
 
+# The values of a column are looked up among the action events at once by converting them to this categorical type,
+# the values, which are not action events, get the code -1
+ACTION_EVENTS_DTYPE = pd.CategoricalDtype(consts.ACTIVITY_TRACKER_EVENTS.action_events())
+EVENT_TYPES_DTYPE = pd.CategoricalDtype([consts.ACTIVITY_TRACKER_EVENTS.ACTION.value,
+                                         consts.ACTIVITY_TRACKER_EVENTS.COMPILATION_FINISHED.value])
+
+
+def __is_in_categories(values: pd.Series, dtype: pd.CategoricalDtype) -> np.ndarray:
+    return pd.Categorical(values, dtype=dtype).codes >= 0
+
 
 # Unification of similar activity tracker events. For example, an action Run by pressed the button Run and by
 # pressing a combination of buttons is not similar in the source data. After the unification, the function returns a
 # new activity tracker data with the union this kind of events
-def __unify_activity_tracker_columns(ati_data: pd.DataFrame) -> pd.DataFrame:
-    action_events = consts.ACTIVITY_TRACKER_EVENTS.action_events()
-    for index in range(ati_data.shape[0]):
-        current_focused_component = ati_data[consts.ACTIVITY_TRACKER_COLUMN.FOCUSED_COMPONENT.value].iloc[index]
-        if current_focused_component in action_events:
-            ati_data[consts.ACTIVITY_TRACKER_COLUMN.EVENT_DATA.value].iloc[index] \
-                = ati_data[consts.ACTIVITY_TRACKER_COLUMN.FOCUSED_COMPONENT.value].iloc[index]
-            ati_data[consts.ACTIVITY_TRACKER_COLUMN.EVENT_TYPE.value].iloc[index] \
-                = consts.ACTIVITY_TRACKER_EVENTS.ACTION.value
+# The rows to unify are the ones with the action events in the focused component, they can be found in advance
+def __unify_activity_tracker_columns(ati_data: pd.DataFrame,
+                                     is_action_component: Optional[np.ndarray] = None) -> pd.DataFrame:
+    focused_component = ati_data[consts.ACTIVITY_TRACKER_COLUMN.FOCUSED_COMPONENT.value]
+    if is_action_component is None:
+        is_action_component = __is_in_categories(focused_component, ACTION_EVENTS_DTYPE)
+    # Columns without values are read as float ones, they are left as they are if there is nothing to unify
+    if is_action_component.any():
+        ati_data.loc[is_action_component, consts.ACTIVITY_TRACKER_COLUMN.EVENT_DATA.value] = \
+            focused_component[is_action_component]
+        ati_data.loc[is_action_component, consts.ACTIVITY_TRACKER_COLUMN.EVENT_TYPE.value] = \
+            consts.ACTIVITY_TRACKER_EVENTS.ACTION.value
     return ati_data
 
 
 # Filtering the activity-tracker data: returns a new activity-tracker data with deleted not necessary events
 # Necessary events can be seen in the const file: ACTIVITY_TRACKER_EVENTS and ACTION_EVENTS
-def __filter_ati_data(ati_data: pd.DataFrame) -> pd.DataFrame:
-    event_types = [consts.ACTIVITY_TRACKER_EVENTS.ACTION.value,
-                   consts.ACTIVITY_TRACKER_EVENTS.COMPILATION_FINISHED.value]
-    action_events = consts.ACTIVITY_TRACKER_EVENTS.action_events()
-    ati_data = ati_data[(ati_data[consts.ACTIVITY_TRACKER_COLUMN.EVENT_TYPE.value].isin(event_types))
-                      & (ati_data[consts.ACTIVITY_TRACKER_COLUMN.EVENT_DATA.value].isin(action_events))]
+# The unified rows are necessary anyway, so if they are known, the other rows are looked up only
+def __filter_ati_data(ati_data: pd.DataFrame, is_unified: Optional[np.ndarray] = None) -> pd.DataFrame:
+    is_necessary = np.zeros(ati_data.shape[0], dtype=bool) if is_unified is None else is_unified.copy()
+    rest = ~is_necessary
+    is_necessary[rest] = \
+        __is_in_categories(ati_data[consts.ACTIVITY_TRACKER_COLUMN.EVENT_TYPE.value][rest], EVENT_TYPES_DTYPE) \
+        & __is_in_categories(ati_data[consts.ACTIVITY_TRACKER_COLUMN.EVENT_DATA.value][rest], ACTION_EVENTS_DTYPE)
+    ati_data = ati_data[is_necessary]
     ati_data.index = [*range(ati_data.shape[0])]
     return ati_data
 
@@ -57,25 +72,6 @@ def __add_values_in_ati_dict(ati_dict: Dict[str, List[Any]], timestamp: str = ''
     ati_dict[consts.ACTIVITY_TRACKER_COLUMN.EVENT_DATA.value].append(event_data)
 
 
-def __add_values_in_ati_dict_by_ati_index(res_dict: Dict[str, List[Any]], activity_tracker_data: pd.DataFrame,
-                                          index: int) -> None:
-    __add_values_in_ati_dict(res_dict,
-                             activity_tracker_data[consts.ACTIVITY_TRACKER_COLUMN.TIMESTAMP_ATI.value].iloc[index],
-                             activity_tracker_data[consts.ACTIVITY_TRACKER_COLUMN.EVENT_TYPE.value].iloc[index],
-                             activity_tracker_data[consts.ACTIVITY_TRACKER_COLUMN.EVENT_DATA.value].iloc[index])
-
-
-def __are_same_files(code_tracker_file_name: str, activity_tracker_file_path: str) -> bool:
-    if pd.isnull(activity_tracker_file_path):
-        return False
-    try:
-        activity_tracker_file_name = get_name_from_path(activity_tracker_file_path)
-    except ValueError:
-        # If the activity_tracker_file_name has an invalid extension, it does not equal code_tracker_file_name
-        return False
-    return code_tracker_file_name == activity_tracker_file_name
-
-
 # Insert a row to the dataframe before the row_number position.
 # For example, we have the dataset with 1 column and 3 rows: A C D
 # If we have row_number = 1 and row_value = B, the function returns the dataset with rows: A B C D
@@ -90,16 +86,21 @@ def __insert_row(df: pd.DataFrame, row_number: int, row_value: list) -> pd.DataF
     return df_result
 
 
+# The action events in the focused component are looked up once for both the unification and the filtering
 def preprocess_activity_tracker_data(activity_tracker_data: pd.DataFrame,
                                      to_filter_ati_data: bool = True) -> pd.DataFrame:
     log.info('...starting to unify activity tracker data')
-    activity_tracker_data = __unify_activity_tracker_columns(activity_tracker_data)
-    log.info('finish unifying activity tracker data')
+    is_unified = __is_in_categories(activity_tracker_data[consts.ACTIVITY_TRACKER_COLUMN.FOCUSED_COMPONENT.value],
+                                    ACTION_EVENTS_DTYPE)
+    activity_tracker_data = __unify_activity_tracker_columns(activity_tracker_data, is_unified)
+    log.info(f'finish unifying activity tracker data, {is_unified.sum()} rows are unified')
 
     if to_filter_ati_data:
         log.info('...starting to filter activity tracker data')
-        activity_tracker_data = __filter_ati_data(activity_tracker_data)
-        log.info('finish filtering activity tracker data')
+        rows_number = activity_tracker_data.shape[0]
+        activity_tracker_data = __filter_ati_data(activity_tracker_data, is_unified)
+        log.info(f'finish filtering activity tracker data, {rows_number - activity_tracker_data.shape[0]} rows '
+                 f'are dropped')
     return activity_tracker_data
 
 
@@ -116,67 +117,114 @@ def get_full_default_columns_for_at(count_rows: int) -> Dict[str, List[Any]]:
     return res
 
 
-# Get size of result for activity tracker data
-def __get_dict_lists_size(res: Dict[str, List[Any]]) -> int:
-    size = 0
-    for key in res.keys():
-        if size != 0 and len(res[key]) != size:
-            log_and_raise_error('Lists in the res dict have different sizes', log)
-        size = len(res[key])
-    return size
-
-
-def is_last(index: int, data: pd.DataFrame) -> bool:
-    return index == data.shape[0] - 1
-
-
-def is_next_ct_valid(ati_time: datetime, cur_ct_i: int, code_tracker_data: pd.DataFrame) -> bool:
-    next_ct_time = get_datetime_by_format(code_tracker_data[consts.TASK_TRACKER_COLUMN.DATE.value].iloc[cur_ct_i + 1])
-    return (ati_time - next_ct_time).total_seconds() >= 0
-
+class ActivityTrackerIndex:
+    """
+    The index of the activity tracker data by the names of the tracked files. It's built once for the activity tracker
+    file and is shared by all code tracker files of the task, so each of them is merged only with its own events.
+    For each file name the sorted positions of its events are kept, the timestamps of the events are parsed on the first
+    request of the file events and are kept in the index for the next requests. Only the timestamps of its own events
+    are parsed, so the events of other files, for example, with missing timestamps, don't affect it.
+    """
 
-def is_ct_i_filled(ct_i: int, ati_dict: Dict[str, List[Any]]) -> bool:
-    return __get_dict_lists_size(ati_dict) > ct_i
+    def __init__(self, activity_tracker_data: pd.DataFrame):
+        self._activity_tracker_data = activity_tracker_data
+        self._files = get_files_from_ati(activity_tracker_data)
+        # The missing paths get the code -1 and the name id -1 as the paths without a valid name
+        codes, paths = pd.factorize(activity_tracker_data[consts.ACTIVITY_TRACKER_COLUMN.CURRENT_FILE.value])
+        name_to_id: Dict[str, int] = {}
+        path_name_ids = [-1 if name is None else name_to_id.setdefault(name, len(name_to_id))
+                         for name in map(self.__get_file_name, paths)]
+        events_name_ids = np.array(path_name_ids + [-1], dtype=np.int64)[codes]
+        positions = np.argsort(events_name_ids, kind='stable')
+        bounds = np.searchsorted(events_name_ids[positions], np.arange(len(name_to_id) + 1))
+        self._name_to_positions = {name: positions[bounds[i]:bounds[i + 1]] for name, i in name_to_id.items()}
+        self._name_to_timestamps: Dict[str, np.ndarray] = {}
+
+    @staticmethod
+    def __get_file_name(path: str) -> Optional[str]:
+        try:
+            return get_name_from_path(path)
+        except ValueError:
+            # If the path has an invalid extension, it does not equal any code tracker file name
+            return None
+
+    # The tracked paths without missing values, see get_files_from_ati
+    @property
+    def files(self) -> List[str]:
+        return self._files
+
+    @property
+    def activity_tracker_data(self) -> pd.DataFrame:
+        return self._activity_tracker_data
+
+    # Returns the sorted positions of the events of the file and the timestamps of these events
+    def get_events(self, file_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        positions = self._name_to_positions.get(file_name, np.zeros(0, dtype=np.int64))
+        if file_name not in self._name_to_timestamps:
+            timestamps = self._activity_tracker_data[consts.ACTIVITY_TRACKER_COLUMN.TIMESTAMP_ATI.value].iloc[positions]
+            self._name_to_timestamps[file_name] = np.zeros(0, dtype=np.int64) if len(positions) == 0 else \
+                get_timestamps_by_format(timestamps)
+        return positions, self._name_to_timestamps[file_name]
+
+
+# Returns the index of the code tracker row for each activity tracker event: the event belongs to the last row, which
+# is not later than the event, but the rows before the row of the previous event are not taken into account.
+# The times of the code tracker rows are given starting from the second row, since the events before it belong to
+# the first row. If the times are sorted, the rows are found by the binary search, otherwise they are found by one
+# pass through the rows, as the rows are handled in the same order for all events
+def __get_ct_row_indices(next_ct_times: np.ndarray, ati_times: np.ndarray) -> np.ndarray:
+    if np.all(next_ct_times[1:] >= next_ct_times[:-1]):
+        return np.maximum.accumulate(np.searchsorted(next_ct_times, ati_times, side='right'))
+    ct_row_indices = np.empty(len(ati_times), dtype=np.int64)
+    ct_i = 0
+    for ati_i, ati_time in enumerate(ati_times):
+        while ct_i < len(next_ct_times) and next_ct_times[ct_i] <= ati_time:
+            ct_i += 1
+        ct_row_indices[ati_i] = ct_i
+    return ct_row_indices
 
 
 def merge_task_tracker_and_activity_tracker_data(code_tracker_data: pd.DataFrame,
-                                                 activity_tracker_data: pd.DataFrame) -> pd.DataFrame:
+                                                 activity_tracker_data: pd.DataFrame,
+                                                 ati_index: Optional[ActivityTrackerIndex] = None) -> pd.DataFrame:
+    """
+    Each activity tracker event of the code tracker file belongs to the last code tracker row, which is not later than
+    the event. If several events belong to the same row, the row is repeated for each of them, the rows without
+    events get empty values.
+    The index of the activity tracker data can be built in advance to be shared by all code tracker files of the task,
+    so the activity tracker timestamps of each file are parsed once (see ActivityTrackerIndex). The dates of the code
+    tracker file are parsed on each call.
+    """
     log.info('Start merging code tracker and activity tracker data')
-    res = __get_default_dict_for_at()
+    if ati_index is None or ati_index.activity_tracker_data is not activity_tracker_data:
+        ati_index = ActivityTrackerIndex(activity_tracker_data)
     ct_file_name = code_tracker_data[consts.TASK_TRACKER_COLUMN.FILE_NAME.value].iloc[0]
-    ct_i = 0
-
-    for ati_i in range(activity_tracker_data.shape[0]):
-        activity_tracker_file_path = activity_tracker_data[consts.ACTIVITY_TRACKER_COLUMN.CURRENT_FILE.value].iloc[
-            ati_i]
-        if not __are_same_files(ct_file_name, activity_tracker_file_path):
-            continue
-
-        ati_time = get_datetime_by_format(
-            activity_tracker_data[consts.ACTIVITY_TRACKER_COLUMN.TIMESTAMP_ATI.value].iloc[ati_i])
-
-        while not is_last(ct_i, code_tracker_data) and is_next_ct_valid(ati_time, ct_i, code_tracker_data):
-            if not is_ct_i_filled(ct_i, res):
-                __add_values_in_ati_dict(res)
-
-            ct_i += 1
-
-        if is_ct_i_filled(ct_i, res):
-            ct_row = list(code_tracker_data.iloc[ct_i])
-            code_tracker_data = __insert_row(code_tracker_data, ct_i + 1, ct_row)
-            ct_i += 1
-
-        __add_values_in_ati_dict_by_ati_index(res, activity_tracker_data, ati_i)
-
+    ati_positions, ati_times = ati_index.get_events(ct_file_name)
+    ati_data = activity_tracker_data.iloc[ati_positions]
+    ct_row_indices = np.zeros(0, dtype=np.int64)
+    if ati_data.shape[0] > 0:
+        next_ct_times = get_timestamps_by_format(code_tracker_data[consts.TASK_TRACKER_COLUMN.DATE.value].iloc[1:])
+        ct_row_indices = __get_ct_row_indices(next_ct_times, ati_times)
     log.info('Finish handling the activity tracker file')
 
-    times = code_tracker_data.shape[0] - __get_dict_lists_size(res)
-    while times > 0:
-        __add_values_in_ati_dict(res)
-        times -= 1
-
-    log.info('Finish setting empty values for the last code tracker items')
+    # The events belong to the rows in their order, so the events of each row follow each other
+    events_numbers = np.bincount(ct_row_indices, minlength=code_tracker_data.shape[0])
+    rows_numbers = np.maximum(events_numbers, 1)
+    first_row_positions = np.cumsum(rows_numbers) - rows_numbers
+    first_event_indices = np.cumsum(events_numbers) - events_numbers
+    event_positions = first_row_positions[ct_row_indices] + np.arange(len(ct_row_indices)) \
+        - first_event_indices[ct_row_indices]
 
+    res = __get_default_dict_for_at()
+    for column in res.keys():
+        values = np.full(rows_numbers.sum(), '', dtype=object)
+        values[event_positions] = ati_data[column].to_numpy(dtype=object)
+        res[column] = values.tolist()
+    log.info('Finish setting empty values for the code tracker items without events')
+
+    if len(ct_row_indices) > 0 and rows_numbers.sum() > code_tracker_data.shape[0]:
+        code_tracker_data = code_tracker_data.iloc[np.repeat(np.arange(code_tracker_data.shape[0]), rows_numbers)]
+        code_tracker_data.index = [*range(code_tracker_data.shape[0])]
     code_tracker_data = __create_joined_code_tracker_data_frame(code_tracker_data, res)
     log.info('Finish merging code tracker and activity tracker data')
     return code_tracker_data
@@ -2,7 +2,8 @@
 
 import csv
 import logging
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Dict
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
 
 import pandas as pd
 
@@ -11,12 +12,15 @@ from src.main.util.log_util import log_and_raise_error
 from src.main.processing import activity_tracker_handler as ath
 from src.main.processing.task_tracker_handler import handle_tt_file
 from src.main.processing.activity_tracker_handler import handle_ati_file, get_tt_name_from_ati_data, \
-    get_files_from_ati
+    ActivityTrackerIndex
 from src.main.util.file_util import get_original_file_name, get_all_file_system_items, get_output_directory, \
     write_result, extension_file_condition, user_subdirs_condition
 
 log = logging.getLogger(consts.LOGGER_NAME)
 
+# In the parallel mode not more than this number of task folders per worker are submitted to the pool at once
+MAX_PENDING_FOLDERS_PER_WORKER = 2
+
 
 def is_tt_file(csv_file: str, column: consts.TASK_TRACKER_COLUMN = consts.TASK_TRACKER_COLUMN.CHOSEN_TASK) -> bool:
     """
@@ -73,25 +77,37 @@ def __separate_ati_and_tt_files(files: List[str]) -> Tuple[List[str], Optional[s
     return files, ati_file
 
 
+def get_ati_index(ati_df: Optional[pd.DataFrame]) -> Optional[ActivityTrackerIndex]:
+    """
+    Build the index of the activity tracker data once for the task folder to share it by all task-tracker files.
+    If the index cannot be built, the activity tracker data is not used.
+    """
+    if ati_df is None:
+        return None
+    try:
+        return ActivityTrackerIndex(ati_df)
+    except ValueError:
+        return None
+
+
 def handle_tt_and_at(tt_file: str, tt_df: pd.DataFrame, ati_df: pd.DataFrame,
-                     language: consts.LANGUAGE = consts.LANGUAGE.PYTHON) -> pd.DataFrame:
+                     language: consts.LANGUAGE = consts.LANGUAGE.PYTHON,
+                     ati_index: Optional[ActivityTrackerIndex] = None) -> pd.DataFrame:
     """
     Try to find the current task-tracker file among the files tracked by the activity tracker plugin.
     If this file was found, combine the active tracker data with the task-tracker data.
     If no activities were found for the given task-tracker file,
     fill the information about events in IDE with empty values.
+    The index of the activity tracker data can be built in advance by get_ati_index.
     """
-    files_from_at = None
-    if ati_df is not None:
-        try:
-            files_from_at = get_files_from_ati(ati_df)
-        except ValueError:
-            ati_df = None
+    if ati_index is None or ati_index.activity_tracker_data is not ati_df:
+        ati_index = get_ati_index(ati_df)
+    files_from_at = None if ati_index is None else ati_index.files
 
     tt_df[consts.TASK_TRACKER_COLUMN.FILE_NAME.value], does_contain_tt_name \
         = get_tt_name_from_ati_data(tt_file, language, files_from_at)
-    if ati_df is not None and does_contain_tt_name:
-        tt_df = ath.merge_task_tracker_and_activity_tracker_data(tt_df, ati_df)
+    if ati_index is not None and does_contain_tt_name:
+        tt_df = ath.merge_task_tracker_and_activity_tracker_data(tt_df, ati_df, ati_index)
         return tt_df
 
     ati_new_data = pd.DataFrame(ath.get_full_default_columns_for_at(tt_df.shape[0]))
@@ -99,33 +115,85 @@ def handle_tt_and_at(tt_file: str, tt_df: pd.DataFrame, ati_df: pd.DataFrame,
     return tt_df
 
 
-def merge_tt_with_ati(path: str, to_filter_ati_data: bool = True) -> str:
+# The results are written by the task folder itself, so the data frames of the folder are kept in memory only while
+# the folder is handled
+def __merge_task_folder(path: str, output_directory: str, task_folder: str, to_filter_ati_data: bool = True) -> None:
+    log.info(f'Start handling the folder {task_folder}')
+    files = get_all_file_system_items(task_folder, extension_file_condition(consts.EXTENSION.CSV))
+    try:
+        tt_files, ati_file = __separate_ati_and_tt_files(files)
+    # Skip the current folder
+    except ValueError:
+        return
+
+    ati_df = handle_ati_file(ati_file, to_filter_ati_data)
+    ati_index = get_ati_index(ati_df)
+    for tt_file in tt_files:
+        tt_df, language = handle_tt_file(tt_file)
+        tt_df = handle_tt_and_at(tt_file, tt_df, ati_df, language, ati_index)
+        write_result(output_directory, path, tt_file, tt_df)
+
+
+def __get_task_folders(path: str) -> List[str]:
+    user_folders = get_all_file_system_items(path, user_subdirs_condition, consts.FILE_SYSTEM_ITEM.SUBDIR)
+    return [task_folder for user_folder in user_folders
+            for task_folder in get_all_file_system_items(user_folder, item_type=consts.FILE_SYSTEM_ITEM.SUBDIR)]
+
+
+def __collect_folder_error(task_folder: str, future: Future, task_folder_to_error: Dict[str, str]) -> None:
+    error = future.exception()
+    if error is not None:
+        log.error(f'Cannot handle the folder {task_folder}: {repr(error)}')
+        task_folder_to_error[task_folder] = repr(error)
+
+
+# Returns the errors of the task folders, which cannot be handled
+def __merge_task_folders_in_parallel(path: str, output_directory: str, task_folders: List[str], workers: int,
+                                     to_filter_ati_data: bool = True) -> Dict[str, str]:
+    task_folder_to_error: Dict[str, str] = {}
+    pending_futures: Dict[Future, str] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for task_folder in task_folders:
+            # The folders are submitted lazily, so the pool queue doesn't grow with the number of folders
+            while len(pending_futures) >= workers * MAX_PENDING_FOLDERS_PER_WORKER:
+                done_futures, _ = wait(pending_futures.keys(), return_when=FIRST_COMPLETED)
+                for future in done_futures:
+                    __collect_folder_error(pending_futures.pop(future), future, task_folder_to_error)
+            future = executor.submit(__merge_task_folder, path, output_directory, task_folder, to_filter_ati_data)
+            pending_futures[future] = task_folder
+        for future, task_folder in pending_futures.items():
+            __collect_folder_error(task_folder, future, task_folder_to_error)
+    return task_folder_to_error
+
+
+def merge_tt_with_ati(path: str, to_filter_ati_data: bool = True, workers: int = 1) -> str:
     """
     At this stage, merging data from the task-tracker plugin and activity tracker plugin takes place.
     Code snapshots that did not find activity tracker events are assigned empty values.
 
+    If workers is more than 1, the task folders are merged in a pool of the workers processes. Each worker handles
+    one folder at a time and writes its results, so the files are the same as in the sequential merging, and only
+    the data of the handled folders is kept in memory. A folder, which cannot be handled, doesn't stop the merging of
+    other folders, but an error is raised after all folders are handled, as the sequential merging stops on it.
+
     For more details see
     https://github.com/JetBrains-Research/codetracker-data/wiki/Data-preprocessing:-merge-activity-tracker-and-code-tracker-files
     """
     output_directory = get_output_directory(path, consts.MERGING_TT_AND_ATI_OUTPUT_DIRECTORY)
+    if workers > 1:
+        log.info(f'Merge the task folders in {workers} workers')
+        task_folder_to_error = __merge_task_folders_in_parallel(path, output_directory, __get_task_folders(path),
+                                                                workers, to_filter_ati_data)
+        if task_folder_to_error:
+            log_and_raise_error(f'{len(task_folder_to_error)} folders cannot be handled: '
+                                f'{", ".join(task_folder_to_error.keys())}', log)
+        return output_directory
+
     user_folders = get_all_file_system_items(path, user_subdirs_condition, consts.FILE_SYSTEM_ITEM.SUBDIR)
     for user_folder in user_folders:
         log.info(f'Start handling the folder {user_folder}')
         task_folders = get_all_file_system_items(user_folder, item_type=consts.FILE_SYSTEM_ITEM.SUBDIR)
         for task_folder in task_folders:
-            log.info(f'Start handling the folder {task_folder}')
-            files = get_all_file_system_items(task_folder, extension_file_condition(consts.EXTENSION.CSV))
-            try:
-                tt_files, ati_file = __separate_ati_and_tt_files(files)
-            # Skip the current folder
-            except ValueError:
-                continue
-
-            ati_df = handle_ati_file(ati_file, to_filter_ati_data)
-            for tt_file in tt_files:
-                tt_df, language = handle_tt_file(tt_file)
-                tt_df = handle_tt_and_at(tt_file, tt_df, ati_df, language)
-                write_result(output_directory, path, tt_file, tt_df)
-
+            __merge_task_folder(path, output_directory, task_folder, to_filter_ati_data)
         log.info(f'Finish handling the folder {user_folder}')
     return output_directory
@@ -0,0 +1,61 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import shutil
+import logging
+from typing import Optional, Tuple
+
+from src.main.util.consts import LOGGER_NAME
+from src.main.task_scoring.tests_results_cache import get_fragment_hash
+from src.main.util.file_util import does_exist, create_directory, create_file
+
+log = logging.getLogger(LOGGER_NAME)
+
+COMPILATION_ERROR_EXTENSION = '.error'
+
+
+class CompilationCache:
+    """
+    Compiled files and compilation errors of the fragments, which are stored in the folder by the hash of the fragment
+    and the kind of the compilation, for example, a jar with or without the runtime. The cache is kept between runs
+    and isn't evicted, so it's used only if its folder is set. The folder can be shared by several worker processes.
+    """
+
+    def __init__(self, folder: str):
+        self._folder = folder
+        create_directory(self._folder)
+
+    @property
+    def folder(self) -> str:
+        return self._folder
+
+    def __get_cached_files(self, source_code: str, kind: str) -> Tuple[str, str]:
+        base = os.path.join(self._folder, f'{get_fragment_hash(source_code)}_{kind}')
+        return base, base + COMPILATION_ERROR_EXTENSION
+
+    def restore(self, source_code: str, kind: str, compiled_file: str) -> Optional[bool]:
+        """
+        Copy the cached compiled file of the fragment to the compiled_file.
+        Returns True if it's copied, False if the fragment has a cached compilation error, None if it's not cached.
+        """
+        cached_file, cached_error = self.__get_cached_files(source_code, kind)
+        if does_exist(cached_file):
+            # Unlike copyfile, copy keeps the permissions, so the copied binaries are executable
+            shutil.copy(cached_file, compiled_file)
+            return True
+        if does_exist(cached_error):
+            return False
+        return None
+
+    def put(self, source_code: str, kind: str, compiled_file: str, is_correct: bool) -> None:
+        cached_file, cached_error = self.__get_cached_files(source_code, kind)
+        cached_file = cached_file if is_correct else cached_error
+        # The files are replaced atomically, since the folder can be shared by several worker processes
+        temporary_file = f'{cached_file}.{os.getpid()}'
+        if not is_correct:
+            create_file('', temporary_file)
+        elif does_exist(compiled_file):
+            shutil.copy(compiled_file, temporary_file)
+        else:
+            return
+        os.replace(temporary_file, cached_file)
@@ -1,17 +1,69 @@
 # Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
 
+import os
+import atexit
 import logging
-from typing import List
+import tempfile
+from typing import List, Optional, Tuple
 
 from src.main.util import consts
 from src.main.util.consts import LANGUAGE, EXTENSION
-from src.main.util.file_util import change_extension_to
-from src.main.task_scoring.task_checker import ITaskChecker, check_call_safely, check_output_safely, SOURCE_OBJECT_NAME
+from src.main.task_scoring.sandbox import Sandbox
+from src.main.task_scoring.compilation_cache import CompilationCache
+from src.main.util.file_util import change_extension_to, create_file, remove_directory, remove_file
+from src.main.task_scoring.task_checker import ITaskChecker, check_call_safely, check_output_safely, \
+    SOURCE_OBJECT_NAME, check_call_safely_async, check_output_safely_async
 
 log = logging.getLogger(consts.LOGGER_NAME)
 
+# The most used headers of the fragments
+PRECOMPILED_HEADERS = ['iostream', 'bits/stdc++.h']
+COMPILED_BINARY_KIND = 'out'
+
+# The folder with precompiled headers is built once for the process and removed at exit
+__precompiled_headers_folder: Optional[str] = None
+
+
+# g++ looks for header.gch before the header in each include folder, so the folder is passed by -I to use them.
+# If a precompiled header cannot be used, for example, it's not the first include, g++ uses the usual header,
+# so the compilation results are the same
+def get_precompiled_headers_folder() -> str:
+    global __precompiled_headers_folder
+    if __precompiled_headers_folder is None:
+        folder = tempfile.mkdtemp(prefix='precompiled_headers_')
+        atexit.register(remove_directory, folder)
+        for header in PRECOMPILED_HEADERS:
+            header_file = os.path.join(folder, header + '.h')
+            create_file(f'#include <{header}>\n', header_file)
+            precompiled_header = os.path.join(folder, header + '.gch')
+            if not check_call_safely(['g++', '-x', 'c++-header', header_file, '-o', precompiled_header], None):
+                log.info(f'Cannot precompile the header {header}')
+            remove_file(header_file)
+        __precompiled_headers_folder = folder
+    return __precompiled_headers_folder
+
 
 class CppTaskChecker(ITaskChecker):
+    """
+    If the compilation_cache_folder is set, compiled binaries and compilation errors are stored in the compilation
+    cache (see CompilationCache), so the same fragments are not compiled again in this and the next runs.
+
+    If to_use_pch is True, fragments are compiled with precompiled standard headers (see PRECOMPILED_HEADERS).
+
+    If to_check_syntax_first is True, fragments, which are too small or don't have any output, are checked by
+    g++ -fsyntax-only instead of building binaries, since tests are not run on them anyway. Note: linker errors,
+    for example, the missing main function, are not found by it, so such fragments get the rate of the correct code.
+    """
+
+    def __init__(self, sandbox: Optional[Sandbox] = None, to_use_pch: bool = False,
+                 to_check_syntax_first: bool = False, compilation_cache_folder: Optional[str] = None,
+                 to_limit_resources: bool = False):
+        super().__init__(sandbox, to_limit_resources)
+        self._to_use_pch = to_use_pch
+        self._to_check_syntax_first = to_check_syntax_first
+        self._compilation_cache = CompilationCache(compilation_cache_folder) \
+            if compilation_cache_folder is not None else None
+        self._source_code = ''
 
     @property
     def language(self) -> LANGUAGE:
@@ -31,14 +83,53 @@ class CppTaskChecker(ITaskChecker):
         return ['cout', 'printf']
 
     def create_source_file(self, source_code: str) -> str:
+        self._source_code = source_code
         return self.create_source_file_with_name(source_code, SOURCE_OBJECT_NAME)
 
+    def __get_compiler_args(self) -> List[str]:
+        return ['g++', '-I', get_precompiled_headers_folder()] if self._to_use_pch else ['g++']
+
+    # Returns the compiler args and is the binary built by them
+    def __get_compilation_args(self, source_file: str, binary: str) -> Tuple[List[str], bool]:
+        if self._to_check_syntax_first and not self.passes_cheap_filters(self._source_code):
+            return self.__get_compiler_args() + ['-fsyntax-only', source_file], False
+        return self.__get_compiler_args() + ['-o', binary, source_file], True
+
+    def __cache_compilation(self, binary: str, is_correct: bool, is_binary_built: bool) -> bool:
+        # No binary is built, so there is nothing to cache
+        if self._compilation_cache is None or is_correct and not is_binary_built:
+            return is_correct
+        self._compilation_cache.put(self._source_code, COMPILED_BINARY_KIND, binary, is_correct)
+        return is_correct
+
+    # Returns None if the fragment is not cached
+    def __restore_compilation(self, binary: str) -> Optional[bool]:
+        if self._compilation_cache is None:
+            return None
+        return self._compilation_cache.restore(self._source_code, COMPILED_BINARY_KIND, binary)
+
     def is_source_file_correct(self, source_file: str) -> bool:
-        args = ['g++', '-o', change_extension_to(source_file, EXTENSION.OUT), source_file]
-        is_correct = check_call_safely(args, None)
+        binary = change_extension_to(source_file, EXTENSION.OUT)
+        is_correct = self.__restore_compilation(binary)
+        if is_correct is None:
+            args, is_binary_built = self.__get_compilation_args(source_file, binary)
+            is_correct = self.__cache_compilation(binary, check_call_safely(args, None), is_binary_built)
+        log.info(f'Source code is correct: {is_correct}')
+        return is_correct
+
+    async def is_source_file_correct_async(self, source_file: str) -> bool:
+        binary = change_extension_to(source_file, EXTENSION.OUT)
+        is_correct = self.__restore_compilation(binary)
+        if is_correct is None:
+            args, is_binary_built = self.__get_compilation_args(source_file, binary)
+            is_correct = self.__cache_compilation(binary, await check_call_safely_async(args, None), is_binary_built)
         log.info(f'Source code is correct: {is_correct}')
         return is_correct
 
     def run_test(self, input: str, expected_output: str, source_file: str) -> bool:
         args = [change_extension_to(source_file, EXTENSION.OUT)]
-        return check_output_safely(input, expected_output, args)
+        return check_output_safely(input, expected_output, args, executor=self.executor)
+
+    async def run_test_async(self, input: str, expected_output: str, source_file: str) -> bool:
+        args = [change_extension_to(source_file, EXTENSION.OUT)]
+        return await check_output_safely_async(input, expected_output, args, executor=self.executor)
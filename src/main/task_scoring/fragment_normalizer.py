@@ -0,0 +1,116 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import io
+import re
+import ast
+import json
+import logging
+import tokenize
+from typing import List, Optional, Dict, Tuple, Callable
+
+import javalang
+
+from src.main.util.consts import LOGGER_NAME, LANGUAGE
+from src.main.task_scoring.task_checker import ITaskChecker
+
+log = logging.getLogger(LOGGER_NAME)
+
+# Comments, which can change the results of the checking: type comments and inline configuration of mypy,
+# and the encoding declaration
+PYTHON_MEANINGFUL_COMMENT_PATTERN = re.compile(r'#\s*(type:|mypy:)|coding[:=]')
+# A key of the normalized fragment cannot be the same as a key of the fragment, which is not normalized
+NORMALIZED_KEY_PREFIX = '\0'
+
+
+# Returns None if the fragment cannot be parsed, since the tokenizer accepts some of the incorrect fragments,
+# for example, with inconsistent use of tabs and spaces in the indentation
+def get_python_tokens(fragment: str) -> Optional[List[Tuple[int, str]]]:
+    try:
+        ast.parse(fragment)
+        tokens = []
+        for token in tokenize.generate_tokens(io.StringIO(fragment).readline):
+            # Line breaks inside of the statements don't change the program
+            if token.type == tokenize.NL:
+                continue
+            if token.type == tokenize.COMMENT and not PYTHON_MEANINGFUL_COMMENT_PATTERN.search(token.string):
+                continue
+            # Only the levels of the indentation matter, they are given by INDENT and DEDENT tokens
+            if token.type in (tokenize.INDENT, tokenize.NEWLINE):
+                tokens.append((token.type, ''))
+            else:
+                tokens.append((token.type, token.string))
+        return tokens
+    except Exception:
+        return None
+
+
+# Javalang skips comments. Unicode escapes are translated by javac before the tokenization, so they can turn
+# a comment into code, and fragments with them are not normalized
+def get_java_tokens(fragment: str) -> Optional[List[Tuple[str, str]]]:
+    if '\\u' in fragment:
+        return None
+    try:
+        return [(type(token).__name__, token.value) for token in javalang.tokenizer.tokenize(fragment)]
+    except Exception:
+        return None
+
+
+LANGUAGE_TO_TOKENIZER: Dict[LANGUAGE, Callable[[str], Optional[list]]] = {
+    LANGUAGE.PYTHON: get_python_tokens,
+    LANGUAGE.JAVA: get_java_tokens
+}
+
+
+class FragmentNormalizer:
+    """
+    Finds keys of the fragments, which are the same for the fragments differing only in whitespace and comments,
+    so such fragments are checked once and share their tests results and cached results.
+    For Python and Java fragments the keys are their tokens (see get_python_tokens and get_java_tokens). Other
+    fragments, including the ones, which cannot be tokenized, are keys themselves.
+    The cheap filters (see ITaskChecker.passes_cheap_filters) depend on the text of the fragments, so their results
+    are a part of the keys.
+
+    Note: code after the last output is not removed, since it can raise an error or never finish.
+
+    The normalizer also counts the fragments, which are not checked, and the tests runs avoided by it.
+    """
+
+    def __init__(self):
+        self._avoided_checks = 0
+        self._avoided_tests_runs = 0
+
+    @property
+    def avoided_checks(self) -> int:
+        return self._avoided_checks
+
+    @property
+    def avoided_tests_runs(self) -> int:
+        return self._avoided_tests_runs
+
+    @staticmethod
+    def get_key(fragment: str, task_checker: ITaskChecker) -> str:
+        tokenizer = LANGUAGE_TO_TOKENIZER.get(task_checker.language)
+        tokens = tokenizer(fragment) if tokenizer is not None else None
+        if tokens is None:
+            return fragment
+        return NORMALIZED_KEY_PREFIX + json.dumps([task_checker.passes_cheap_filters(fragment), tokens])
+
+    # The first fragment of each group is checked, the other ones get its results
+    def group(self, fragments: List[str], task_checker: ITaskChecker) -> Dict[str, List[str]]:
+        key_to_fragments_dict: Dict[str, List[str]] = {}
+        for fragment in fragments:
+            key_to_fragments_dict.setdefault(self.get_key(fragment, task_checker), []).append(fragment)
+        return key_to_fragments_dict
+
+    # The tests runs are the number of tests, which are run on each of the not checked fragments
+    def add_avoided(self, checks: int, tests_runs: int) -> None:
+        self._avoided_checks += checks
+        self._avoided_tests_runs += checks * tests_runs
+
+    def merge(self, other: 'FragmentNormalizer') -> None:
+        self._avoided_checks += other._avoided_checks
+        self._avoided_tests_runs += other._avoided_tests_runs
+
+    def log_avoided(self) -> None:
+        log.info(f'{self._avoided_checks} fragments are not checked, since they differ from the checked ones only in '
+                 f'whitespace and comments, {self._avoided_tests_runs} tests runs are avoided')
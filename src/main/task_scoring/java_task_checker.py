@@ -1,25 +1,63 @@
 # Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
 
+import os
 import logging
-from typing import List
+from typing import List, Optional, Dict
 
 import javalang
 from javalang.tokenizer import LexerError
 from javalang.parser import JavaSyntaxError, JavaParserError
 
 from src.main.util import consts
-from src.main.util.consts import LANGUAGE
-from src.main.util.file_util import get_name_from_path
-from src.main.task_scoring.task_checker import ITaskChecker, check_call_safely, check_output_safely, SOURCE_OBJECT_NAME, \
-    SOURCE_FOLDER
+from src.main.util.consts import LANGUAGE, EXTENSION
+from src.main.util.file_util import get_name_from_path, create_file
+from src.main.task_scoring.sandbox import Sandbox
+from src.main.task_scoring.jvm_harness import get_jvm_harness
+from src.main.task_scoring.process_executor import ProcessExecutor
+from src.main.task_scoring.task_checker import ITaskChecker, check_call_safely, check_output_safely, \
+    SOURCE_OBJECT_NAME, is_output_correct, check_call_safely_async, check_output_safely_async
 
 
 log = logging.getLogger(consts.LOGGER_NAME)
 
+BATCH_JAVAC_CLASS = 'BatchJavac'
+BATCH_JAVAC_HARNESS_KEY = 'javac'
+CLOSING_TO_OPENING_BRACKETS = {')': '(', ']': '[', '}': '{'}
+
+
+# A fragment with unbalanced brackets cannot be compiled, so there is no need to run javac on it.
+# The javalang parser is not used, since it doesn't support the latest Java versions, and its errors don't mean that
+# the fragment cannot be compiled. Unicode escapes are translated by javac before the tokenization, so they can be
+# brackets too, and fragments with them or with lexer errors are left to javac
+def has_balanced_brackets(source_code: str) -> bool:
+    if '\\u' in source_code:
+        return True
+    opening_brackets = []
+    try:
+        for token in javalang.tokenizer.tokenize(source_code):
+            if not isinstance(token, javalang.tokenizer.Separator):
+                continue
+            if token.value in CLOSING_TO_OPENING_BRACKETS.values():
+                opening_brackets.append(token.value)
+            elif token.value in CLOSING_TO_OPENING_BRACKETS:
+                if not opening_brackets or opening_brackets.pop() != CLOSING_TO_OPENING_BRACKETS[token.value]:
+                    return False
+    except Exception:
+        return True
+    return not opening_brackets
+
 
 class JavaTaskChecker(ITaskChecker):
-    def __init__(self):
+    # If to_use_jvm_harness is True, tests are run in the long-lived JVM harness instead of new JVMs,
+    # and prechecked fragments are compiled in one JVM by BatchJavac
+    def __init__(self, sandbox: Optional[Sandbox] = None, to_use_jvm_harness: bool = False,
+                 to_limit_resources: bool = False):
+        super().__init__(sandbox, to_limit_resources)
         self.package = ''
+        self._to_use_jvm_harness = to_use_jvm_harness
+        # Compiled files of the prechecked fragments are kept in the precheck folder
+        self._fragment_to_classes_folder_dict: Dict[str, str] = {}
+        self._classes_folder = self.source_folder
 
     @property
     def language(self) -> LANGUAGE:
@@ -58,16 +96,74 @@ class JavaTaskChecker(ITaskChecker):
             log.exception(e)
             return SOURCE_OBJECT_NAME
 
+    def is_syntax_correct(self, source_code: str) -> bool:
+        return has_balanced_brackets(source_code)
+
     def create_source_file(self, source_code: str) -> str:
+        # The checker can be reused for several fragments, so the package of the previous one should be reset
+        self.package = ''
+        self._classes_folder = self._fragment_to_classes_folder_dict.get(source_code, self.source_folder)
         source_file_name = self.get_java_class_name(source_code)
         return self.create_source_file_with_name(source_code, source_file_name)
 
+    # Each fragment is written into its own folder in the precheck folder and compiled there by one BatchJavac call,
+    # so the compiled files of the correct fragments are used later to run tests
+    def check_fragments_correctness(self, fragments: List[str]) -> Dict[str, bool]:
+        if not self._to_use_jvm_harness:
+            return {}
+        precheck_folder = self._sandbox.prepare_precheck_folder()
+        args = []
+        for i, fragment in enumerate(fragments):
+            folder = os.path.join(precheck_folder, str(i))
+            source_file = os.path.join(folder, self.get_java_class_name(fragment) + EXTENSION.JAVA.value)
+            create_file(fragment, source_file)
+            args += [folder, source_file]
+        self.package = ''
+
+        harness = get_jvm_harness(BATCH_JAVAC_HARNESS_KEY)
+        result = harness.exec([harness.build_folder], BATCH_JAVAC_CLASS, args)
+        exit_codes = result[1].split() if result is not None and result[0] == 0 else []
+        if len(exit_codes) != len(fragments):
+            log.info('Cannot compile fragments by one BatchJavac call, they will be compiled one by one')
+            return {}
+        fragment_to_correctness_dict = {}
+        for fragment, folder, exit_code in zip(fragments, args[::2], exit_codes):
+            fragment_to_correctness_dict[fragment] = exit_code == '0'
+            if exit_code == '0':
+                self._fragment_to_classes_folder_dict[fragment] = folder
+        return fragment_to_correctness_dict
+
     def is_source_file_correct(self, source_file: str) -> bool:
-        args = ['javac', source_file, '-d', SOURCE_FOLDER]
+        args = ['javac', source_file, '-d', self.source_folder]
         is_correct = check_call_safely(args, None)
         log.info(f'Source code is correct: {is_correct}')
         return is_correct
 
+    async def is_source_file_correct_async(self, source_file: str) -> bool:
+        args = ['javac', source_file, '-d', self.source_folder]
+        is_correct = await check_call_safely_async(args, None)
+        log.info(f'Source code is correct: {is_correct}')
+        return is_correct
+
+    # The JVM reserves much more memory than it uses and runs several threads, so only the time and the output
+    # are limited
+    def create_executor(self) -> Optional[ProcessExecutor]:
+        return ProcessExecutor(cpu_limit=None) if self.to_limit_resources else None
+
+    def __get_main_class(self, source_file: str) -> str:
+        return self.package + get_name_from_path(source_file, False)
+
     def run_test(self, input: str, expected_output: str, source_file: str) -> bool:
-        args = ['java', '-cp', SOURCE_FOLDER, self.package + get_name_from_path(source_file, False)]
-        return check_output_safely(input, expected_output, args)
+        main_class = self.__get_main_class(source_file)
+        if self._to_use_jvm_harness:
+            actual_out = get_jvm_harness().run([self._classes_folder], main_class, input)
+            return actual_out is not None and is_output_correct(actual_out, expected_output)
+        args = ['java', '-cp', self._classes_folder, main_class]
+        return check_output_safely(input, expected_output, args, executor=self.executor)
+
+    # The JVM harness runs one test at a time, so tests are run in it synchronously
+    async def run_test_async(self, input: str, expected_output: str, source_file: str) -> bool:
+        if self._to_use_jvm_harness:
+            return self.run_test(input, expected_output, source_file)
+        args = ['java', '-cp', self._classes_folder, self.__get_main_class(source_file)]
+        return await check_output_safely_async(input, expected_output, args, executor=self.executor)
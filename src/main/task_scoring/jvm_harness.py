@@ -0,0 +1,196 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import time
+import atexit
+import base64
+import locale
+import logging
+import tempfile
+import selectors
+from subprocess import Popen, PIPE, DEVNULL
+from typing import List, Optional, Tuple, Dict
+
+from src.main.util.log_util import log_and_raise_error
+from src.main.task_scoring.task_checker import check_call_safely, decode_output
+from src.main.util.consts import LOGGER_NAME, TIMEOUT, JVM_HARNESS_PATH, EXTENSION, OUTPUT_LIMIT
+from src.main.util.file_util import remove_directory, get_name_from_path, get_all_file_system_items, \
+    extension_file_condition
+
+log = logging.getLogger(LOGGER_NAME)
+
+HARNESS_SOURCE = os.path.join(JVM_HARNESS_PATH, 'TestsHarness' + EXTENSION.JAVA.value)
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class JvmHarness:
+    """
+    A long-lived JVM, which runs main methods of compiled Java and Kotlin programs (see TestsHarness.java),
+    so the JVM startup is paid once instead of once per test. Each program is loaded in a new class loader.
+    If a test is not finished in time or the program exits the JVM, the harness is killed and started again
+    on the next running, so the results are the same as for running each test in a new JVM.
+    Note: unlike a new JVM, the harness doesn't wait for non-daemon threads started by the program.
+
+    The harness can also call the exec method of a class, for example, to keep a compiler warm (see exec).
+
+    The output of each request is limited by output_limit bytes as for the tests run in new processes
+    (see ProcessExecutor): the program, which writes more, is stopped by the harness, and the request fails.
+    """
+
+    def __init__(self, jvm_args: Optional[List[str]] = None, output_limit: int = OUTPUT_LIMIT):
+        self._jvm_args = jvm_args if jvm_args is not None else []
+        self._output_limit = output_limit
+        self._build_folder: Optional[str] = None
+        self._process: Optional[Popen] = None
+        self._buffer = b''
+
+    @staticmethod
+    def __encode(value: bytes) -> str:
+        return base64.b64encode(value).decode('ascii')
+
+    def __compile(self) -> str:
+        build_folder = tempfile.mkdtemp(prefix='jvm_harness_')
+        sources = get_all_file_system_items(JVM_HARNESS_PATH, extension_file_condition(EXTENSION.JAVA))
+        if not check_call_safely(['javac', '-d', build_folder] + sources, None):
+            remove_directory(build_folder)
+            log_and_raise_error(f'Cannot compile the JVM harness {JVM_HARNESS_PATH}', log)
+        return build_folder
+
+    # The folder with the compiled harness classes, for example, to exec BatchJavac
+    @property
+    def build_folder(self) -> str:
+        if self._build_folder is None:
+            self._build_folder = self.__compile()
+        return self._build_folder
+
+    def __start(self) -> Popen:
+        log.info('Start the JVM harness')
+        self._buffer = b''
+        main_class = get_name_from_path(HARNESS_SOURCE, with_extension=False)
+        return Popen(['java'] + self._jvm_args + ['-cp', self.build_folder, main_class, str(self._output_limit)],
+                     stdin=PIPE, stdout=PIPE, stderr=DEVNULL)
+
+    def __stop(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+    # Returns None if time is out or the harness is finished
+    def __read_line(self, deadline: Optional[float]) -> Optional[bytes]:
+        fd = self._process.stdout.fileno()
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while b'\n' not in self._buffer:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0 or not selector.select(timeout):
+                    return None
+                data = os.read(fd, READ_CHUNK_SIZE)
+                if not data:
+                    return None
+                self._buffer += data
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return line
+
+    def __get_exit_code(self, deadline: Optional[float]) -> Optional[int]:
+        try:
+            return self._process.wait(None if deadline is None else max(deadline - time.monotonic(), 0))
+        except Exception as e:
+            log.exception(e)
+            return None
+
+    # Returns the exit code and the output or None if time is out, the output is more than the limit
+    # or the harness is finished unexpectedly
+    def __request(self, command: str, args: List[bytes], timeout: Optional[int]) -> Optional[Tuple[int, bytes]]:
+        if self._process is None or self._process.poll() is not None:
+            self._process = self.__start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        request = ' '.join([command] + list(map(self.__encode, args)))
+        try:
+            self._process.stdin.write(request.encode('ascii') + b'\n')
+            self._process.stdin.flush()
+            line = self.__read_line(deadline)
+        except OSError as e:
+            log.exception(e)
+            line = None
+
+        parts = line.decode('ascii').split(' ') if line is not None else []
+        if parts[:1] == ['DONE'] and len(parts) == 3:
+            return int(parts[1]), base64.b64decode(parts[2])
+        if parts[:1] == ['EXIT'] and len(parts) == 2:
+            # The program has called System.exit, so the harness has to be started again
+            exit_code = self.__get_exit_code(deadline)
+            self.__stop()
+            return (exit_code, base64.b64decode(parts[1])) if exit_code is not None else None
+        if parts in [['LIMIT'], ['LIMIT_EXIT']]:
+            log.info(f'The output is more than {self._output_limit} bytes')
+            if parts == ['LIMIT_EXIT']:
+                self.__stop()
+            return None
+        log.info('Time is out or the JVM harness is finished unexpectedly')
+        self.__stop()
+        return None
+
+    def run(self, classpath: List[str], main_class: Optional[str], input: str,
+            timeout: Optional[int] = TIMEOUT) -> Optional[str]:
+        """
+        Run the main class with the input as System.in. If main_class is None, the main class is taken from
+        the manifest of the first jar in the classpath, as 'java -jar' does.
+        Returns the output or None if the program has finished with a non-zero exit code, thrown an exception,
+        written more than the output limit or the time is out.
+        """
+        result = self.__request('RUN', [os.pathsep.join(classpath).encode('utf-8'), (main_class or '').encode('utf-8'),
+                                        input.encode(locale.getpreferredencoding(False))], timeout)
+        if result is None:
+            return None
+        exit_code, output = result
+        if exit_code != 0:
+            log.info(f'Running {main_class} in the JVM harness has finished with exit code {exit_code}')
+            return None
+        return decode_output(output)
+
+    def exec(self, classpath: List[str], class_name: str, args: List[str],
+             timeout: Optional[int] = None) -> Optional[Tuple[int, str]]:
+        """
+        Create an instance of the class and call its method exec(PrintStream, String[]) with the args.
+        The class loader is kept, so the next calls with the same classpath are faster.
+        Returns the exit code and the output written to the PrintStream or None if time is out, the output is more
+        than the output limit or the harness is finished unexpectedly.
+        """
+        result = self.__request('EXEC', [os.pathsep.join(classpath).encode('utf-8'), class_name.encode('utf-8'),
+                                         '\0'.join(args).encode('utf-8')], timeout)
+        if result is None:
+            return None
+        exit_code, output = result
+        output = output.decode('utf-8', errors='replace')
+        log.info(f'Exec of {class_name} in the JVM harness has finished with exit code {exit_code}: {output}')
+        return exit_code, output
+
+    def close(self) -> None:
+        if self._process is not None:
+            self._process.stdin.close()
+        self.__stop()
+        if self._build_folder is not None:
+            remove_directory(self._build_folder)
+            self._build_folder = None
+
+    def __enter__(self) -> 'JvmHarness':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+TESTS_HARNESS_KEY = 'tests'
+
+# One harness for each key is shared by all checkers of the process and closed at exit
+__jvm_harnesses: Dict[str, JvmHarness] = {}
+
+
+def get_jvm_harness(key: str = TESTS_HARNESS_KEY, jvm_args: Optional[List[str]] = None) -> JvmHarness:
+    jvm_harness = __jvm_harnesses.get(key)
+    if jvm_harness is None:
+        jvm_harness = JvmHarness(jvm_args)
+        __jvm_harnesses[key] = jvm_harness
+        atexit.register(jvm_harness.close)
+    return jvm_harness
@@ -1,17 +1,74 @@
 # Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
 
+import os
+import shutil
 import logging
-from typing import List
+import zipfile
+from typing import List, Optional
 
 from src.main.util import consts
 from src.main.util.consts import LANGUAGE, EXTENSION
-from src.main.util.file_util import change_extension_to
-from src.main.task_scoring.task_checker import ITaskChecker, check_call_safely, check_output_safely, SOURCE_OBJECT_NAME
+from src.main.task_scoring.sandbox import Sandbox
+from src.main.task_scoring.jvm_harness import get_jvm_harness
+from src.main.task_scoring.process_executor import ProcessExecutor
+from src.main.task_scoring.compilation_cache import CompilationCache
+from src.main.util.file_util import change_extension_to, does_exist
+from src.main.task_scoring.task_checker import ITaskChecker, check_call_safely, check_output_safely, \
+    SOURCE_OBJECT_NAME, is_output_correct, check_call_safely_async, check_output_safely_async
 
 log = logging.getLogger(consts.LOGGER_NAME)
 
+KOTLIN_RUNTIME_JAR = 'kotlin-stdlib.jar'
+KOTLIN_COMPILER_JAR = 'kotlin-compiler.jar'
+KOTLIN_COMPILER_CLASS = 'org.jetbrains.kotlin.cli.jvm.K2JVMCompiler'
+KOTLIN_COMPILER_HARNESS_KEY = 'kotlin_compiler'
+# The same as the kotlinc script uses
+KOTLIN_COMPILER_JVM_ARGS = ['-Xmx256M', '-Xss2m']
+
+
+# Returns the folder of the Kotlin compiler distribution, if kotlinc is found and has the runtime jar
+def find_kotlin_home() -> Optional[str]:
+    kotlinc = shutil.which('kotlinc')
+    if kotlinc is None:
+        return None
+    kotlin_home = os.path.dirname(os.path.dirname(os.path.realpath(kotlinc)))
+    return kotlin_home if does_exist(os.path.join(kotlin_home, 'lib', KOTLIN_RUNTIME_JAR)) else None
+
+
+def get_main_class_from_jar(jar: str) -> Optional[str]:
+    try:
+        with zipfile.ZipFile(jar) as jar_file:
+            manifest = jar_file.read('META-INF/MANIFEST.MF').decode('utf-8')
+    except (OSError, KeyError, zipfile.BadZipFile) as e:
+        log.exception(e)
+        return None
+    # Long lines of the manifest are continued on the next lines, which start with a space
+    for line in manifest.replace('\r\n', '\n').replace('\n ', '').split('\n'):
+        if line.startswith('Main-Class:'):
+            return line[len('Main-Class:'):].strip()
+    return None
+
 
 class KotlinTaskChecker(ITaskChecker):
+    """
+    If the Kotlin compiler distribution is found, fragments are compiled without the runtime and
+    run with the shared runtime jar of the distribution, otherwise fat jars with the runtime are built.
+
+    If the compilation_cache_folder is set, compiled jars and compilation errors are stored in the compilation cache
+    (see CompilationCache), so the same fragments are not compiled again in this and the next runs.
+
+    If to_use_jvm_harness is True, tests are run in the long-lived JVM harness instead of new JVMs, and fragments are
+    compiled by the warm compiler in another long-lived JVM instead of starting kotlinc for each fragment.
+    """
+
+    def __init__(self, sandbox: Optional[Sandbox] = None, to_use_jvm_harness: bool = False,
+                 compilation_cache_folder: Optional[str] = None, to_limit_resources: bool = False):
+        super().__init__(sandbox, to_limit_resources)
+        self._to_use_jvm_harness = to_use_jvm_harness
+        self._compilation_cache = CompilationCache(compilation_cache_folder) \
+            if compilation_cache_folder is not None else None
+        self._kotlin_home = find_kotlin_home()
+        self._source_code = ''
 
     @property
     def language(self) -> LANGUAGE:
@@ -28,17 +85,117 @@ class KotlinTaskChecker(ITaskChecker):
     def output_strings(self) -> List[str]:
         return ['print']
 
+    @property
+    def runtime_jar(self) -> Optional[str]:
+        return os.path.join(self._kotlin_home, 'lib', KOTLIN_RUNTIME_JAR) if self._kotlin_home is not None else None
+
+    # Jars with and without the runtime are stored separately in the compilation cache
+    @property
+    def compilation_kind(self) -> str:
+        return 'jar' if self.runtime_jar is not None else 'jar_with_runtime'
+
     def create_source_file(self, source_code: str) -> str:
+        self._source_code = source_code
         return self.create_source_file_with_name(source_code, SOURCE_OBJECT_NAME)
 
-    def is_source_file_correct(self, source_file: str) -> bool:
-        args = ['kotlinc', source_file, '-include-runtime', '-d', change_extension_to(source_file, EXTENSION.JAR)]
+    # Returns None if the warm compiler cannot be used
+    def __compile_by_warm_compiler(self, source_file: str, jar: str) -> Optional[bool]:
+        compiler_jar = os.path.join(self._kotlin_home, 'lib', KOTLIN_COMPILER_JAR)
+        if not does_exist(compiler_jar):
+            return None
+        harness = get_jvm_harness(KOTLIN_COMPILER_HARNESS_KEY, KOTLIN_COMPILER_JVM_ARGS)
+        result = harness.exec([compiler_jar], KOTLIN_COMPILER_CLASS,
+                              [source_file, '-d', jar, '-kotlin-home', self._kotlin_home])
+        return result[0] == 0 if result is not None else None
+
+    def __get_compiler_args(self, source_file: str, jar: str) -> List[str]:
+        args = ['kotlinc', source_file, '-d', jar]
+        if self.runtime_jar is None:
+            args.append('-include-runtime')
+        return args
+
+    # Returns None if the warm compiler is not used or cannot be used
+    def __compile_by_warm_compiler_if_needed(self, source_file: str, jar: str) -> Optional[bool]:
+        if self._to_use_jvm_harness and self._kotlin_home is not None:
+            return self.__compile_by_warm_compiler(source_file, jar)
+        return None
+
+    def __compile(self, source_file: str, jar: str) -> bool:
+        is_correct = self.__compile_by_warm_compiler_if_needed(source_file, jar)
+        if is_correct is not None:
+            return is_correct
         # to be sure there is enough time to create a jar, call is checked with timeout=None;
         # there was 'Error: Invalid or corrupt jarfile' even with 5 sec timeout
-        is_correct = check_call_safely(args, None)
+        return check_call_safely(self.__get_compiler_args(source_file, jar), None)
+
+    # The warm compiler compiles one fragment at a time, so fragments are compiled in it synchronously
+    async def __compile_async(self, source_file: str, jar: str) -> bool:
+        is_correct = self.__compile_by_warm_compiler_if_needed(source_file, jar)
+        if is_correct is not None:
+            return is_correct
+        return await check_call_safely_async(self.__get_compiler_args(source_file, jar), None)
+
+    # Returns None if the fragment is not cached
+    def __restore_compilation(self, jar: str) -> Optional[bool]:
+        if self._compilation_cache is None:
+            return None
+        return self._compilation_cache.restore(self._source_code, self.compilation_kind, jar)
+
+    def __cache_compilation(self, jar: str, is_correct: bool) -> bool:
+        if self._compilation_cache is not None:
+            self._compilation_cache.put(self._source_code, self.compilation_kind, jar, is_correct)
+        return is_correct
+
+    def is_source_file_correct(self, source_file: str) -> bool:
+        jar = change_extension_to(source_file, EXTENSION.JAR)
+        is_correct = self.__restore_compilation(jar)
+        if is_correct is None:
+            is_correct = self.__cache_compilation(jar, self.__compile(source_file, jar))
         log.info(f'Source code is correct: {is_correct}')
         return is_correct
 
+    async def is_source_file_correct_async(self, source_file: str) -> bool:
+        jar = change_extension_to(source_file, EXTENSION.JAR)
+        is_correct = self.__restore_compilation(jar)
+        if is_correct is None:
+            is_correct = self.__cache_compilation(jar, await self.__compile_async(source_file, jar))
+        log.info(f'Source code is correct: {is_correct}')
+        return is_correct
+
+    # The JVM reserves much more memory than it uses and runs several threads, so only the time and the output
+    # are limited
+    def create_executor(self) -> Optional[ProcessExecutor]:
+        return ProcessExecutor(cpu_limit=None) if self.to_limit_resources else None
+
+    def __get_classpath(self, source_file: str) -> List[str]:
+        jar = change_extension_to(source_file, EXTENSION.JAR)
+        return [jar] if self.runtime_jar is None else [jar, self.runtime_jar]
+
+    # Returns None if the main class is not found
+    def __get_run_args(self, source_file: str) -> Optional[List[str]]:
+        jar = change_extension_to(source_file, EXTENSION.JAR)
+        if self.runtime_jar is None:
+            return ['java', '-jar', jar]
+        main_class = get_main_class_from_jar(jar)
+        if main_class is None:
+            log.info(f'Main class is not found in {jar}')
+            return None
+        return ['java', '-cp', os.pathsep.join(self.__get_classpath(source_file)), main_class]
+
     def run_test(self, input: str, expected_output: str, source_file: str) -> bool:
-        args = ['java', '-jar', change_extension_to(source_file, EXTENSION.JAR)]
-        return check_output_safely(input, expected_output, args)
+        if self._to_use_jvm_harness:
+            actual_out = get_jvm_harness().run(self.__get_classpath(source_file), None, input)
+            return actual_out is not None and is_output_correct(actual_out, expected_output)
+        args = self.__get_run_args(source_file)
+        if args is None:
+            return False
+        return check_output_safely(input, expected_output, args, executor=self.executor)
+
+    # The JVM harness runs one test at a time, so tests are run in it synchronously
+    async def run_test_async(self, input: str, expected_output: str, source_file: str) -> bool:
+        if self._to_use_jvm_harness:
+            return self.run_test(input, expected_output, source_file)
+        args = self.__get_run_args(source_file)
+        if args is None:
+            return False
+        return await check_output_safely_async(input, expected_output, args, executor=self.executor)
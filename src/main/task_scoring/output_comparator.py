@@ -0,0 +1,71 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import io
+import codecs
+import locale
+import logging
+
+from src.main.util.consts import LOGGER_NAME
+
+log = logging.getLogger(LOGGER_NAME)
+
+# The output can have trailing newlines after the expected output, but not more than this number of characters,
+# so a process, which prints newlines in a loop, is stopped too
+OUTPUT_MARGIN = 1024
+
+
+class OutputComparator:
+    """
+    Compares the output of a process with the expected output chunk by chunk, while the output is read, in the same
+    way as is_output_correct does: the output is decoded with newlines translation as subprocess does with
+    universal_newlines=True (see decode_output), and the trailing newlines are ignored.
+
+    Only the position in the expected output is kept, so the used memory doesn't depend on the output size. The output
+    is mismatched at the first character, which differs from the expected output, or once it's longer than the
+    expected output plus the margin, so the process can be killed at once.
+
+    Note: unlike is_output_correct, the output with more trailing newlines than the margin is incorrect, and the output,
+    which cannot be decoded, is mismatched instead of raising an error.
+    """
+
+    def __init__(self, expected_output: str, margin: int = OUTPUT_MARGIN):
+        self._expected_output = expected_output
+        self._max_length = len(expected_output) + margin
+        decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))()
+        self._decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+        self._position = 0
+        self._is_mismatched = False
+
+    @property
+    def is_mismatched(self) -> bool:
+        return self._is_mismatched
+
+    def __mismatch(self, reason: str) -> None:
+        log.info(f'Output is mismatched at the character {self._position}: {reason}')
+        self._is_mismatched = True
+
+    def __compare(self, text: str) -> None:
+        expected_text = self._expected_output[self._position:self._position + len(text)]
+        if not text.startswith(expected_text):
+            self.__mismatch('it differs from the expected output')
+        elif text[len(expected_text):].strip('\n'):
+            self.__mismatch('it is longer than the expected output')
+        elif self._position + len(text) > self._max_length:
+            self.__mismatch(f'it has more than {self._max_length - len(self._expected_output)} trailing newlines')
+        self._position += len(text)
+
+    # Returns False if the output is mismatched, so the rest of it doesn't need to be read
+    def feed(self, data: bytes, final: bool = False) -> bool:
+        if not self._is_mismatched:
+            try:
+                self.__compare(self._decoder.decode(data, final))
+            except UnicodeDecodeError:
+                self.__mismatch('it cannot be decoded')
+        return not self._is_mismatched
+
+    # Should be called after the whole output is fed
+    def is_output_correct(self) -> bool:
+        if self.feed(b'', final=True) and self._position < len(self._expected_output):
+            self.__mismatch('it is shorter than the expected output')
+        log.info(f'Expected out: {self._expected_output}, actual out is correct: {not self._is_mismatched}')
+        return not self._is_mismatched
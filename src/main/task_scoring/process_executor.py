@@ -0,0 +1,288 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import sys
+import time
+import signal
+import asyncio
+import logging
+import selectors
+from subprocess import Popen, DEVNULL, PIPE
+from typing import List, Optional, Tuple, Any
+
+from src.main.util.consts import LOGGER_NAME, TIMEOUT, OUTPUT_LIMIT
+from src.main.task_scoring.output_comparator import OutputComparator
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+log = logging.getLogger(LOGGER_NAME)
+
+READ_CHUNK_SIZE = 64 * 1024
+WAIT_INTERVAL = 0.001
+
+
+# Resource limits and usage accounting are available only on the platforms, which support rlimits and wait4
+def can_limit_resources() -> bool:
+    return resource is not None and hasattr(os, 'wait4') and hasattr(os, 'killpg')
+
+
+# Is run in the child process, so the limit cannot be more than the hard limit of the parent
+def set_resource_limit(kind: int, soft_limit: int, hard_limit: int) -> None:
+    _, current_hard_limit = resource.getrlimit(kind)
+    if current_hard_limit != resource.RLIM_INFINITY:
+        soft_limit, hard_limit = min(soft_limit, current_hard_limit), min(hard_limit, current_hard_limit)
+    resource.setrlimit(kind, (soft_limit, hard_limit))
+
+
+# ru_maxrss is in kilobytes on Linux, but in bytes on macOS
+def get_max_rss_in_bytes(rusage: Any) -> int:
+    return rusage.ru_maxrss if sys.platform == 'darwin' else rusage.ru_maxrss * 1024
+
+
+# Writes the input and reads the output at the same time to not get stuck if the pipe buffers are full
+# Closes both file descriptors, returns None if time is out
+# If output_limit is set, reading is stopped after more than output_limit bytes are read, so the returned output
+# is longer than output_limit only if the limit is exceeded
+# If comparator is set, the output is fed to it instead of being kept, so the returned output is empty, and reading
+# is stopped once the output is mismatched
+def communicate(in_fd: int, out_fd: int, input: bytes, deadline: Optional[float],
+                output_limit: Optional[int] = None, comparator: Optional[OutputComparator] = None) -> Optional[bytes]:
+    chunks: List[bytes] = []
+    input_offset, output_size = 0, 0
+    open_fds = {in_fd, out_fd}
+    try:
+        with selectors.DefaultSelector() as selector:
+            if input:
+                os.set_blocking(in_fd, False)
+                selector.register(in_fd, selectors.EVENT_WRITE)
+            else:
+                open_fds.remove(in_fd)
+                os.close(in_fd)
+            selector.register(out_fd, selectors.EVENT_READ)
+            while out_fd in selector.get_map():
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    return None
+                for key, _ in selector.select(timeout):
+                    if key.fd == in_fd:
+                        try:
+                            input_offset += os.write(in_fd, input[input_offset:input_offset + READ_CHUNK_SIZE])
+                        except BrokenPipeError:
+                            input_offset = len(input)
+                        if input_offset >= len(input):
+                            selector.unregister(in_fd)
+                            open_fds.remove(in_fd)
+                            os.close(in_fd)
+                    else:
+                        data = os.read(out_fd, READ_CHUNK_SIZE)
+                        output_size += len(data)
+                        if comparator is None:
+                            chunks.append(data)
+                        elif not comparator.feed(data):
+                            selector.unregister(out_fd)
+                            continue
+                        if not data or output_limit is not None and output_size > output_limit:
+                            selector.unregister(out_fd)
+        return b''.join(chunks)
+    finally:
+        for fd in open_fds:
+            os.close(fd)
+
+
+class ExecutionResult:
+    """
+    The result of the process running: the output, the exit code (negative if the process is killed by a signal,
+    None if it's killed because of the timeout, the output limit or the mismatched output), and the used resources:
+    CPU time in seconds, peak resident memory in bytes and wall time in seconds.
+    If the output is compared while it's read (see OutputComparator), it's not kept, so the output is empty.
+    """
+
+    def __init__(self, output: bytes, exit_code: Optional[int], is_timeout: bool, is_output_limit_exceeded: bool,
+                 cpu_time: float, max_rss: int, wall_time: float, is_output_mismatched: bool = False):
+        self.output = output
+        self.exit_code = exit_code
+        self.is_timeout = is_timeout
+        self.is_output_limit_exceeded = is_output_limit_exceeded
+        self.cpu_time = cpu_time
+        self.max_rss = max_rss
+        self.wall_time = wall_time
+        self.is_output_mismatched = is_output_mismatched
+
+    @property
+    def is_successful(self) -> bool:
+        return self.exit_code == 0
+
+    def __str__(self) -> str:
+        return f'exit code: {self.exit_code}, timeout: {self.is_timeout}, ' \
+               f'output limit exceeded: {self.is_output_limit_exceeded}, ' \
+               f'output mismatched: {self.is_output_mismatched}, cpu time: {self.cpu_time:.3f}s, ' \
+               f'max rss: {self.max_rss}B, wall time: {self.wall_time:.3f}s'
+
+
+class ProcessExecutor:
+    """
+    Runs a process with the input as stdin and limits its resources: the wall time (timeout) and the CPU time
+    (cpu_limit) in seconds, the address space (memory_limit) and the output size (output_limit) in bytes.
+    If any of them is None, it's not limited. The process is started in a new session, so if it's killed,
+    all processes started by it are killed too. Stderr of the process is ignored.
+
+    Note: the limits are applied to the process itself, so the address space limit doesn't suit for the JVM, which
+    reserves much more memory than it uses, and the CPU time limit doesn't suit for multithreaded processes.
+
+    The process can be also run in the asyncio event loop (see execute_async), so one thread can wait for many
+    processes at once.
+
+    If the comparator is passed to execute, the output is compared with the expected one while it's read, and the
+    process is killed at the first mismatch (see OutputComparator).
+    """
+
+    def __init__(self, timeout: Optional[int] = TIMEOUT, cpu_limit: Optional[int] = TIMEOUT,
+                 memory_limit: Optional[int] = None, output_limit: Optional[int] = OUTPUT_LIMIT):
+        self._timeout = timeout
+        self._cpu_limit = cpu_limit
+        self._memory_limit = memory_limit
+        self._output_limit = output_limit
+
+    # Is run in the child process before the program is executed
+    def __set_limits(self) -> None:
+        if self._cpu_limit is not None:
+            # SIGXCPU is sent after the soft limit, the process is killed after the hard one
+            set_resource_limit(resource.RLIMIT_CPU, self._cpu_limit, self._cpu_limit + 1)
+        if self._memory_limit is not None:
+            set_resource_limit(resource.RLIMIT_AS, self._memory_limit, self._memory_limit)
+
+    # Returns the exit code and the resources usage of the process or None if time is out
+    @staticmethod
+    def __wait(pid: int, deadline: Optional[float]) -> Optional[Tuple[int, Any]]:
+        while True:
+            waited_pid, status, rusage = os.wait4(pid, 0 if deadline is None else os.WNOHANG)
+            if waited_pid != 0:
+                return (os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)), rusage
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(WAIT_INTERVAL)
+
+    # Kills the process with all processes started by it, returns the resources usage of the process
+    @staticmethod
+    def __kill(pid: int) -> Any:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        return os.wait4(pid, 0)[2]
+
+    def execute(self, args: List[str], input: bytes, comparator: Optional[OutputComparator] = None) -> ExecutionResult:
+        """
+        Run the process with the input as stdin until it's finished or any of the limits is exceeded,
+        in which case the process is killed. Raises an error if the process cannot be started.
+        """
+        in_read_fd, in_write_fd = os.pipe()
+        out_read_fd, out_write_fd = os.pipe()
+        try:
+            process = Popen(args, stdin=in_read_fd, stdout=out_write_fd, stderr=DEVNULL, start_new_session=True,
+                            preexec_fn=self.__set_limits)
+        except BaseException:
+            os.close(in_write_fd)
+            os.close(out_read_fd)
+            raise
+        finally:
+            os.close(in_read_fd)
+            os.close(out_write_fd)
+
+        start_time = time.monotonic()
+        deadline = None if self._timeout is None else start_time + self._timeout
+        # The process is waited by wait4 to get its resources usage, so Popen mustn't wait it again
+        process.returncode = -signal.SIGKILL
+        try:
+            output = communicate(in_write_fd, out_read_fd, input, deadline, self._output_limit, comparator)
+            is_output_limit_exceeded = output is not None and self._output_limit is not None \
+                and len(output) > self._output_limit
+            is_output_mismatched = output is not None and comparator is not None and comparator.is_mismatched
+            is_stopped = output is None or is_output_limit_exceeded or is_output_mismatched
+            result = None if is_stopped else self.__wait(process.pid, deadline)
+        except BaseException:
+            self.__kill(process.pid)
+            raise
+        wall_time = time.monotonic() - start_time
+
+        exit_code, rusage = result if result is not None else (None, self.__kill(process.pid))
+        is_timeout = result is None and not is_output_limit_exceeded and not is_output_mismatched
+        return ExecutionResult(output if output is not None else b'', exit_code, is_timeout, is_output_limit_exceeded,
+                               rusage.ru_utime + rusage.ru_stime, get_max_rss_in_bytes(rusage), wall_time,
+                               is_output_mismatched)
+
+    # Kills the process with all processes started by it. The event loop waits for the process only after its output
+    # is closed, so the rest of the output is read
+    @staticmethod
+    async def __kill_async(process: asyncio.subprocess.Process) -> None:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        while await process.stdout.read(READ_CHUNK_SIZE):
+            pass
+        await process.wait()
+
+    # The process may not read the whole input, the error of writing is ignored then
+    @staticmethod
+    async def __write_input_async(stdin: asyncio.StreamWriter, input: bytes) -> None:
+        try:
+            stdin.write(input)
+            await stdin.drain()
+            stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    # Returns the output and the exit code of the process, which is None if the output limit is exceeded or the
+    # output is mismatched. As in communicate, the output is longer than output_limit only if the limit is exceeded,
+    # and it's not kept if the comparator is set
+    async def __communicate_async(self, process: asyncio.subprocess.Process, input: bytes,
+                                  comparator: Optional[OutputComparator]) -> Tuple[bytes, Optional[int]]:
+        writing = asyncio.ensure_future(self.__write_input_async(process.stdin, input))
+        try:
+            chunks: List[bytes] = []
+            output_size = 0
+            while True:
+                data = await process.stdout.read(READ_CHUNK_SIZE)
+                if not data:
+                    break
+                output_size += len(data)
+                if comparator is None:
+                    chunks.append(data)
+                elif not comparator.feed(data):
+                    return b'', None
+                if self._output_limit is not None and output_size > self._output_limit:
+                    return b''.join(chunks), None
+            return b''.join(chunks), await process.wait()
+        finally:
+            writing.cancel()
+
+    async def execute_async(self, args: List[str], input: bytes,
+                            comparator: Optional[OutputComparator] = None) -> ExecutionResult:
+        """
+        Run the process in the same way as execute does, but in the asyncio event loop.
+        The process is waited by the event loop, so its resources usage is unknown, and the CPU time and the peak
+        resident memory in the result are 0. Raises an error if the process cannot be started.
+        """
+        start_time = time.monotonic()
+        process = await asyncio.create_subprocess_exec(*args, stdin=PIPE, stdout=PIPE, stderr=DEVNULL,
+                                                       start_new_session=True, preexec_fn=self.__set_limits)
+        output, exit_code, is_timeout = b'', None, False
+        try:
+            output, exit_code = await asyncio.wait_for(self.__communicate_async(process, input, comparator),
+                                                       self._timeout)
+        except asyncio.TimeoutError:
+            is_timeout = True
+        except BaseException:
+            await self.__kill_async(process)
+            raise
+        if exit_code is None:
+            await self.__kill_async(process)
+        wall_time = time.monotonic() - start_time
+        is_output_mismatched = not is_timeout and comparator is not None and comparator.is_mismatched
+        is_output_limit_exceeded = exit_code is None and not is_timeout and not is_output_mismatched
+        return ExecutionResult(output if not is_timeout else b'', exit_code, is_timeout, is_output_limit_exceeded,
+                               0.0, 0, wall_time, is_output_mismatched)
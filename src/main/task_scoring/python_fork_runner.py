@@ -0,0 +1,181 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import sys
+import time
+import signal
+import logging
+import builtins
+import locale
+import traceback
+from types import CodeType
+from typing import Optional, Any
+
+from src.main.task_scoring.task_checker import decode_output
+from src.main.task_scoring.process_executor import communicate
+from src.main.task_scoring.output_comparator import OutputComparator
+from src.main.util.consts import LOGGER_NAME, TIMEOUT, MEMORY_LIMIT, OUTPUT_LIMIT
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+log = logging.getLogger(LOGGER_NAME)
+
+WAIT_INTERVAL = 0.001
+
+
+# Running a fragment in a process forked from the current one is much cheaper than starting a new interpreter,
+# since the interpreter is already initialized and the forked process shares its memory until it's changed.
+# It's available only on the platforms, which support fork
+def can_fork() -> bool:
+    return hasattr(os, 'fork')
+
+
+# The source is compiled from bytes, so its encoding is detected in the same way as the interpreter does
+# Returns None if the code cannot be compiled, so it should be run in a new interpreter to get the same behaviour
+def compile_file_safely(source_file: str) -> Optional[CodeType]:
+    try:
+        with open(source_file, 'rb') as f:
+            return compile(f.read(), source_file, 'exec', dont_inherit=True)
+    except Exception as e:
+        log.exception(e)
+        return None
+
+
+# The same as an interpreter does with an argument of sys.exit: None means success, an integer is an exit code,
+# any other object is printed to stderr and means failure
+def __get_exit_code(code: Any) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code & 0xFF
+    print(code, file=sys.stderr)
+    return 1
+
+
+def __exec_code(code: CodeType, source_file: str) -> int:
+    try:
+        exec(code, {'__name__': '__main__', '__file__': source_file, '__builtins__': builtins})
+        return 0
+    except SystemExit as e:
+        return __get_exit_code(e.code)
+    except BaseException:
+        traceback.print_exc()
+        return 1
+
+
+# Limit the memory relatively to the memory, which is already used by the forked process
+def __set_memory_limit(memory_limit: Optional[int]) -> None:
+    if memory_limit is None or resource is None:
+        return
+    try:
+        with open('/proc/self/statm') as statm:
+            used_memory = int(statm.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        used_memory = 0
+    limit = used_memory + memory_limit
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def __redirect_fd(fd: int, target_fd: int) -> None:
+    if fd != target_fd:
+        os.dup2(fd, target_fd)
+        os.close(fd)
+
+
+# Is run in the forked process, never returns
+def __run_in_child(code: CodeType, source_file: str, in_fd: int, out_fd: int, memory_limit: Optional[int]) -> None:
+    exit_code = 1
+    try:
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        __redirect_fd(in_fd, 0)
+        __redirect_fd(out_fd, 1)
+        __redirect_fd(os.open(os.devnull, os.O_WRONLY), 2)
+        encoding = locale.getpreferredencoding(False)
+        sys.stdin = open(0, 'r', encoding=encoding, closefd=False)
+        sys.stdout = open(1, 'w', encoding=encoding, closefd=False)
+        sys.stderr = open(2, 'w', encoding=encoding, errors='backslashreplace', closefd=False)
+        sys.argv = [source_file]
+        sys.path[0] = os.path.dirname(os.path.abspath(source_file))
+        __set_memory_limit(memory_limit)
+        exit_code = __exec_code(code, source_file)
+        sys.stdout.flush()
+    except BaseException:
+        exit_code = exit_code if exit_code != 0 else 1
+    finally:
+        os._exit(exit_code)
+
+
+def __kill(pid: int) -> None:
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    os.waitpid(pid, 0)
+
+
+# Returns the exit code of the process or None if time is out
+def __wait(pid: int, deadline: Optional[float]) -> Optional[int]:
+    while True:
+        waited_pid, status = os.waitpid(pid, 0 if deadline is None else os.WNOHANG)
+        if waited_pid != 0:
+            return os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(WAIT_INTERVAL)
+
+
+def run_code_in_fork(code: CodeType, source_file: str, input: str, timeout: Optional[int] = TIMEOUT,
+                     memory_limit: Optional[int] = MEMORY_LIMIT,
+                     output_limit: Optional[int] = OUTPUT_LIMIT,
+                     comparator: Optional[OutputComparator] = None) -> Optional[str]:
+    """
+    Run the compiled code in a process forked from the current one with the given input as stdin.
+    The code is run as the main module of the source file, as if it was run by 'python source_file'.
+    Returns the output of the code or None if the code has finished with a non-zero exit code, raised an exception,
+    exceeded the memory limit or the output limit (in bytes) or the timeout (in seconds), in which case the process
+    is killed.
+
+    If the comparator is set, the output is compared with the expected one while it's read and isn't kept, so an empty
+    string is returned instead of it. The process is killed at the first mismatch (see OutputComparator), and None is
+    returned then.
+    """
+    in_read_fd, in_write_fd = os.pipe()
+    out_read_fd, out_write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(in_write_fd)
+        os.close(out_read_fd)
+        __run_in_child(code, source_file, in_read_fd, out_write_fd, memory_limit)
+    os.close(in_read_fd)
+    os.close(out_write_fd)
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        output = communicate(in_write_fd, out_read_fd, input.encode(locale.getpreferredencoding(False)), deadline,
+                             output_limit, comparator)
+        is_output_limit_exceeded = output is not None and output_limit is not None and len(output) > output_limit
+        is_output_mismatched = output is not None and comparator is not None and comparator.is_mismatched
+        is_stopped = output is None or is_output_limit_exceeded or is_output_mismatched
+        exit_code = None if is_stopped else __wait(pid, deadline)
+    except BaseException:
+        __kill(pid)
+        raise
+    if is_output_mismatched:
+        log.info(f'Output is mismatched for running {source_file} in the forked process {pid}')
+        __kill(pid)
+        return None
+    if is_output_limit_exceeded:
+        log.info(f'Output limit is exceeded for running {source_file} in the forked process {pid}')
+        __kill(pid)
+        return None
+    if exit_code is None:
+        log.info(f'Time is out for running {source_file} in the forked process {pid}')
+        __kill(pid)
+        return None
+    if exit_code != 0:
+        log.info(f'Running {source_file} in the forked process {pid} has finished with exit code {exit_code}')
+        return None
+    return decode_output(output)
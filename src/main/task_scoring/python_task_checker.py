@@ -1,18 +1,80 @@
 # Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
 
+import re
+import os
 import sys
+import ast
 import logging
-from typing import List
+from types import CodeType
+from subprocess import run, PIPE, TimeoutExpired
+from typing import List, Optional, Dict, Set
 
 from src.main.util import consts
-from src.main.util.consts import LANGUAGE
-from src.main.task_scoring.task_checker import ITaskChecker, check_call_safely, check_output_safely, SOURCE_OBJECT_NAME
+from src.main.util.consts import LANGUAGE, TIMEOUT, MEMORY_LIMIT, OUTPUT_LIMIT
+from src.main.task_scoring.sandbox import Sandbox
+from src.main.task_scoring.output_comparator import OutputComparator
+from src.main.task_scoring.python_fork_runner import can_fork, compile_file_safely, run_code_in_fork
+from src.main.task_scoring.task_checker import ITaskChecker, check_call_safely, check_output_safely, \
+    SOURCE_OBJECT_NAME, check_call_safely_async, check_output_safely_async
 
 log = logging.getLogger(consts.LOGGER_NAME)
 
+MYPY_ERROR_PATTERN = re.compile(r'^(.+?):\d+(?::\d+)?: error: ', re.MULTILINE)
+MYPY_BLOCKING_ERROR_CODE = 2
+
+
+# A fragment with a syntax error is incorrect anyway, so there is no need to run mypy on it
+def is_parsable(source_code: str) -> bool:
+    try:
+        ast.parse(source_code)
+        return True
+    except SyntaxError:
+        return False
+    except Exception as e:
+        log.exception(e)
+        # Let mypy decide
+        return True
+
+
+# Runs mypy on all files at once and returns names of files, which have errors, or None if it cannot be found out.
+# The names of files should be unique. They are used instead of paths, since mypy can report errors from its cache
+# with the path of another file with the same module name and content.
+# If some of the files have blocking errors, mypy stops checking, so it's run again without them
+def get_files_with_mypy_errors(files: List[str]) -> Optional[Set[str]]:
+    files_with_errors = set()
+    files_to_check = list(files)
+    while files_to_check:
+        try:
+            result = run(['mypy'] + files_to_check, stdout=PIPE, universal_newlines=True,
+                         timeout=TIMEOUT * len(files_to_check))
+        except (OSError, TimeoutExpired) as e:
+            log.exception(e)
+            return None
+        current_files_with_errors = set(map(os.path.basename, MYPY_ERROR_PATTERN.findall(result.stdout)))
+        if not current_files_with_errors.issubset(map(os.path.basename, files_to_check)):
+            log.info(f'Mypy has found errors in other files: {result.stdout}')
+            return None
+        files_with_errors.update(current_files_with_errors)
+        if result.returncode != MYPY_BLOCKING_ERROR_CODE:
+            break
+        if not current_files_with_errors:
+            log.info(f'Mypy has finished with the exit code {result.returncode}: {result.stdout}')
+            return None
+        files_to_check = [f for f in files_to_check if os.path.basename(f) not in current_files_with_errors]
+    return files_with_errors
+
 
 class PythonTaskChecker(ITaskChecker):
 
+    # If to_run_in_fork is True, tests are run in processes forked from the current one instead of
+    # new interpreters, if fork is supported. Fragments that cannot be compiled are run in new interpreters anyway
+    def __init__(self, sandbox: Optional[Sandbox] = None, to_run_in_fork: bool = False,
+                 to_limit_resources: bool = False):
+        super().__init__(sandbox, to_limit_resources)
+        self._to_run_in_fork = to_run_in_fork and can_fork()
+        self._source_file = None
+        self._code = None
+
     @property
     def language(self) -> LANGUAGE:
         return LANGUAGE.PYTHON
@@ -28,14 +90,76 @@ class PythonTaskChecker(ITaskChecker):
         return ['print']
 
     def create_source_file(self, source_code: str) -> str:
+        self._source_file, self._code = None, None
         return self.create_source_file_with_name(source_code, SOURCE_OBJECT_NAME)
 
+    def is_syntax_correct(self, source_code: str) -> bool:
+        return is_parsable(source_code)
+
+    # With shell=True only the first argument is the command, so the second check doesn't depend on the source file
+    @staticmethod
+    def __can_run_interpreter(source_file: str) -> bool:
+        return check_call_safely([sys.executable, source_file], shell=True)
+
     def is_source_file_correct(self, source_file: str) -> bool:
-        is_correct = check_call_safely(['mypy', source_file]) and check_call_safely([sys.executable, source_file],
-                                                                                    shell=True)
+        is_correct = check_call_safely(['mypy', source_file]) and self.__can_run_interpreter(source_file)
         log.info(f'Source code is correct: {is_correct}')
         return is_correct
 
+    async def is_source_file_correct_async(self, source_file: str) -> bool:
+        is_correct = await check_call_safely_async(['mypy', source_file]) \
+            and await check_call_safely_async([sys.executable, source_file], shell=True)
+        log.info(f'Source code is correct: {is_correct}')
+        return is_correct
+
+    # All parsable fragments are written as separate modules and checked by one mypy run
+    def check_fragments_correctness(self, fragments: List[str]) -> Dict[str, bool]:
+        self._sandbox.prepare()
+        fragment_to_correctness_dict = {}
+        fragment_to_file_dict = {}
+        for i, fragment in enumerate(fragments):
+            if is_parsable(fragment):
+                fragment_to_file_dict[fragment] = self.create_source_file_with_name(fragment,
+                                                                                    f'{SOURCE_OBJECT_NAME}_{i}')
+            else:
+                fragment_to_correctness_dict[fragment] = False
+        log.info(f'Check {len(fragment_to_file_dict)} fragments by one mypy run, '
+                 f'{len(fragment_to_correctness_dict)} fragments are not parsable')
+        if not fragment_to_file_dict:
+            return fragment_to_correctness_dict
+
+        files_with_errors = get_files_with_mypy_errors(list(fragment_to_file_dict.values()))
+        if files_with_errors is None:
+            log.info('Cannot check fragments by one mypy run, they will be checked one by one')
+            return fragment_to_correctness_dict
+        can_run_interpreter = None
+        for fragment, file in fragment_to_file_dict.items():
+            is_correct = os.path.basename(file) not in files_with_errors
+            if is_correct:
+                if can_run_interpreter is None:
+                    can_run_interpreter = self.__can_run_interpreter(file)
+                is_correct = can_run_interpreter
+            fragment_to_correctness_dict[fragment] = is_correct
+        return fragment_to_correctness_dict
+
+    # The code is compiled once for all tests of the source file
+    def __get_code(self, source_file: str) -> Optional[CodeType]:
+        if self._source_file != source_file:
+            self._source_file = source_file
+            self._code = compile_file_safely(source_file)
+        return self._code
+
     def run_test(self, input: str, expected_output: str, source_file: str) -> bool:
+        code = self.__get_code(source_file) if self._to_run_in_fork else None
+        if code is not None:
+            comparator = OutputComparator(expected_output)
+            memory_limit, output_limit = (MEMORY_LIMIT, OUTPUT_LIMIT) if self._to_limit_resources else (None, None)
+            return run_code_in_fork(code, source_file, input, memory_limit=memory_limit, output_limit=output_limit,
+                                    comparator=comparator) is not None and comparator.is_output_correct()
+        args = [sys.executable, source_file]
+        return check_output_safely(input, expected_output, args, executor=self.executor)
+
+    # Forked processes cannot be waited by the event loop, so tests are run in new interpreters
+    async def run_test_async(self, input: str, expected_output: str, source_file: str) -> bool:
         args = [sys.executable, source_file]
-        return check_output_safely(input, expected_output, args)
+        return await check_output_safely_async(input, expected_output, args, executor=self.executor)
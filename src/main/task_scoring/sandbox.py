@@ -0,0 +1,77 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import logging
+import tempfile
+from typing import Optional
+
+from src.main.util.consts import LOGGER_NAME, SANDBOX_CLEANUP_POLICY, TASKS_TESTS
+from src.main.util.file_util import clear_directory, remove_directory, create_directory, does_exist
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+class Sandbox:
+    """
+    A folder where a task checker writes source and compiled files of the fragments.
+    The folder is reused for all fragments, before each fragment it's prepared according to the cleanup policy.
+    Several sandboxes can be used at the same time, for example, one sandbox for each worker process.
+
+    Files of the fragments, which are prechecked at once (see ITaskChecker.precheck_fragments), and their
+    compiled files are written into the precheck subfolder of the sandbox, which is not cleared by prepare.
+    """
+
+    PRECHECK_FOLDER_NAME = '_precheck'
+
+    def __init__(self, folder: str, cleanup_policy: SANDBOX_CLEANUP_POLICY = SANDBOX_CLEANUP_POLICY.CLEAR,
+                 to_remove_on_close: bool = False):
+        self._folder = folder
+        self._cleanup_policy = cleanup_policy
+        self._to_remove_on_close = to_remove_on_close
+        create_directory(self._folder)
+
+    @classmethod
+    def create_temporary(cls, root: Optional[str] = None,
+                         cleanup_policy: SANDBOX_CLEANUP_POLICY = SANDBOX_CLEANUP_POLICY.CLEAR) -> 'Sandbox':
+        """
+        Create a sandbox in a new temporary folder inside of the root, which is removed on closing the sandbox.
+        If root is None, the default folder for temporary files is used. To avoid disk writes, root can be
+        a folder on tmpfs, for example, /dev/shm (note, it should not be mounted with noexec for compiled languages).
+        """
+        if root is not None:
+            create_directory(root)
+        folder = tempfile.mkdtemp(prefix=f'{TASKS_TESTS.SOURCE_OBJECT_NAME.value}_', dir=root)
+        log.info(f'Create a temporary sandbox {folder}')
+        return cls(folder, cleanup_policy, to_remove_on_close=True)
+
+    @property
+    def folder(self) -> str:
+        return self._folder
+
+    @property
+    def precheck_folder(self) -> str:
+        return os.path.join(self._folder, self.PRECHECK_FOLDER_NAME)
+
+    def prepare_precheck_folder(self) -> str:
+        remove_directory(self.precheck_folder)
+        create_directory(self.precheck_folder)
+        return self.precheck_folder
+
+    # The sandbox folder cannot be recreated if it keeps the precheck folder, so it's cleared in this case
+    def prepare(self) -> None:
+        if self._cleanup_policy == SANDBOX_CLEANUP_POLICY.RECREATE and not does_exist(self.precheck_folder):
+            remove_directory(self._folder)
+            create_directory(self._folder)
+        else:
+            clear_directory(self._folder, excluded_names=[self.PRECHECK_FOLDER_NAME])
+
+    def close(self) -> None:
+        if self._to_remove_on_close:
+            log.info(f'Remove the sandbox {self._folder}')
+            remove_directory(self._folder)
+
+    def __enter__(self) -> 'Sandbox':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -0,0 +1,237 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import time
+import random
+import shutil
+import string
+import logging
+import subprocess
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Iterator, Tuple
+
+import numpy as np
+
+from src.main.task_scoring.sandbox import Sandbox
+from src.main.task_scoring.task_checker import TaskCheckerOptions
+from src.main.util.consts import LOGGER_NAME, LANGUAGE, TASK, BENCHMARK_FRAGMENT_KIND
+from src.main.task_scoring.tasks_tests_handler import create_task_checker, create_in_and_out_dict
+
+log = logging.getLogger(LOGGER_NAME)
+
+# The tools, which have to be installed to check the fragments of the language
+LANGUAGE_TO_TOOLS = {
+    LANGUAGE.PYTHON: ['mypy'],
+    LANGUAGE.CPP: ['g++'],
+    LANGUAGE.JAVA: ['javac', 'java'],
+    LANGUAGE.KOTLIN: ['kotlinc', 'java']
+}
+
+# The numbers of the fragments of each kind, which are generated for each task.
+# Each run test of a timeout fragment takes TIMEOUT seconds, so there are few of them
+DEFAULT_KIND_TO_FRAGMENTS_NUMBER = {
+    BENCHMARK_FRAGMENT_KIND.CORRECT: 10,
+    BENCHMARK_FRAGMENT_KIND.INCORRECT: 5,
+    BENCHMARK_FRAGMENT_KIND.TOO_SHORT: 5,
+    BENCHMARK_FRAGMENT_KIND.TIMEOUT: 1
+}
+DEFAULT_SEED = 2020
+
+SUBPROCESSES_KEY = 'subprocesses'
+FORKED_PROCESSES_KEY = 'forked_processes'
+
+# The templates of the fragments of each kind, $var is replaced by a variable name and $n by a number.
+# The incorrect fragments have a syntax error or a type error, so the last ones are found only by the external tools
+LANGUAGE_TO_TEMPLATES = {
+    LANGUAGE.PYTHON: {
+        BENCHMARK_FRAGMENT_KIND.CORRECT: [
+            "$var = input()\nprint($var + '$n')\n",
+            '$var = int(input())\nprint($var * $n)\n'
+        ],
+        BENCHMARK_FRAGMENT_KIND.INCORRECT: [
+            "$var = input(\nprint($var + '$n')\n",
+            "$var: int = '$n'\nprint($var)\n"
+        ],
+        BENCHMARK_FRAGMENT_KIND.TOO_SHORT: [
+            'print($n)\n'
+        ],
+        BENCHMARK_FRAGMENT_KIND.TIMEOUT: [
+            '$var = input()\nwhile True:\n    $var = $var[:$n]\nprint($var)\n'
+        ]
+    },
+    LANGUAGE.CPP: {
+        BENCHMARK_FRAGMENT_KIND.CORRECT: [
+            '#include <iostream>\n#include <string>\n\nint main() {\n    std::string $var;\n    std::cin >> $var;\n'
+            '    std::cout << $var << $n << std::endl;\n    return 0;\n}\n'
+        ],
+        BENCHMARK_FRAGMENT_KIND.INCORRECT: [
+            '#include <iostream>\n#include <string>\n\nint main() {\n    std::string $var;\n    std::cin >> $var\n'
+            '    std::cout << $var << $n << std::endl;\n    return 0;\n}\n',
+            '#include <iostream>\n\nint main() {\n    int $var = "$n";\n    std::cout << $var << std::endl;\n'
+            '    return 0;\n}\n'
+        ],
+        BENCHMARK_FRAGMENT_KIND.TOO_SHORT: [
+            '#include <cstdio>\nint main() { printf("$n"); }\n'
+        ],
+        BENCHMARK_FRAGMENT_KIND.TIMEOUT: [
+            '#include <iostream>\n\nint main() {\n    volatile long long $var = 0;\n    while (true) {\n'
+            '        $var = $var + $n;\n    }\n    std::cout << $var << std::endl;\n    return 0;\n}\n'
+        ]
+    },
+    LANGUAGE.JAVA: {
+        BENCHMARK_FRAGMENT_KIND.CORRECT: [
+            'import java.util.Scanner;\n\npublic class Main {\n    public static void main(String[] args) {\n'
+            '        Scanner scanner = new Scanner(System.in);\n        String $var = scanner.next();\n'
+            '        System.out.println($var + "$n");\n    }\n}\n'
+        ],
+        BENCHMARK_FRAGMENT_KIND.INCORRECT: [
+            'import java.util.Scanner;\n\npublic class Main {\n    public static void main(String[] args) {\n'
+            '        Scanner scanner = new Scanner(System.in);\n        String $var = scanner.next()\n'
+            '        System.out.println($var + "$n");\n    }\n}\n',
+            'public class Main {\n    public static void main(String[] args) {\n        int $var = "$n";\n'
+            '        System.out.println($var);\n    }\n}\n'
+        ],
+        BENCHMARK_FRAGMENT_KIND.TOO_SHORT: [
+            'public class Main { public static void main(String[] args) { System.out.print($n); } }\n'
+        ],
+        BENCHMARK_FRAGMENT_KIND.TIMEOUT: [
+            'public class Main {\n    public static void main(String[] args) {\n        long $var = 0;\n'
+            '        while ($var >= 0) {\n            $var = ($var + $n) % 1000;\n        }\n'
+            '        System.out.println($var);\n    }\n}\n'
+        ]
+    },
+    LANGUAGE.KOTLIN: {
+        BENCHMARK_FRAGMENT_KIND.CORRECT: [
+            'fun main() {\n    val $var = readLine()!!\n    val number = $n\n    println($var + number)\n}\n'
+        ],
+        BENCHMARK_FRAGMENT_KIND.INCORRECT: [
+            'fun main() {\n    val $var = readLine()!!\n    val number = $n\n    println($var + number\n}\n',
+            'fun main() {\n    val $var: Int = "$n"\n    val number = readLine()!!\n    println($var)\n}\n'
+        ],
+        BENCHMARK_FRAGMENT_KIND.TOO_SHORT: [
+            'fun main() { println($n) }\n'
+        ],
+        BENCHMARK_FRAGMENT_KIND.TIMEOUT: [
+            'fun main() {\n    var $var = 0L\n    while ($var >= 0) {\n        $var = ($var + $n) % 1000\n    }\n'
+            '    println($var)\n}\n'
+        ]
+    }
+}
+
+
+def get_missing_tools(language: LANGUAGE) -> List[str]:
+    return [tool for tool in LANGUAGE_TO_TOOLS.get(language, []) if shutil.which(tool) is None]
+
+
+# The corpus is the same for the same seed, language and task
+def generate_corpus(language: LANGUAGE, task: TASK,
+                    kind_to_fragments_number: Optional[Dict[BENCHMARK_FRAGMENT_KIND, int]] = None,
+                    seed: int = DEFAULT_SEED) -> List[Tuple[BENCHMARK_FRAGMENT_KIND, str]]:
+    kind_to_fragments_number = kind_to_fragments_number if kind_to_fragments_number is not None \
+        else DEFAULT_KIND_TO_FRAGMENTS_NUMBER
+    rng = random.Random(f'{seed}/{language.value}/{task.value}')
+    corpus = []
+    for kind, templates in LANGUAGE_TO_TEMPLATES[language].items():
+        for i in range(kind_to_fragments_number.get(kind, 0)):
+            # The prefix is needed not to get a keyword
+            var = 'value_' + ''.join(rng.choice(string.ascii_lowercase) for _ in range(6))
+            template = string.Template(templates[i % len(templates)])
+            corpus.append((kind, template.substitute(var=var, n=rng.randint(1, 9999))))
+    return corpus
+
+
+# Counts the processes started by subprocess, including asyncio subprocesses, and by os.fork while it's entered.
+# The counter is a dict with SUBPROCESSES_KEY and FORKED_PROCESSES_KEY
+@contextmanager
+def count_started_processes() -> Iterator[Dict[str, int]]:
+    counter = {SUBPROCESSES_KEY: 0, FORKED_PROCESSES_KEY: 0}
+    popen_init, fork = subprocess.Popen.__init__, os.fork
+
+    def counting_popen_init(popen: subprocess.Popen, *args: Any, **kwargs: Any) -> None:
+        counter[SUBPROCESSES_KEY] += 1
+        popen_init(popen, *args, **kwargs)
+
+    def counting_fork() -> int:
+        counter[FORKED_PROCESSES_KEY] += 1
+        return fork()
+
+    subprocess.Popen.__init__, os.fork = counting_popen_init, counting_fork
+    try:
+        yield counter
+    finally:
+        subprocess.Popen.__init__, os.fork = popen_init, fork
+
+
+def __get_latency_percentiles(latencies: List[float]) -> Dict[str, Optional[float]]:
+    if not latencies:
+        return {'latency_p50': None, 'latency_p99': None}
+    return {'latency_p50': float(np.percentile(latencies, 50)), 'latency_p99': float(np.percentile(latencies, 99))}
+
+
+def __run_language_benchmark(language: LANGUAGE, tasks: List[TASK],
+                             kind_to_fragments_number: Optional[Dict[BENCHMARK_FRAGMENT_KIND, int]], seed: int,
+                             stop_after_first_false: bool, sandbox_root: Optional[str],
+                             checker_options: Optional[TaskCheckerOptions]) -> Dict[str, Any]:
+    in_and_out_files_dict = create_in_and_out_dict(TASK.tasks())
+    kind_to_latencies: Dict[BENCHMARK_FRAGMENT_KIND, List[float]] = {kind: [] for kind in BENCHMARK_FRAGMENT_KIND}
+    with Sandbox.create_temporary(sandbox_root) as sandbox, count_started_processes() as processes_counter:
+        task_checker = create_task_checker(language, sandbox, checker_options)
+        start_time = time.perf_counter()
+        for task in tasks:
+            for kind, fragment in generate_corpus(language, task, kind_to_fragments_number, seed):
+                fragment_start_time = time.perf_counter()
+                task_checker.check_tasks(TASK.tasks(), fragment, in_and_out_files_dict, stop_after_first_false,
+                                         current_task=task)
+                kind_to_latencies[kind].append(time.perf_counter() - fragment_start_time)
+        total_time = time.perf_counter() - start_time
+
+    latencies = [latency for kind_latencies in kind_to_latencies.values() for latency in kind_latencies]
+    report = {
+        'fragments': len(latencies),
+        'tests': task_checker.tests_runs,
+        'time': total_time,
+        'fragments_per_second': len(latencies) / total_time if total_time > 0 else None,
+        'tests_per_second': task_checker.tests_runs / total_time if total_time > 0 else None,
+        **__get_latency_percentiles(latencies),
+        **processes_counter,
+        'kinds': {kind.value: {'fragments': len(kind_latencies), **__get_latency_percentiles(kind_latencies)}
+                  for kind, kind_latencies in kind_to_latencies.items()},
+        'filtered_fragments': {stage.value: n for stage, n in task_checker.filter_stage_to_filtered_dict.items()}
+    }
+    log.info(f'Scoring benchmark of {language.value}: {report}')
+    return report
+
+
+def run_scoring_benchmark(languages: Optional[List[LANGUAGE]] = None, tasks: Optional[List[TASK]] = None,
+                          kind_to_fragments_number: Optional[Dict[BENCHMARK_FRAGMENT_KIND, int]] = None,
+                          seed: int = DEFAULT_SEED, stop_after_first_false: bool = True,
+                          sandbox_root: Optional[str] = None,
+                          checker_options: Optional[TaskCheckerOptions] = None) -> Dict[str, Any]:
+    """
+    Measure the throughput of the task checkers on the synthetic corpora of the fragments: correct, incorrect,
+    too short and timeout ones (see BENCHMARK_FRAGMENT_KIND). For each language and each task the corpus is generated
+    by the seed (see generate_corpus), and each fragment is checked by check_tasks of the language task checker with
+    the task as the current one, so the measurements of different runs can be compared.
+
+    Languages, which tools are not installed, are skipped (see LANGUAGE_TO_TOOLS). Nothing is downloaded, so
+    the benchmark can be run offline. By default, all languages and all tasks are used.
+
+    Returns the report, which can be dumped to json: for each language the numbers of fragments and run tests,
+    fragments and tests per second, p50 and p99 of the latency of one fragment in seconds, the numbers of
+    the started subprocesses and forked processes, the same latencies for each kind of fragments and the numbers of
+    the fragments filtered before running tests by each stage (see FILTER_STAGE).
+    """
+    languages = languages if languages is not None else list(LANGUAGE_TO_TOOLS.keys())
+    tasks = tasks if tasks is not None else TASK.tasks()
+    report = {'seed': seed, 'stop_after_first_false': stop_after_first_false, 'languages': {},
+              'skipped_languages': {}}
+    for language in languages:
+        missing_tools = get_missing_tools(language)
+        if missing_tools:
+            log.info(f'Skip the scoring benchmark of {language.value}, missing tools: {missing_tools}')
+            report['skipped_languages'][language.value] = f'missing tools: {", ".join(missing_tools)}'
+            continue
+        report['languages'][language.value] = __run_language_benchmark(language, tasks, kind_to_fragments_number,
+                                                                       seed, stop_after_first_false, sandbox_root,
+                                                                       checker_options)
+    return report
@@ -1,19 +1,29 @@
 # Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
 
+import io
 import os
+import signal
+import locale
+import asyncio
 import logging
 from abc import ABCMeta, abstractmethod
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Any
 from subprocess import check_output, CalledProcessError, check_call, TimeoutExpired
 
 from src.main.util.log_util import log_and_raise_error
+from src.main.task_scoring.sandbox import Sandbox
+from src.main.task_scoring.tests_suite import TestsSuite, TaskTest
+from src.main.task_scoring.tests_statistics import TestsStatistics
+from src.main.task_scoring.output_comparator import OutputComparator
 from src.main.util.language_util import get_extension_by_language
 from src.main.util.strings_util import contains_any_of_substrings
-from src.main.util.consts import TASK, TIMEOUT, TASKS_TESTS, LOGGER_NAME, LANGUAGE, TEST_RESULT
-from src.main.util.file_util import get_content_from_file, remove_directory, create_directory, create_file
+from src.main.task_scoring.process_executor import ProcessExecutor, ExecutionResult, can_limit_resources
+from src.main.util.consts import TASK, TIMEOUT, TASKS_TESTS, LOGGER_NAME, LANGUAGE, TEST_RESULT, MEMORY_LIMIT, \
+    FILTER_STAGE
+from src.main.util.file_util import create_file
 
-# For each TASK we have in_file (str) and out_file(str) for testing
-FilesDict = Dict[TASK, List[Tuple[str, str]]]
+# For each TASK we have its tests with the input and the expected output (see TestsSuite)
+FilesDict = TestsSuite
 
 TASKS_TESTS_PATH = TASKS_TESTS.TASKS_TESTS_PATH.value
 SOURCE_OBJECT_NAME = TASKS_TESTS.SOURCE_OBJECT_NAME.value
@@ -22,14 +32,39 @@ SOURCE_FOLDER = os.path.join(TASKS_TESTS_PATH, SOURCE_OBJECT_NAME)
 log = logging.getLogger(LOGGER_NAME)
 
 
+# The same decoding and newlines translation as subprocess does with universal_newlines=True
+def decode_output(output: bytes) -> str:
+    return io.TextIOWrapper(io.BytesIO(output), encoding=locale.getpreferredencoding(False)).read()
+
+
+def is_output_correct(actual_out: str, expected_output: str) -> bool:
+    actual_out = actual_out.rstrip('\n')
+    log.info(f'Expected out: {expected_output}, actual out: {actual_out}')
+    return actual_out == expected_output
+
+
+# The output of the process is compared by the comparator while it's read (see ProcessExecutor.execute)
+def is_execution_result_correct(result: ExecutionResult, comparator: OutputComparator, timeout_return: bool) -> bool:
+    if result.is_timeout:
+        return timeout_return
+    return result.is_successful and comparator.is_output_correct()
+
+
 # Returns False if time is out, because it means that the output cannot be gotten and thus
 # the expected output doesn't match the real one
-def check_output_safely(input: str, expected_output: str, popen_args: List[str], timeout_return: bool = False) -> bool:
+# If the executor is set, the process is run with its resources limits, exceeding any of them except the timeout
+# means that the output is incorrect. The output is compared while it's read, so the process is killed at the first
+# mismatch (see OutputComparator)
+def check_output_safely(input: str, expected_output: str, popen_args: List[str], timeout_return: bool = False,
+                        executor: Optional[ProcessExecutor] = None) -> bool:
+    if executor is not None:
+        comparator = OutputComparator(expected_output)
+        result = executor.execute(popen_args, input.encode(locale.getpreferredencoding(False)), comparator)
+        log.info(f'Execution result of {popen_args}: {result}')
+        return is_execution_result_correct(result, comparator, timeout_return)
     try:
         actual_out = check_output(popen_args, input=input, universal_newlines=True, timeout=TIMEOUT)
-        actual_out = actual_out.rstrip('\n')
-        log.info(f'Expected out: {expected_output}, actual out: {actual_out}')
-        return actual_out == expected_output
+        return is_output_correct(actual_out, expected_output)
     except CalledProcessError as e:
         log.exception(e)
         return False
@@ -53,12 +88,125 @@ def check_call_safely(call_args: List[str], timeout: Optional[int] = TIMEOUT, ti
         return timeout_return
 
 
-def remove_compiled_files() -> None:
-    remove_directory(SOURCE_FOLDER)
-    create_directory(SOURCE_FOLDER)
+# The same as check_output_safely, but the process is run in the event loop (see ProcessExecutor.execute_async).
+# If the executor is not set, only the time is limited
+async def check_output_safely_async(input: str, expected_output: str, popen_args: List[str],
+                                    timeout_return: bool = False, executor: Optional[ProcessExecutor] = None) -> bool:
+    executor = executor if executor is not None else ProcessExecutor(cpu_limit=None, output_limit=None)
+    comparator = OutputComparator(expected_output)
+    result = await executor.execute_async(popen_args, input.encode(locale.getpreferredencoding(False)), comparator)
+    log.info(f'Execution result of {popen_args}: {result}')
+    return is_execution_result_correct(result, comparator, timeout_return)
+
+
+# Kills the process with all processes started by it, for example, by the shell or by the compiler driver
+async def __kill_async(process: asyncio.subprocess.Process) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    await process.wait()
+
+
+# The same as check_call_safely, but the process is run in the event loop. As in check_call with shell=True,
+# only the first argument is the command, the other ones are the arguments of the shell.
+# The process is started in a new session, so the processes started by it are killed on timeout too
+async def check_call_safely_async(call_args: List[str], timeout: Optional[int] = TIMEOUT, timeout_return: bool = True,
+                                  shell: bool = False) -> bool:
+    args = ['/bin/sh', '-c'] + call_args if shell else call_args
+    process = await asyncio.create_subprocess_exec(*args, start_new_session=True)
+    try:
+        exit_code = await asyncio.wait_for(process.wait(), timeout)
+    except asyncio.TimeoutError:
+        log.info(f'Command {call_args} timed out after {timeout} seconds')
+        await __kill_async(process)
+        return timeout_return
+    except BaseException:
+        await __kill_async(process)
+        raise
+    if exit_code != 0:
+        log.info(f'Command {call_args} returned non-zero exit status {exit_code}')
+        return False
+    return True
+
+
+class TaskCheckerOptions(object):
+    """
+    Options of the task checkers to make checking faster:
+    to_use_jvm_harness -- to run Java and Kotlin tests in the long-lived JVM harness (see JvmHarness)
+    compilation_cache_folder -- the folder to keep compiled Kotlin and C++ fragments between runs (see CompilationCache)
+    to_use_pch -- to compile C++ fragments with precompiled standard headers
+    to_check_syntax_first -- to check only the syntax of C++ fragments, which don't need to be run
+    (see CppTaskChecker for the difference in the results)
+    to_run_python_in_fork -- to run Python tests in processes forked from the current one instead of new interpreters
+    (see python_fork_runner)
+
+    The other options:
+    to_limit_resources -- to limit the memory, the CPU time and the output of the tests (see ProcessExecutor),
+    otherwise only the time is limited
+    """
+
+    def __init__(self, to_use_jvm_harness: bool = False, compilation_cache_folder: Optional[str] = None,
+                 to_use_pch: bool = False, to_check_syntax_first: bool = False, to_run_python_in_fork: bool = False,
+                 to_limit_resources: bool = False):
+        self.to_use_jvm_harness = to_use_jvm_harness
+        self.compilation_cache_folder = compilation_cache_folder
+        self.to_use_pch = to_use_pch
+        self.to_check_syntax_first = to_check_syntax_first
+        self.to_run_python_in_fork = to_run_python_in_fork
+        self.to_limit_resources = to_limit_resources
+
+    # Returns the options, which change the tests results, if they differ from the default values, so the results
+    # found with other values are not shared with them (see get_tests_results_key)
+    def get_results_affecting_options(self) -> Dict[str, Any]:
+        options = {'to_check_syntax_first': self.to_check_syntax_first, 'to_limit_resources': self.to_limit_resources}
+        return {name: value for name, value in options.items() if value}
 
 
 class ITaskChecker(object, metaclass=ABCMeta):
+    # Source and compiled files are written into the sandbox folder, checkers running at the same time
+    # have to use different sandboxes. By default, the SOURCE_FOLDER is used.
+    # If to_limit_resources is False, only the time of the tests is limited
+    def __init__(self, sandbox: Optional[Sandbox] = None, to_limit_resources: bool = False):
+        self._sandbox = sandbox if sandbox is not None else Sandbox(SOURCE_FOLDER)
+        self._to_limit_resources = to_limit_resources
+        self._fragment_to_correctness_dict: Dict[str, bool] = {}
+        self._executor = self.create_executor()
+        self._tests_runs = 0
+        self._filter_stage_to_filtered_dict = {stage: 0 for stage in FILTER_STAGE}
+
+    @property
+    def sandbox(self) -> Sandbox:
+        return self._sandbox
+
+    @property
+    def source_folder(self) -> str:
+        return self._sandbox.folder
+
+    @property
+    def executor(self) -> Optional[ProcessExecutor]:
+        return self._executor
+
+    # The number of tests run by the checker on all fragments
+    @property
+    def tests_runs(self) -> int:
+        return self._tests_runs
+
+    # The numbers of fragments, on which tests are not run because of each stage of check_before_tests
+    @property
+    def filter_stage_to_filtered_dict(self) -> Dict[FILTER_STAGE, int]:
+        return dict(self._filter_stage_to_filtered_dict)
+
+    # Whether the resources of the tests have to be limited and they can be limited on the platform
+    @property
+    def to_limit_resources(self) -> bool:
+        return self._to_limit_resources and can_limit_resources()
+
+    # Tests are run with limited resources (see ProcessExecutor), if to_limit_resources is True
+    # Checkers, which run tests in the JVM, override it not to limit the memory and the CPU time
+    def create_executor(self) -> Optional[ProcessExecutor]:
+        return ProcessExecutor(memory_limit=MEMORY_LIMIT) if self.to_limit_resources else None
+
     @property
     @abstractmethod
     def language(self) -> LANGUAGE:
@@ -86,6 +234,44 @@ class ITaskChecker(object, metaclass=ABCMeta):
     def run_test(self, input: str, expected_output: str, source_file: str) -> bool:
         raise NotImplementedError
 
+    # Checkers, which can run the external tools in the event loop, override the async methods. Other checkers, for
+    # example, the ones, which use the JVM harness, run them synchronously, so the event loop is blocked meanwhile
+    async def is_source_file_correct_async(self, source_file: str) -> bool:
+        return self.is_source_file_correct(source_file)
+
+    async def run_test_async(self, input: str, expected_output: str, source_file: str) -> bool:
+        return self.run_test(input, expected_output, source_file)
+
+    # Checkers, which can check the correctness of many fragments at once much faster than one by one, override it
+    # Returns the correctness of the fragments, for which it's found; other fragments are checked one by one
+    def check_fragments_correctness(self, fragments: List[str]) -> Dict[str, bool]:
+        return {}
+
+    # Returns False if the fragment has errors, which are found in the same process without running the external
+    # tools, for example, syntax errors. Such fragments are incorrect for sure.
+    # Checkers, which can find them, override it
+    def is_syntax_correct(self, source_code: str) -> bool:
+        return True
+
+    # Should be called before checking the tasks for the fragments to check their correctness at once
+    # The fragments with syntax errors are not prechecked, since they are filtered before the correctness checking
+    def precheck_fragments(self, fragments: List[str]) -> None:
+        fragments = [f for f in fragments if self.is_syntax_correct(f)]
+        if fragments:
+            self._fragment_to_correctness_dict.update(self.check_fragments_correctness(fragments))
+
+    def __is_fragment_correct(self, source_file: str, source_code: str) -> bool:
+        is_correct = self._fragment_to_correctness_dict.get(source_code)
+        if is_correct is None:
+            return self.is_source_file_correct(source_file)
+        log.info(f'Source code is correct (prechecked): {is_correct}')
+        return is_correct
+
+    # Returns False if the fragment is too small or doesn't have any output, so tests cannot be passed anyway
+    def passes_cheap_filters(self, source_code: str) -> bool:
+        return len(source_code) >= self.min_symbols_number \
+            and contains_any_of_substrings(source_code, self.output_strings)
+
     @staticmethod
     def get_no_need_to_run_tests_values(rate: float, tasks_len: int) -> Tuple[bool, List[float]]:
         need_to_run_tests = False
@@ -93,58 +279,162 @@ class ITaskChecker(object, metaclass=ABCMeta):
         return need_to_run_tests, test_results
 
     def create_source_file_with_name(self, source_code: str, name: str) -> str:
-        source_code_file = os.path.join(TASKS_TESTS_PATH, SOURCE_OBJECT_NAME,
-                                        name + get_extension_by_language(self.language).value)
+        source_code_file = os.path.join(self.source_folder, name + get_extension_by_language(self.language).value)
         create_file(source_code, source_code_file)
         return source_code_file
 
+    # Each filter stage returns the rate of the fragment if tests don't have to be run on it, otherwise None
+
+    # not to run the external tools on fragments with syntax errors
+    def __filter_by_syntax(self, source_file: str, source_code: str) -> Optional[float]:
+        if self.is_syntax_correct(source_code):
+            return None
+        log.info('Code fragment has a syntax error')
+        return TEST_RESULT.INCORRECT_CODE.value
+
+    # not to check incorrect fragments
+    def __filter_by_correctness(self, source_file: str, source_code: str) -> Optional[float]:
+        return None if self.__is_fragment_correct(source_file, source_code) else TEST_RESULT.INCORRECT_CODE.value
+
+    # not to check too small fragments because they cannot return true anyway
+    def __filter_by_length(self, source_file: str, source_code: str) -> Optional[float]:
+        if len(source_code) >= self.min_symbols_number:
+            return None
+        log.info('Code fragment is too small')
+        return TEST_RESULT.CORRECT_CODE.value
+
+    # not to check fragments without output because they cannot return anything
+    def __filter_by_output(self, source_file: str, source_code: str) -> Optional[float]:
+        if contains_any_of_substrings(source_code, self.output_strings):
+            return None
+        log.info('Code fragment does not contain any output strings')
+        return TEST_RESULT.CORRECT_CODE.value
+
     # We don't want to run tests if source file is incorrect, too small, or doesn't have any output, so here
-    # we check if any of these conditions are met
+    # we check if any of these conditions are met by the chain of the filter stages (see FILTER_STAGE).
+    # The length and the output cannot be checked before the correctness, since incorrect fragments get another rate.
     # Returns do we have to run tests (bool), current tests results (List[float]), and rate (float)
     def check_before_tests(self, source_file: str, source_code: str, tasks: List[TASK]) -> (bool, List[float], float):
-        test_results = []
-        need_to_run_tests = True
-        rate = TEST_RESULT.CORRECT_CODE.value
-
-        # not to check incorrect fragments
-        if not self.is_source_file_correct(source_file):
-            rate = TEST_RESULT.INCORRECT_CODE.value
-            need_to_run_tests, test_results = self.get_no_need_to_run_tests_values(rate, len(tasks))
-
-        # not to check too small fragments because they cannot return true anyway
-        elif len(source_code) < self.min_symbols_number:
-            log.info('Code fragment is too small')
-            need_to_run_tests, test_results = self.get_no_need_to_run_tests_values(rate, len(tasks))
+        filter_stages = [(FILTER_STAGE.SYNTAX, self.__filter_by_syntax),
+                         (FILTER_STAGE.CORRECTNESS, self.__filter_by_correctness),
+                         (FILTER_STAGE.LENGTH, self.__filter_by_length),
+                         (FILTER_STAGE.OUTPUT, self.__filter_by_output)]
+        for stage, filter_fragment in filter_stages:
+            rate = filter_fragment(source_file, source_code)
+            if rate is not None:
+                self._filter_stage_to_filtered_dict[stage] += 1
+                need_to_run_tests, test_results = self.get_no_need_to_run_tests_values(rate, len(tasks))
+                return need_to_run_tests, test_results, rate
+        return True, [], TEST_RESULT.CORRECT_CODE.value
 
-        # not to check fragments without output because they cannot return anything
-        elif not contains_any_of_substrings(source_code, self.output_strings):
-            log.info('Code fragment does not contain any output strings')
-            need_to_run_tests, test_results = self.get_no_need_to_run_tests_values(rate, len(tasks))
-
-        return need_to_run_tests, test_results, rate
-
-    def check_task(self, task: TASK, in_and_out_files_dict: FilesDict, source_file: str,
-                   stop_after_first_false=True) -> float:
+    @staticmethod
+    def __get_tests(task: TASK, in_and_out_files_dict: FilesDict) -> List[TaskTest]:
         log.info(f'Start checking task {task.value}')
-        in_and_out_files = in_and_out_files_dict.get(task)
-        if not in_and_out_files:
+        tests = in_and_out_files_dict.get(task)
+        if not tests:
             log_and_raise_error(f'Task data for the {task.value} does not exist', log)
-
-        counted_tests, passed_tests = len(in_and_out_files), 0
-        for in_file, out_file in in_and_out_files:
-            is_passed = self.run_test(get_content_from_file(in_file), get_content_from_file(out_file), source_file)
-            log.info(f'Test {in_file} for task {task.value} is passed: {str(is_passed)}')
+        return tests
+
+    def __add_test_result(self, task: TASK, test: TaskTest, is_passed: bool,
+                          tests_statistics: Optional[TestsStatistics]) -> None:
+        self._tests_runs += 1
+        log.info(f'Test {test.in_file} for task {task.value} is passed: {str(is_passed)}')
+        if tests_statistics is not None:
+            tests_statistics.add(task, test, is_passed)
+
+    # Returns the number of passed tests
+    def __run_tests(self, task: TASK, tests: List[TaskTest], source_file: str, stop_after_first_false: bool,
+                    tests_statistics: Optional[TestsStatistics]) -> int:
+        passed_tests = 0
+        for test in tests:
+            is_passed = self.run_test(test.input, test.expected_output, source_file)
+            self.__add_test_result(task, test, is_passed, tests_statistics)
             if is_passed:
                 passed_tests += 1
             elif stop_after_first_false:
                 # keep existing rate, even if it's not 0, to save the information about partly passed tests
                 log.info('Stop after first false')
                 break
+        return passed_tests
+
+    async def __run_tests_async(self, task: TASK, tests: List[TaskTest], source_file: str,
+                                stop_after_first_false: bool, tests_statistics: Optional[TestsStatistics]) -> int:
+        passed_tests = 0
+        for test in tests:
+            is_passed = await self.run_test_async(test.input, test.expected_output, source_file)
+            self.__add_test_result(task, test, is_passed, tests_statistics)
+            if is_passed:
+                passed_tests += 1
+            elif stop_after_first_false:
+                log.info('Stop after first false')
+                break
+        return passed_tests
 
+    @staticmethod
+    def __get_rate(task: TASK, passed_tests: int, counted_tests: int) -> float:
         rate = passed_tests / counted_tests
         log.info(f'Finish checking task {task.value}, rate: {str(rate)}')
         return rate
 
+    # If tests_statistics is set, the result of each run test is added to it
+    def check_task(self, task: TASK, in_and_out_files_dict: FilesDict, source_file: str,
+                   stop_after_first_false=True, tests_statistics: Optional[TestsStatistics] = None) -> float:
+        tests = self.__get_tests(task, in_and_out_files_dict)
+        passed_tests = self.__run_tests(task, tests, source_file, stop_after_first_false, tests_statistics)
+        return self.__get_rate(task, passed_tests, len(tests))
+
+    # The same as check_task, but tests are run in the event loop (see run_test_async)
+    async def check_task_async(self, task: TASK, in_and_out_files_dict: FilesDict, source_file: str,
+                               stop_after_first_false=True,
+                               tests_statistics: Optional[TestsStatistics] = None) -> float:
+        tests = self.__get_tests(task, in_and_out_files_dict)
+        passed_tests = await self.__run_tests_async(task, tests, source_file, stop_after_first_false,
+                                                    tests_statistics)
+        return self.__get_rate(task, passed_tests, len(tests))
+
+    # The candidate tasks are the ones, whose probe tests are passed, but which are not fully tested by them.
+    # A fragment can solve at most one task (see get_solved_task), so if any task is solved by its probe test,
+    # there are no candidates. The candidates with fewer tests are tested first, since they are cheaper to test
+    @staticmethod
+    def __get_candidate_tasks(task_to_tests: Dict[TASK, List[TaskTest]],
+                              task_to_passed_tests: Dict[TASK, int]) -> List[TASK]:
+        if any(task_to_passed_tests[t] == len(tests) for t, tests in task_to_tests.items()):
+            return []
+        candidates = [t for t, tests in task_to_tests.items() if task_to_passed_tests[t] > 0]
+        return sorted(candidates, key=lambda t: len(task_to_tests[t]))
+
+    def __check_tasks_by_probe_tests(self, tasks: List[TASK], in_and_out_files_dict: FilesDict, source_file: str,
+                                     stop_after_first_false: bool,
+                                     tests_statistics: Optional[TestsStatistics]) -> List[float]:
+        log.info(f'Check all tasks by their probe tests first')
+        task_to_tests = {t: self.__get_tests(t, in_and_out_files_dict) for t in tasks}
+        task_to_passed_tests = {t: self.__run_tests(t, tests[:1], source_file, True, tests_statistics)
+                                for t, tests in task_to_tests.items()}
+        for task in self.__get_candidate_tasks(task_to_tests, task_to_passed_tests):
+            task_to_passed_tests[task] += self.__run_tests(task, task_to_tests[task][1:], source_file,
+                                                           stop_after_first_false, tests_statistics)
+            if task_to_passed_tests[task] == len(task_to_tests[task]):
+                log.info(f'Task {task.value} is solved, so other tasks are not fully tested')
+                break
+        return [self.__get_rate(t, task_to_passed_tests[t], len(task_to_tests[t])) for t in tasks]
+
+    async def __check_tasks_by_probe_tests_async(self, tasks: List[TASK], in_and_out_files_dict: FilesDict,
+                                                 source_file: str, stop_after_first_false: bool,
+                                                 tests_statistics: Optional[TestsStatistics]) -> List[float]:
+        log.info(f'Check all tasks by their probe tests first')
+        task_to_tests = {t: self.__get_tests(t, in_and_out_files_dict) for t in tasks}
+        task_to_passed_tests = {}
+        for task, tests in task_to_tests.items():
+            task_to_passed_tests[task] = await self.__run_tests_async(task, tests[:1], source_file, True,
+                                                                      tests_statistics)
+        for task in self.__get_candidate_tasks(task_to_tests, task_to_passed_tests):
+            task_to_passed_tests[task] += await self.__run_tests_async(task, task_to_tests[task][1:], source_file,
+                                                                       stop_after_first_false, tests_statistics)
+            if task_to_passed_tests[task] == len(task_to_tests[task]):
+                log.info(f'Task {task.value} is solved, so other tasks are not fully tested')
+                break
+        return [self.__get_rate(t, task_to_passed_tests[t], len(task_to_tests[t])) for t in tasks]
+
     @classmethod
     def __get_task_index(cls, tasks: List[TASK], current_task: Optional[TASK] = None) -> int:
         if current_task is None:
@@ -152,8 +442,21 @@ class ITaskChecker(object, metaclass=ABCMeta):
         return tasks.index(current_task)
 
     def check_tasks(self, tasks: List[TASK], source_code: str, in_and_out_files_dict: FilesDict,
-                    stop_after_first_false: bool = True, current_task: Optional[TASK] = None) -> List[float]:
-        remove_compiled_files()
+                    stop_after_first_false: bool = True, current_task: Optional[TASK] = None,
+                    tests_statistics: Optional[TestsStatistics] = None, to_probe_tasks: bool = False) -> List[float]:
+        """
+        Check the fragment on the tests of the tasks. If current_task is set, only its tests are run, and the other
+        tasks get 0 rates, otherwise the tests of all tasks are run.
+
+        If to_probe_tasks is True and current_task is None, the first test of each task is run as a probe, and only
+        the tasks, whose probe tests are passed, are fully tested, one by one till the first solved task. A fragment can
+        solve at most one task (see get_solved_task), so the solved task is found in the same way as by running all
+        tests, but the other rates can be less:
+        - the tasks, whose probe tests are failed, get 0 rates, even if stop_after_first_false is False;
+        - the tasks, which are not fully tested after a task is solved, get the rates of their probe tests.
+        If tests are ordered by their failure rates (see TestsStatistics), the probe tests are the most failing ones.
+        """
+        self._sandbox.prepare()
         log.info(f'Starting checking tasks {[t.value for t in tasks]}'
                  f' for source code on {self.language.value}:\n{source_code}')
         source_file = self.create_source_file(source_code)
@@ -168,11 +471,55 @@ class ITaskChecker(object, metaclass=ABCMeta):
             log.info(f'Check only current_task: {current_task.value}')
             test_results = [0.0] * len(tasks)
             test_results[task_index] = self.check_task(current_task, in_and_out_files_dict, source_file,
-                                                       stop_after_first_false)
+                                                       stop_after_first_false, tests_statistics)
+        elif to_probe_tasks:
+            test_results = self.__check_tasks_by_probe_tests(tasks, in_and_out_files_dict, source_file,
+                                                             stop_after_first_false, tests_statistics)
+        else:
+            log.info(f'Check all tasks')
+            for task in tasks:
+                test_results.append(self.check_task(task, in_and_out_files_dict, source_file, stop_after_first_false,
+                                                    tests_statistics))
+
+        log.info(f'Finish checking tasks, test results: {str(test_results)}')
+        return test_results
+
+    async def check_tasks_async(self, tasks: List[TASK], source_code: str, in_and_out_files_dict: FilesDict,
+                                stop_after_first_false: bool = True, current_task: Optional[TASK] = None,
+                                tests_statistics: Optional[TestsStatistics] = None,
+                                to_probe_tasks: bool = False) -> List[float]:
+        """
+        Check the tasks in the same way as check_tasks does, but the external tools are run in the event loop
+        (see run_test_async and is_source_file_correct_async), so several checkers with different sandboxes
+        can check their fragments at the same time in one thread.
+        """
+        self._sandbox.prepare()
+        log.info(f'Starting checking tasks {[t.value for t in tasks]}'
+                 f' for source code on {self.language.value}:\n{source_code}')
+        source_file = self.create_source_file(source_code)
+        # The correctness is found in the event loop, so the filter stage gets it as prechecked
+        if self.is_syntax_correct(source_code) and source_code not in self._fragment_to_correctness_dict:
+            self._fragment_to_correctness_dict[source_code] = await self.is_source_file_correct_async(source_file)
+        need_to_run_tests, test_results, rate = self.check_before_tests(source_file, source_code, tasks)
+
+        if not need_to_run_tests:
+            log.info(f'Finish checking tasks, test results: {str(test_results)}')
+            return test_results
+
+        task_index = self.__get_task_index(tasks, current_task)
+        if task_index != -1:
+            log.info(f'Check only current_task: {current_task.value}')
+            test_results = [0.0] * len(tasks)
+            test_results[task_index] = await self.check_task_async(current_task, in_and_out_files_dict, source_file,
+                                                                   stop_after_first_false, tests_statistics)
+        elif to_probe_tasks:
+            test_results = await self.__check_tasks_by_probe_tests_async(tasks, in_and_out_files_dict, source_file,
+                                                                         stop_after_first_false, tests_statistics)
         else:
             log.info(f'Check all tasks')
             for task in tasks:
-                test_results.append(self.check_task(task, in_and_out_files_dict, source_file, stop_after_first_false))
+                test_results.append(await self.check_task_async(task, in_and_out_files_dict, source_file,
+                                                                stop_after_first_false, tests_statistics))
 
         log.info(f'Finish checking tasks, test results: {str(test_results)}')
         return test_results
@@ -1,88 +1,271 @@
 # Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
 
 import os
+import time
+import socket
+import asyncio
 import logging
-from typing import List, Tuple, Optional
+import tempfile
+from functools import partial
+from contextlib import ExitStack
+from collections import deque
+from typing import List, Tuple, Optional, Dict, Deque
+from concurrent.futures import ProcessPoolExecutor, Future
 
 import pandas as pd
 
 from src.main.util import consts
 from src.main.util.consts import LANGUAGE, TASK
-from src.main.util.log_util import log_and_raise_error
 from src.main.task_scoring.cpp_task_checker import CppTaskChecker
 from src.main.task_scoring.java_task_checker import JavaTaskChecker
 from src.main.processing.task_tracker_handler import get_tt_language
 from src.main.task_scoring.kotlin_task_checker import KotlinTaskChecker
 from src.main.task_scoring.python_task_checker import PythonTaskChecker
-from src.main.task_scoring.task_checker import TASKS_TESTS_PATH, FilesDict
+from src.main.task_scoring.sandbox import Sandbox
+from src.main.task_scoring.task_checker import TASKS_TESTS_PATH, FilesDict, ITaskChecker, SOURCE_OBJECT_NAME, \
+    TaskCheckerOptions
+from src.main.task_scoring.tests_suite import TestsSuite
+from src.main.task_scoring.tests_statistics import TestsStatistics
+from src.main.task_scoring.work_queue import WorkQueue
+from src.main.task_scoring.tests_journal import TestsJournal
+from src.main.task_scoring.tests_progress import TestsProgress
+from src.main.task_scoring.tests_results_cache import TestsResultsCache
+from src.main.task_scoring.fragment_normalizer import FragmentNormalizer
 from src.main.task_scoring.undefined_task_checker import UndefinedTaskChecker
+from src.main.util.log_util import log_and_raise_error
 from src.main.util.file_util import get_all_file_system_items, tt_file_condition, get_output_directory, \
-    write_based_on_language, get_file_and_parent_folder_names, pair_in_and_out_files, match_condition, \
-    get_name_from_path, get_parent_folder, get_parent_folder_name
+    write_based_on_language, get_file_and_parent_folder_names, get_name_from_path, get_parent_folder, \
+    get_parent_folder_name, remove_directory, create_directory
 
 log = logging.getLogger(consts.LOGGER_NAME)
 
 FRAGMENT = consts.TASK_TRACKER_COLUMN.FRAGMENT.value
 TESTS_RESULTS = consts.TASK_TRACKER_COLUMN.TESTS_RESULTS.value
 
+# The max number of fragments, which are checked by one worker job in the parallel tests running
+FRAGMENTS_CHUNK_SIZE = 50
+# The max number of fragments, which are leased at once by a worker in the distributed tests running. It's small
+# to check the leased fragments long before the lease is expired (see LEASE_TIME)
+LEASED_FRAGMENTS_NUMBER = 10
+# How long to wait in seconds before the next polling of the work queue
+WORK_QUEUE_POLLING_INTERVAL = 1
+# The number of task checkers, which check fragments at the same time in the event loop
+ASYNC_CHECKERS_NUMBER = 16
+
 
+# Tests of the tasks are read once and shared by all checkers (see TestsSuite)
 def create_in_and_out_dict(tasks: List[TASK]) -> FilesDict:
-    in_and_out_files_dict = {}
-    for task in tasks:
-        root = os.path.join(TASKS_TESTS_PATH, task.value)
-        in_files = get_all_file_system_items(root, match_condition(r'in_\d+.txt'))
-        out_files = get_all_file_system_items(root, match_condition(r'out_\d+.txt'))
-        if len(out_files) != len(in_files):
-            log_and_raise_error('Length of out files list does not equal in files list', log)
-        in_and_out_files_dict[task] = pair_in_and_out_files(in_files, out_files)
-    return in_and_out_files_dict
+    return TestsSuite.load(tasks, TASKS_TESTS_PATH)
 
 
-def check_tasks(tasks: List[TASK], source_code: str, in_and_out_files_dict: FilesDict,
-                language: LANGUAGE = LANGUAGE.PYTHON, stop_after_first_false: bool = True,
-                current_task: Optional[TASK] = None) -> List[float]:
+# If checker_options is None, the default options are used (see TaskCheckerOptions)
+def create_task_checker(language: LANGUAGE, sandbox: Optional[Sandbox] = None,
+                        checker_options: Optional[TaskCheckerOptions] = None) -> ITaskChecker:
+    options = checker_options if checker_options is not None else TaskCheckerOptions()
     if language == LANGUAGE.PYTHON:
-        task_checker = PythonTaskChecker()
+        return PythonTaskChecker(sandbox, options.to_run_python_in_fork, options.to_limit_resources)
     elif language == LANGUAGE.JAVA:
-        task_checker = JavaTaskChecker()
+        return JavaTaskChecker(sandbox, options.to_use_jvm_harness, options.to_limit_resources)
     elif language == LANGUAGE.CPP:
-        task_checker = CppTaskChecker()
+        return CppTaskChecker(sandbox, options.to_use_pch, options.to_check_syntax_first,
+                              options.compilation_cache_folder, options.to_limit_resources)
     elif language == LANGUAGE.KOTLIN:
-        task_checker = KotlinTaskChecker()
-    else:
-        task_checker = UndefinedTaskChecker()
+        return KotlinTaskChecker(sandbox, options.to_use_jvm_harness, options.compilation_cache_folder,
+                                 options.to_limit_resources)
+    return UndefinedTaskChecker(sandbox)
 
-    return task_checker.check_tasks(tasks, source_code, in_and_out_files_dict, stop_after_first_false,
-                                    current_task=current_task)
 
+def check_tasks(tasks: List[TASK], source_code: str, in_and_out_files_dict: FilesDict,
+                language: LANGUAGE = LANGUAGE.PYTHON, stop_after_first_false: bool = True,
+                current_task: Optional[TASK] = None, sandbox: Optional[Sandbox] = None,
+                cache: Optional[TestsResultsCache] = None,
+                checker_options: Optional[TaskCheckerOptions] = None, to_probe_tasks: bool = False) -> List[float]:
+    if cache is not None:
+        test_results = cache.get(language, source_code, tasks, current_task, stop_after_first_false, to_probe_tasks,
+                                 checker_options)
+        if test_results is not None:
+            log.info(f'Found tests results in the cache: {str(test_results)}')
+            return test_results
 
-def __check_tasks_on_correct_fragments(data: pd.DataFrame, tasks: List[TASK], in_and_out_files_dict: FilesDict,
-                                       file_log_info: str = '',
-                                       current_task: Optional[TASK] = None) -> Tuple[LANGUAGE, pd.DataFrame]:
+    task_checker = create_task_checker(language, sandbox, checker_options)
+    test_results = task_checker.check_tasks(tasks, source_code, in_and_out_files_dict, stop_after_first_false,
+                                            current_task=current_task, to_probe_tasks=to_probe_tasks)
+    if cache is not None:
+        cache.put(language, source_code, tasks, test_results, current_task, stop_after_first_false, to_probe_tasks,
+                  checker_options)
+    return test_results
+
+
+# Returns groups of the fragments, which share tests results, by their keys in the cache. If normalizer is None,
+# each fragment is a group and a key itself, otherwise the task checker of the fragments language has to be set
+def group_fragments(fragments: List[str], task_checker: Optional[ITaskChecker] = None,
+                    normalizer: Optional[FragmentNormalizer] = None) -> Dict[str, List[str]]:
+    if normalizer is None or task_checker is None:
+        return {f: [f] for f in fragments}
+    return normalizer.group(fragments, task_checker)
+
+
+# The results are looked up in the cache and then in the journal of the interrupted running
+def __get_known_test_results(language: LANGUAGE, key: str, tasks: List[TASK], current_task: Optional[TASK],
+                             stop_after_first_false: bool, cache: Optional[TestsResultsCache],
+                             journal: Optional[TestsJournal], to_probe_tasks: bool = False,
+                             checker_options: Optional[TaskCheckerOptions] = None) -> Optional[List[float]]:
+    test_results = cache.get(language, key, tasks, current_task, stop_after_first_false, to_probe_tasks,
+                             checker_options) if cache is not None else None
+    if test_results is None and journal is not None:
+        test_results = journal.get(language, key, tasks, current_task, stop_after_first_false, to_probe_tasks,
+                                   checker_options)
+    return test_results
+
+
+# One task checker is used for all fragments, so it can precheck them at once, for example, check the correctness of
+# all Python fragments by one mypy run. Cached fragments are not checked
+# If tests_statistics is set, the results of all run tests are added to it
+# If normalizer is set, only one of the fragments, which differ in whitespace and comments, is checked
+# (see FragmentNormalizer)
+# If journal is set, the results found in it are not checked again, and the results of each checked fragment are
+# recorded to it at once (see TestsJournal)
+# If to_probe_tasks is True and current_task is None, only the plausible tasks are fully tested
+# (see ITaskChecker.check_tasks)
+def check_fragments(tasks: List[TASK], fragments: List[str], in_and_out_files_dict: FilesDict,
+                    language: LANGUAGE = LANGUAGE.PYTHON, stop_after_first_false: bool = True,
+                    current_task: Optional[TASK] = None, sandbox: Optional[Sandbox] = None,
+                    cache: Optional[TestsResultsCache] = None, checker_options: Optional[TaskCheckerOptions] = None,
+                    tests_statistics: Optional[TestsStatistics] = None,
+                    normalizer: Optional[FragmentNormalizer] = None,
+                    journal: Optional[TestsJournal] = None, to_probe_tasks: bool = False) -> Dict[str, List[float]]:
+    task_checker = create_task_checker(language, sandbox, checker_options)
+    fragment_to_test_results_dict = {}
+    not_cached_key_to_fragments_dict = {}
+    for key, same_fragments in group_fragments(fragments, task_checker, normalizer).items():
+        test_results = __get_known_test_results(language, key, tasks, current_task, stop_after_first_false, cache,
+                                                journal, to_probe_tasks, checker_options)
+        if test_results is None:
+            not_cached_key_to_fragments_dict[key] = same_fragments
+        else:
+            fragment_to_test_results_dict.update({f: test_results for f in same_fragments})
+    log.info(f'Found tests results in the cache or in the journal for {len(fragment_to_test_results_dict)} fragments')
+
+    task_checker.precheck_fragments([same_fragments[0] for same_fragments in not_cached_key_to_fragments_dict.values()])
+    for key, same_fragments in not_cached_key_to_fragments_dict.items():
+        tests_runs = task_checker.tests_runs
+        test_results = task_checker.check_tasks(tasks, same_fragments[0], in_and_out_files_dict,
+                                                stop_after_first_false, current_task=current_task,
+                                                tests_statistics=tests_statistics, to_probe_tasks=to_probe_tasks)
+        if cache is not None:
+            cache.put(language, key, tasks, test_results, current_task, stop_after_first_false, to_probe_tasks,
+                      checker_options)
+        if journal is not None:
+            journal.put(language, key, tasks, test_results, current_task, stop_after_first_false, to_probe_tasks,
+                        checker_options)
+        if normalizer is not None:
+            normalizer.add_avoided(len(same_fragments) - 1, task_checker.tests_runs - tests_runs)
+        fragment_to_test_results_dict.update({f: test_results for f in same_fragments})
+    filtered_fragments = {s.value: n for s, n in task_checker.filter_stage_to_filtered_dict.items()}
+    log.info(f'Numbers of fragments filtered before running tests by the stages: {filtered_fragments}')
+    return fragment_to_test_results_dict
+
+
+async def __check_fragments_by_checker_async(task_checker: ITaskChecker, tasks: List[TASK], fragments: List[str],
+                                             in_and_out_files_dict: FilesDict, stop_after_first_false: bool,
+                                             current_task: Optional[TASK],
+                                             tests_statistics: Optional[TestsStatistics],
+                                             to_probe_tasks: bool) -> Dict[str, List[float]]:
+    task_checker.precheck_fragments(fragments)
+    fragment_to_test_results_dict = {}
+    for fragment in fragments:
+        fragment_to_test_results_dict[fragment] = await task_checker.check_tasks_async(
+            tasks, fragment, in_and_out_files_dict, stop_after_first_false, current_task=current_task,
+            tests_statistics=tests_statistics, to_probe_tasks=to_probe_tasks)
+    return fragment_to_test_results_dict
+
+
+async def check_fragments_async(tasks: List[TASK], fragments: List[str], in_and_out_files_dict: FilesDict,
+                                language: LANGUAGE = LANGUAGE.PYTHON, stop_after_first_false: bool = True,
+                                current_task: Optional[TASK] = None, checkers_number: int = ASYNC_CHECKERS_NUMBER,
+                                sandbox_root: Optional[str] = None,
+                                checker_options: Optional[TaskCheckerOptions] = None,
+                                tests_statistics: Optional[TestsStatistics] = None,
+                                to_probe_tasks: bool = False) -> Dict[str, List[float]]:
+    """
+    Check the fragments in the event loop of the current thread, so up to checkers_number external processes
+    (compilers and tests) are run at the same time without a thread or a process waiting for each of them
+    (see ITaskChecker.check_tasks_async). The results are the same as check_fragments returns.
+
+    The fragments are shared between checkers_number task checkers, each of them has its own temporary sandbox inside
+    of the sandbox_root, prechecks its fragments at once and then checks them one by one.
+    """
+    checkers_number = min(checkers_number, len(fragments))
+    with ExitStack() as stack:
+        task_checkers = [create_task_checker(language, stack.enter_context(Sandbox.create_temporary(sandbox_root)),
+                                             checker_options) for _ in range(checkers_number)]
+        futures = [asyncio.ensure_future(__check_fragments_by_checker_async(task_checker, tasks,
+                                                                             fragments[i::checkers_number],
+                                                                             in_and_out_files_dict,
+                                                                             stop_after_first_false, current_task,
+                                                                             tests_statistics, to_probe_tasks))
+                   for i, task_checker in enumerate(task_checkers)]
+        try:
+            checker_results = await asyncio.gather(*futures)
+        except BaseException:
+            # The sandboxes are removed after all checkers are stopped
+            for future in futures:
+                future.cancel()
+            await asyncio.gather(*futures, return_exceptions=True)
+            raise
+    fragment_to_test_results_dict = {}
+    for results in checker_results:
+        fragment_to_test_results_dict.update(results)
+    return fragment_to_test_results_dict
+
+
+# Returns the language of the data and its unique fragments (an empty list if the language is undefined)
+def __get_unique_fragments(data: pd.DataFrame, file_log_info: str = '') -> Tuple[LANGUAGE, List[str]]:
     data[FRAGMENT] = data[FRAGMENT].fillna('')
     # If run after processing, this value can be taken from 'language' column
     language = get_tt_language(data)
     log.info(f'{file_log_info}, language is {language.value}, found {str(data.shape[0])} fragments')
+    if language == consts.LANGUAGE.UNDEFINED:
+        return language, []
+    unique_fragments = list(data[FRAGMENT].unique())
+    log.info(f'Found {str(len(unique_fragments))} unique fragments')
+    return language, unique_fragments
 
+
+def __fill_tests_results(data: pd.DataFrame, tasks: List[TASK], language: LANGUAGE,
+                         fragment_to_test_results_dict: Dict[str, List[float]]) -> pd.DataFrame:
     if language == consts.LANGUAGE.UNDEFINED:
         data[TESTS_RESULTS] = str([consts.TEST_RESULT.LANGUAGE_UNDEFINED.value] * len(tasks))
     else:
-        unique_fragments = list(data[FRAGMENT].unique())
-        log.info(f'Found {str(len(unique_fragments))} unique fragments')
-
-        fragment_to_test_results_dict = dict(
-            map(lambda f:
-                (f, check_tasks(tasks, f, in_and_out_files_dict, language, current_task=current_task)),
-                unique_fragments))
         data[TESTS_RESULTS] = data.apply(lambda row: fragment_to_test_results_dict[row[FRAGMENT]], axis=1)
+    return data
+
 
-    return language, data
+def __check_tasks_on_correct_fragments(data: pd.DataFrame, tasks: List[TASK], in_and_out_files_dict: FilesDict,
+                                       file_log_info: str = '', current_task: Optional[TASK] = None,
+                                       sandbox: Optional[Sandbox] = None, cache: Optional[TestsResultsCache] = None,
+                                       options: Optional[TaskCheckerOptions] = None,
+                                       tests_statistics: Optional[TestsStatistics] = None,
+                                       normalizer: Optional[FragmentNormalizer] = None,
+                                       journal: Optional[TestsJournal] = None,
+                                       progress: Optional[TestsProgress] = None,
+                                       to_probe_tasks: bool = False) -> Tuple[LANGUAGE, pd.DataFrame]:
+    language, unique_fragments = __get_unique_fragments(data, file_log_info)
+    fragment_to_test_results_dict = check_fragments(tasks, unique_fragments, in_and_out_files_dict, language,
+                                                    current_task=current_task, sandbox=sandbox, cache=cache,
+                                                    checker_options=options, tests_statistics=tests_statistics,
+                                                    normalizer=normalizer, journal=journal,
+                                                    to_probe_tasks=to_probe_tasks)
+    if progress is not None:
+        progress.finish_file(len(unique_fragments))
+    return language, __fill_tests_results(data, tasks, language, fragment_to_test_results_dict)
 
 
+# The output tree is scanned once, and the names of the tested files are looked up in a set
 def filter_already_tested_files(files: List[str], output_directory_path: str) -> List[str]:
     tested_files = get_all_file_system_items(output_directory_path, tt_file_condition)
-    tested_folder_and_file_names = list(map(lambda f: get_file_and_parent_folder_names(f), tested_files))
-    return list(filter(lambda f: get_file_and_parent_folder_names(f) not in tested_folder_and_file_names, files))
+    tested_folder_and_file_names = set(map(get_file_and_parent_folder_names, tested_files))
+    return [f for f in files if get_file_and_parent_folder_names(f) not in tested_folder_and_file_names]
 
 
 def __get_task_by_ct_file(file: str) -> Optional[TASK]:
@@ -99,7 +282,213 @@ def __get_user_folder_name_from_path(file: str) -> str:
     return get_parent_folder_name(task_folder)
 
 
-def run_tests(path: str) -> str:
+# The worker state is set once by the pool initializer, so tasks and test files are not sent with every job
+__worker_tasks: List[TASK] = []
+__worker_in_and_out_files_dict: Optional[FilesDict] = None
+__worker_sandbox: Optional[Sandbox] = None
+__worker_checker_options: Optional[TaskCheckerOptions] = None
+
+
+# Each worker gets its own sandbox inside of the sandboxes_root, the root is removed after all workers are finished
+def __init_worker(tasks: List[TASK], in_and_out_files_dict: FilesDict, sandboxes_root: str,
+                  checker_options: Optional[TaskCheckerOptions]) -> None:
+    global __worker_tasks, __worker_in_and_out_files_dict, __worker_sandbox, __worker_checker_options
+    __worker_tasks = tasks
+    __worker_in_and_out_files_dict = in_and_out_files_dict
+    __worker_sandbox = Sandbox.create_temporary(sandboxes_root)
+    __worker_checker_options = checker_options
+
+
+# Returns the tests results of the fragments, the statistics of the run tests and the normalizer with the numbers
+# of avoided checks, if the fragments are normalized
+def __check_fragments_in_worker(fragments: List[str], language: LANGUAGE, current_task: Optional[TASK],
+                                to_normalize_fragments: bool, to_probe_tasks: bool
+                                ) -> Tuple[Dict[str, List[float]], TestsStatistics, Optional[FragmentNormalizer]]:
+    tests_statistics = TestsStatistics()
+    normalizer = FragmentNormalizer() if to_normalize_fragments else None
+    fragment_to_test_results_dict = check_fragments(__worker_tasks, fragments, __worker_in_and_out_files_dict,
+                                                    language, current_task=current_task, sandbox=__worker_sandbox,
+                                                    checker_options=__worker_checker_options,
+                                                    tests_statistics=tests_statistics, normalizer=normalizer,
+                                                    to_probe_tasks=to_probe_tasks)
+    return fragment_to_test_results_dict, tests_statistics, normalizer
+
+
+# Is called in the executor thread as soon as the chunk is checked, so its results are journaled before the results
+# of the whole file are written
+def __journal_chunk_results(journal: TestsJournal, language: LANGUAGE, tasks: List[TASK], current_task: Optional[TASK],
+                            to_probe_tasks: bool, checker_options: Optional[TaskCheckerOptions],
+                            key_to_fragments_dict: Dict[str, List[str]], future: Future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    fragment_to_test_results_dict = future.result()[0]
+    key_to_test_results_dict = {k: fragment_to_test_results_dict[same_fragments[0]]
+                                for k, same_fragments in key_to_fragments_dict.items()}
+    journal.put_all(language, key_to_test_results_dict, tasks, current_task, to_probe_tasks=to_probe_tasks,
+                    checker_options=checker_options)
+
+
+# Fragments are submitted to the executor in chunks, so a worker can precheck all fragments of the chunk at once.
+# Each future returns a dict with tests results for all fragments of its chunk, the statistics of the run tests
+# and the normalizer, which are None for the cached and the journaled fragments
+# Returns groups of the fragments (see group_fragments) with their futures. All fragments of a group are submitted in
+# one chunk, so the worker checks only one of them
+def __get_tests_results_futures(executor: ProcessPoolExecutor, fragments: List[str], language: LANGUAGE,
+                                tasks: List[TASK], current_task: Optional[TASK], cache: Optional[TestsResultsCache],
+                                task_checker: Optional[ITaskChecker], normalizer: Optional[FragmentNormalizer],
+                                journal: Optional[TestsJournal], checker_options: Optional[TaskCheckerOptions],
+                                to_probe_tasks: bool) -> Dict[str, Tuple[List[str], Future]]:
+    key_to_fragments_and_future_dict = {}
+    not_cached_key_to_fragments_dict = {}
+    for key, same_fragments in group_fragments(fragments, task_checker, normalizer).items():
+        test_results = __get_known_test_results(language, key, tasks, current_task, True, cache, journal,
+                                                to_probe_tasks, checker_options)
+        if test_results is None:
+            not_cached_key_to_fragments_dict[key] = same_fragments
+        else:
+            future = Future()
+            future.set_result(({same_fragments[0]: test_results}, None, None))
+            key_to_fragments_and_future_dict[key] = (same_fragments, future)
+
+    chunks_keys: List[List[str]] = []
+    chunk_size = FRAGMENTS_CHUNK_SIZE
+    for key, same_fragments in not_cached_key_to_fragments_dict.items():
+        if chunk_size >= FRAGMENTS_CHUNK_SIZE:
+            chunks_keys.append([])
+            chunk_size = 0
+        chunks_keys[-1].append(key)
+        chunk_size += len(same_fragments)
+    for chunk_keys in chunks_keys:
+        chunk = [f for k in chunk_keys for f in not_cached_key_to_fragments_dict[k]]
+        future = executor.submit(__check_fragments_in_worker, chunk, language, current_task, normalizer is not None,
+                                 to_probe_tasks)
+        chunk_key_to_fragments_dict = {k: not_cached_key_to_fragments_dict[k] for k in chunk_keys}
+        if journal is not None:
+            future.add_done_callback(partial(__journal_chunk_results, journal, language, tasks, current_task,
+                                             to_probe_tasks, checker_options, chunk_key_to_fragments_dict))
+        key_to_fragments_and_future_dict.update({k: (fs, future) for k, fs in chunk_key_to_fragments_dict.items()})
+    return key_to_fragments_and_future_dict
+
+
+def __write_tests_results(output_directory: str, tasks: List[TASK], cache: Optional[TestsResultsCache],
+                          checker_options: Optional[TaskCheckerOptions], to_probe_tasks: bool,
+                          tests_statistics: Optional[TestsStatistics], normalizer: Optional[FragmentNormalizer],
+                          progress: TestsProgress, file: str, data: pd.DataFrame, language: LANGUAGE,
+                          current_task: Optional[TASK],
+                          key_to_fragments_and_future_dict: Dict[str, Tuple[List[str], Future]]) -> None:
+    key_to_test_results_dict = {k: future.result()[0][same_fragments[0]]
+                                for k, (same_fragments, future) in key_to_fragments_and_future_dict.items()}
+    fragment_to_test_results_dict = {f: key_to_test_results_dict[k]
+                                     for k, (same_fragments, _) in key_to_fragments_and_future_dict.items()
+                                     for f in same_fragments}
+    # Several fragments can share one future, but its statistics have to be added once
+    for future in set(future for _, future in key_to_fragments_and_future_dict.values()):
+        if tests_statistics is not None and future.result()[1] is not None:
+            tests_statistics.merge(future.result()[1])
+        if normalizer is not None and future.result()[2] is not None:
+            normalizer.merge(future.result()[2])
+    if cache is not None:
+        cache.put_all(language, key_to_test_results_dict, tasks, current_task, to_probe_tasks=to_probe_tasks,
+                      checker_options=checker_options)
+    data = __fill_tests_results(data, tasks, language, fragment_to_test_results_dict)
+    log.info(f'Finish running tests on {file}')
+    progress.finish_file(len(fragment_to_test_results_dict))
+    output_directory_with_user_folder = os.path.join(output_directory, __get_user_folder_name_from_path(file))
+    write_based_on_language(output_directory_with_user_folder, file, data, language)
+
+
+# Returns the files, which are not tested yet, and the output directory
+# If the tasks are not probed, we don't need to handle other files with tasks which are not in the TASK enum class,
+# so the progress is estimated only by the files to test. Otherwise, they are tested without the current task
+def __get_files_to_test(path: str, to_probe_tasks: bool = False) -> Tuple[List[str], str]:
+    output_directory = get_output_directory(path, consts.RUNNING_TESTS_OUTPUT_DIRECTORY)
+    files = get_all_file_system_items(path, tt_file_condition)
+    log.info(f'Found {len(files)} files to run tests on them')
+    files = filter_already_tested_files(files, output_directory)
+    log.info(f'Found {len(files)} files to run tests on them after filtering already tested')
+    if to_probe_tasks:
+        return files, output_directory
+    return [f for f in files if __get_task_by_ct_file(f) is not None], output_directory
+
+
+def __run_tests_in_parallel(files: List[str], tasks: List[TASK], in_and_out_files_dict: FilesDict,
+                            output_directory: str, workers: int, sandbox_root: Optional[str] = None,
+                            cache: Optional[TestsResultsCache] = None,
+                            checker_options: Optional[TaskCheckerOptions] = None,
+                            tests_statistics: Optional[TestsStatistics] = None,
+                            normalizer: Optional[FragmentNormalizer] = None,
+                            journal: Optional[TestsJournal] = None, to_probe_tasks: bool = False) -> None:
+    str_len_files = str(len(files))
+    progress = TestsProgress(len(files))
+    if sandbox_root is not None:
+        create_directory(sandbox_root)
+    sandboxes_root = tempfile.mkdtemp(prefix=f'{SOURCE_OBJECT_NAME}_workers_', dir=sandbox_root)
+    # If the fragments are normalized, task checkers are created in the main process only to find keys of the
+    # fragments, they don't check them
+    language_to_task_checker_dict: Dict[LANGUAGE, ITaskChecker] = {}
+    # The sandboxes are closed and the root is removed even if the running is interrupted
+    with ExitStack() as stack:
+        stack.callback(remove_directory, sandboxes_root)
+        executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers, initializer=__init_worker,
+                                                           initargs=(tasks, in_and_out_files_dict, sandboxes_root,
+                                                                     checker_options)))
+        # Files are written in the same order as they are submitted, but only a bounded number of them
+        # is kept in memory, so workers always have fragments of the next files to handle
+        pending_files: Deque[Tuple[str, pd.DataFrame, LANGUAGE, Optional[TASK],
+                                   Dict[str, Tuple[List[str], Future]]]] = deque()
+        for i, file in enumerate(files):
+            file_log_info = f'file: {str(i + 1)}/{str_len_files}'
+            log.info(f'Start running tests on {file_log_info}, {file}')
+            current_task = __get_task_by_ct_file(file)
+            data = pd.read_csv(file, encoding=consts.ISO_ENCODING)
+            language, unique_fragments = __get_unique_fragments(data, file_log_info)
+            if normalizer is not None and language not in language_to_task_checker_dict:
+                language_to_task_checker_dict[language] = create_task_checker(
+                    language, stack.enter_context(Sandbox.create_temporary(sandboxes_root)), checker_options)
+            key_to_fragments_and_future_dict = __get_tests_results_futures(
+                executor, unique_fragments, language, tasks, current_task, cache,
+                language_to_task_checker_dict.get(language), normalizer, journal, checker_options, to_probe_tasks)
+            pending_files.append((file, data, language, current_task, key_to_fragments_and_future_dict))
+            if len(pending_files) > workers:
+                __write_tests_results(output_directory, tasks, cache, checker_options, to_probe_tasks,
+                                      tests_statistics, normalizer, progress, *pending_files.popleft())
+        while pending_files:
+            __write_tests_results(output_directory, tasks, cache, checker_options, to_probe_tasks, tests_statistics,
+                                  normalizer, progress, *pending_files.popleft())
+
+
+def __run_tests_sequentially(files: List[str], tasks: List[TASK], in_and_out_files_dict: FilesDict,
+                             output_directory: str, sandbox_root: Optional[str] = None,
+                             cache: Optional[TestsResultsCache] = None,
+                             checker_options: Optional[TaskCheckerOptions] = None,
+                             tests_statistics: Optional[TestsStatistics] = None,
+                             normalizer: Optional[FragmentNormalizer] = None,
+                             journal: Optional[TestsJournal] = None, to_probe_tasks: bool = False) -> None:
+    str_len_files = str(len(files))
+    progress = TestsProgress(len(files))
+    with Sandbox.create_temporary(sandbox_root) as sandbox:
+        for i, file in enumerate(files):
+            file_log_info = f'file: {str(i + 1)}/{str_len_files}'
+            log.info(f'Start running tests on {file_log_info}, {file}')
+            current_task = __get_task_by_ct_file(file)
+            data = pd.read_csv(file, encoding=consts.ISO_ENCODING)
+            language, data = __check_tasks_on_correct_fragments(data, tasks, in_and_out_files_dict, file_log_info,
+                                                                current_task=current_task, sandbox=sandbox,
+                                                                cache=cache, options=checker_options,
+                                                                tests_statistics=tests_statistics,
+                                                                normalizer=normalizer, journal=journal,
+                                                                progress=progress, to_probe_tasks=to_probe_tasks)
+            log.info(f'Finish running tests on {file_log_info}, {file}')
+            output_directory_with_user_folder = os.path.join(output_directory,
+                                                             __get_user_folder_name_from_path(file))
+            write_based_on_language(output_directory_with_user_folder, file, data, language)
+
+
+def run_tests(path: str, workers: int = 1, sandbox_root: Optional[str] = None,
+              cache_path: Optional[str] = None, checker_options: Optional[TaskCheckerOptions] = None,
+              tests_statistics_path: Optional[str] = None, to_normalize_fragments: bool = False,
+              journal_path: Optional[str] = None, queue_path: Optional[str] = None,
+              to_probe_tasks: bool = False) -> str:
     """
     Run tests on all code snapshots in the data for the task.
     Note: the enum class TASK (see consts.py file)  must have the task key.
@@ -113,35 +502,239 @@ def run_tests(path: str) -> str:
     To deserialize this array of ratings, use the function unpack_tests_results from task_scoring.py.
     To get the rate only for the current task use the calculate_current_task_rate function from plots/scoring_solutions_plots.py
 
+    If workers is more than 1, unique fragments of all files are checked in a pool of the workers processes,
+    each of them uses its own folder for source files. The results are the same as for the sequential running.
+
+    Source and compiled files are written into temporary sandbox folders inside of the sandbox_root, which are
+    reused for all fragments and removed at the end. If sandbox_root is None, the default folder for temporary
+    files is used; it's better to use a folder on tmpfs, for example, /dev/shm, to avoid disk writes.
+
+    If cache_path is not None, tests results are stored in the persistent cache (see TestsResultsCache), so the same
+    fragments are not checked again in the other files and in the next runnings. The cache is invalidated
+    automatically if any of the tests files in the resources/tasks_tests is changed.
+
+    The checker_options make checking faster (see TaskCheckerOptions). For example, if to_use_jvm_harness is True,
+    Java and Kotlin tests are run in a long-lived JVM (see JvmHarness) instead of starting a new JVM for each test.
+    Each worker process has its own JVM. Compiled Kotlin and C++ fragments are kept in the compilation_cache_folder
+    between runs, all workers can share it.
+
+    If tests_statistics_path is not None, the tests of each task are run in the order of their failure rates, which
+    are loaded from the tests statistics of the previous runs (see TestsStatistics), so the most failing tests are
+    run first. The order isn't changed during the run, and the statistics of this run are added to the stored ones at
+    the end of the successful run. Since the tests are run till the first failed one, the partial rates are found for
+    this order, but the full solutions and the incorrect fragments get the same results. Note: the tests results cache
+    keeps the results for each order, but only the results for the current order are used.
+
+    If to_normalize_fragments is True, only one of the fragments, which differ only in whitespace and comments, is
+    checked, and the other ones get its results (see FragmentNormalizer). It's supported for Python and Java
+    fragments. The number of avoided tests runs is logged at the end.
+
+    If journal_path is not None, the results of each checked fragment are recorded to the journal at once
+    (see TestsJournal). If the running is interrupted, the next running on the same path replays the journal, so
+    only the fragments, which are not recorded, are checked; the files, which are written to the output directory,
+    are not handled again anyway. The journal is removed when the running is finished.
+
+    The progress and the estimated remaining time are logged after each file (see TestsProgress).
+
+    If queue_path is not None, the fragments are checked by the workers, which can run on several machines, through
+    the work queue in the queue_path (see run_tests_distributed). Only cache_path, checker_options and to_probe_tasks
+    are used then, so the other options of the running cannot be set.
+
+    If to_probe_tasks is True, the files with tasks, which are not in the TASK enum class, are not skipped: their
+    fragments are checked without the current task, and only the plausible tasks are fully tested
+    (see ITaskChecker.check_tasks). The files with known tasks are checked in the same way as without probing.
+
     For more details see
     https://github.com/JetBrains-Research/task-tracker-post-processing/wiki/Data-processing:-find-tests-results-for-the-tasks
     """
+    if queue_path is not None:
+        if workers > 1 or journal_path is not None or tests_statistics_path is not None or to_normalize_fragments:
+            log_and_raise_error('The workers number, the journal, the tests statistics and the fragments normalization '
+                                'cannot be used with the work queue', log)
+        return run_tests_distributed(path, queue_path, cache_path, checker_options, to_probe_tasks=to_probe_tasks)
+
     log.info(f'Start running tests on path {path}')
-    output_directory = get_output_directory(path, consts.RUNNING_TESTS_OUTPUT_DIRECTORY)
+    files, output_directory = __get_files_to_test(path, to_probe_tasks)
 
-    files = get_all_file_system_items(path, tt_file_condition)
-    str_len_files = str(len(files))
-    log.info(f'Found {str_len_files} files to run tests on them')
+    tasks = TASK.tasks()
+    in_and_out_files_dict = create_in_and_out_dict(tasks)
+    tests_statistics = None
+    if tests_statistics_path is not None:
+        tests_statistics = TestsStatistics.load(tests_statistics_path)
+        in_and_out_files_dict = tests_statistics.order_tests(in_and_out_files_dict)
 
-    files = filter_already_tested_files(files, output_directory)
-    str_len_files = str(len(files))
-    log.info(f'Found {str_len_files} files to run tests on them after filtering already tested')
+    cache = TestsResultsCache(cache_path, in_and_out_files_dict.files_fingerprint, in_and_out_files_dict.fingerprint) \
+        if cache_path is not None else None
+    normalizer = FragmentNormalizer() if to_normalize_fragments else None
+    journal = TestsJournal(journal_path, in_and_out_files_dict.fingerprint) if journal_path is not None else None
+    try:
+        if workers > 1:
+            log.info(f'Run tests in {workers} workers')
+            __run_tests_in_parallel(files, tasks, in_and_out_files_dict, output_directory, workers, sandbox_root,
+                                    cache, checker_options, tests_statistics, normalizer, journal, to_probe_tasks)
+        else:
+            __run_tests_sequentially(files, tasks, in_and_out_files_dict, output_directory, sandbox_root, cache,
+                                     checker_options, tests_statistics, normalizer, journal, to_probe_tasks)
+    finally:
+        if journal is not None:
+            journal.close()
+        if cache is not None:
+            cache.close()
+        if normalizer is not None:
+            normalizer.log_avoided()
+
+    # The statistics are saved only after the whole running, since the tests order is changed by them, so the results
+    # of the interrupted running couldn't be replayed from the journal
+    if tests_statistics is not None:
+        tests_statistics.save(tests_statistics_path)
+    if journal is not None:
+        # All results are written to the output files, so there is nothing to resume
+        journal.remove()
+    return output_directory
+
+
+def __report_failed_files(queue: WorkQueue,
+                          failed_files: List[Tuple[str, LANGUAGE, Optional[TASK], List[str]]]) -> None:
+    for file, language, current_task, unique_fragments in failed_files:
+        errors = queue.get_errors(language, current_task, unique_fragments)
+        first_error = next(iter(errors.values()), None)
+        if first_error is not None:
+            log.error(f'{len(errors)} fragments of the file {file} are failed, the first error: {first_error}')
+    log_and_raise_error(f'Tests results of {len(failed_files)} files are not found since some of their fragments are '
+                        f'failed, run the same command again to check them again', log)
+
+
+def run_tests_distributed(path: str, queue_path: str, cache_path: Optional[str] = None,
+                          checker_options: Optional[TaskCheckerOptions] = None,
+                          polling_interval: float = WORK_QUEUE_POLLING_INTERVAL, to_probe_tasks: bool = False) -> str:
+    """
+    Run tests on all code snapshots in the data as run_tests does, but the unique fragments are checked by workers,
+    which can run on several machines (see run_tests_worker). This function is the coordinator: it puts the unique
+    fragments of all files into the work queue in the queue_path (see WorkQueue), which has to be on a file system
+    shared with the workers, waits for their results and writes the files with the results in the same way as run_tests.
+    The workers can be started before or after the coordinator, they use the checker_options and to_probe_tasks
+    given to it.
 
+    If the coordinator is interrupted, it can be run again: the results of the finished fragments are kept in the queue.
+    If some fragments are failed (see WorkQueue), the other files are written, and then an error is raised; the failed
+    fragments are checked again in the next running.
+    If cache_path is not None, the cached fragments are not put into the queue, and the results of the other ones are
+    put into the cache (see TestsResultsCache).
+    """
+    log.info(f'Start running tests on path {path} by the workers of the queue {queue_path}')
+    files, output_directory = __get_files_to_test(path, to_probe_tasks)
     tasks = TASK.tasks()
     in_and_out_files_dict = create_in_and_out_dict(tasks)
+    cache = TestsResultsCache(cache_path, in_and_out_files_dict.files_fingerprint, in_and_out_files_dict.fingerprint) \
+        if cache_path is not None else None
+    try:
+        with WorkQueue(queue_path) as queue:
+            queue.start(tasks, in_and_out_files_dict.fingerprint, checker_options, to_probe_tasks)
+            # The files are read again to write them, only their unique fragments are kept in memory
+            pending_files: List[Tuple[str, LANGUAGE, Optional[TASK], List[str]]] = []
+            for i, file in enumerate(files):
+                current_task = __get_task_by_ct_file(file)
+                data = pd.read_csv(file, encoding=consts.ISO_ENCODING)
+                language, unique_fragments = __get_unique_fragments(data, f'file: {i + 1}/{len(files)}')
+                if unique_fragments:
+                    cached_test_results = {f: cache.get(language, f, tasks, current_task,
+                                                        to_probe_tasks=to_probe_tasks, checker_options=checker_options)
+                                           for f in unique_fragments} if cache is not None else {}
+                    queue.put_jobs(language, current_task, unique_fragments,
+                                   {f: r for f, r in cached_test_results.items() if r is not None})
+                pending_files.append((file, language, current_task, unique_fragments))
+            queue.close_for_jobs()
+            log.info(f'Put {queue.get_unfinished_jobs_number()} unfinished jobs into the queue {queue_path}')
 
-    for i, file in enumerate(files):
-        file_log_info = f'file: {str(i + 1)}/{str_len_files}'
-        log.info(f'Start running tests on {file_log_info}, {file}')
-        current_task = __get_task_by_ct_file(file)
-        if not current_task:
-            # We don't need to handle other files with tasks which are not in the TASK enum class
-            continue
-        data = pd.read_csv(file, encoding=consts.ISO_ENCODING)
-        language, data = __check_tasks_on_correct_fragments(data, tasks, in_and_out_files_dict, file_log_info,
-                                                            current_task=current_task)
-        log.info(f'Finish running tests on {file_log_info}, {file}')
-        output_directory_with_user_folder = os.path.join(output_directory, __get_user_folder_name_from_path(file))
-        write_based_on_language(output_directory_with_user_folder, file, data, language)
-
+            progress = TestsProgress(len(pending_files))
+            while pending_files:
+                # If the queue is finished before the results are read, the not finished files have failed fragments
+                is_queue_finished = queue.is_finished()
+                not_finished_files = []
+                for file, language, current_task, unique_fragments in pending_files:
+                    fragment_to_test_results_dict = queue.get_results(language, current_task, unique_fragments) \
+                        if unique_fragments else {}
+                    if fragment_to_test_results_dict is None:
+                        not_finished_files.append((file, language, current_task, unique_fragments))
+                        continue
+                    if cache is not None and fragment_to_test_results_dict:
+                        cache.put_all(language, fragment_to_test_results_dict, tasks, current_task,
+                                      to_probe_tasks=to_probe_tasks, checker_options=checker_options)
+                    data = pd.read_csv(file, encoding=consts.ISO_ENCODING)
+                    data[FRAGMENT] = data[FRAGMENT].fillna('')
+                    data = __fill_tests_results(data, tasks, language, fragment_to_test_results_dict)
+                    output_directory_with_user_folder = os.path.join(output_directory,
+                                                                     __get_user_folder_name_from_path(file))
+                    write_based_on_language(output_directory_with_user_folder, file, data, language)
+                    progress.finish_file(len(unique_fragments))
+                if len(not_finished_files) == len(pending_files):
+                    if is_queue_finished:
+                        __report_failed_files(queue, not_finished_files)
+                    time.sleep(polling_interval)
+                pending_files = not_finished_files
+    finally:
+        if cache is not None:
+            cache.close()
     return output_directory
+
+
+# If the leased fragments cannot be checked together, they are checked one by one, so only the fragments, which cannot
+# be checked, are failed
+def __check_leased_fragments(queue: WorkQueue, tasks: List[TASK], in_and_out_files_dict: FilesDict,
+                             language: LANGUAGE, current_task: Optional[TASK], fragments: List[str], sandbox: Sandbox,
+                             checker_options: TaskCheckerOptions, to_probe_tasks: bool) -> None:
+    try:
+        fragment_to_test_results_dict = check_fragments(tasks, fragments, in_and_out_files_dict, language,
+                                                        current_task=current_task, sandbox=sandbox,
+                                                        checker_options=checker_options,
+                                                        to_probe_tasks=to_probe_tasks)
+    except Exception as e:
+        log.exception(e)
+        if len(fragments) == 1:
+            queue.fail_jobs(language, current_task, fragments, f'{type(e).__name__}: {e}')
+        else:
+            for fragment in fragments:
+                __check_leased_fragments(queue, tasks, in_and_out_files_dict, language, current_task, [fragment],
+                                         sandbox, checker_options, to_probe_tasks)
+        return
+    queue.finish_jobs(language, current_task, fragment_to_test_results_dict)
+
+
+def run_tests_worker(queue_path: str, sandbox_root: Optional[str] = None,
+                     polling_interval: float = WORK_QUEUE_POLLING_INTERVAL) -> int:
+    """
+    Check the fragments from the work queue in the queue_path (see run_tests_distributed) until the queue is finished.
+    The worker waits for the coordinator to start the queue. The tests of the tasks in the resources/tasks_tests
+    have to be the same as the coordinator has. Source and compiled files are written into a temporary sandbox
+    inside of the sandbox_root (see run_tests). The fragments, which cannot be checked, are failed in the queue with
+    the errors, so the worker doesn't stop on them.
+
+    Returns the number of the checked fragments.
+    """
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+    checked_fragments = 0
+    with WorkQueue(queue_path) as queue:
+        while not queue.is_started():
+            time.sleep(polling_interval)
+        tasks = queue.tasks
+        in_and_out_files_dict = create_in_and_out_dict(tasks)
+        if in_and_out_files_dict.fingerprint != queue.tests_fingerprint:
+            log_and_raise_error(f'The tests of the worker {worker} differ from the tests of the coordinator', log)
+        checker_options = queue.checker_options
+        to_probe_tasks = queue.to_probe_tasks
+        log.info(f'Start the worker {worker} of the queue {queue_path}')
+        with Sandbox.create_temporary(sandbox_root) as sandbox:
+            while True:
+                jobs = queue.lease_jobs(worker, LEASED_FRAGMENTS_NUMBER)
+                if jobs is None:
+                    if queue.is_finished():
+                        break
+                    # Other workers can fail to finish their jobs, so they are leased again after the lease is expired
+                    time.sleep(polling_interval)
+                    continue
+                language, current_task, fragments = jobs
+                __check_leased_fragments(queue, tasks, in_and_out_files_dict, language, current_task, fragments,
+                                         sandbox, checker_options, to_probe_tasks)
+                checked_fragments += len(fragments)
+    log.info(f'Finish the worker {worker}, {checked_fragments} fragments are checked')
+    return checked_fragments
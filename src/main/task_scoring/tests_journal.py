@@ -0,0 +1,127 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import List, Optional, Dict, TextIO
+
+from src.main.util.consts import LOGGER_NAME, LANGUAGE, TASK
+from src.main.task_scoring.task_checker import TaskCheckerOptions
+from src.main.task_scoring.tests_results_cache import get_tests_results_key
+from src.main.util.file_util import does_exist, create_directory, get_parent_folder, remove_file
+
+log = logging.getLogger(LOGGER_NAME)
+
+FINGERPRINT_KEY = 'tests_fingerprint'
+# The journal is flushed after each record, but it's synced to the disk not more often than once in this interval
+JOURNAL_SYNC_INTERVAL = 1
+
+
+class TestsJournal:
+    """
+    A write-ahead journal of the tests results, which is a jsonl file with a record for each checked fragment.
+    The records are written as soon as the fragments are checked, so if the running is interrupted, even in the middle
+    of a file, the results are replayed from the journal on the next running and the fragments are not checked again.
+    The results are keyed in the same way as in the tests results cache (see get_tests_results_key).
+
+    The first record is the tests fingerprint. If it differs from the current one, the journal is started again.
+    The last record can be incomplete if the running is interrupted while it's written, such a record is skipped.
+
+    The results can be put from several threads, for example, from callbacks of the futures.
+    """
+
+    def __init__(self, path: str, tests_fingerprint: str):
+        self._path = path
+        self._key_to_results_dict: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._last_sync_time = time.monotonic()
+        create_directory(get_parent_folder(path))
+        self._file = self.__open(tests_fingerprint)
+
+    def __replay(self, tests_fingerprint: str) -> bool:
+        with open(self._path) as f:
+            lines = f.read().split('\n')
+        try:
+            if json.loads(lines[0]) != {FINGERPRINT_KEY: tests_fingerprint}:
+                log.info(f'Tests fingerprint differs from the journaled one, start the journal {self._path} again')
+                return False
+        except ValueError:
+            return False
+        for line in lines[1:]:
+            try:
+                key, results = json.loads(line)
+                self._key_to_results_dict[key] = results
+            except (ValueError, TypeError):
+                if line:
+                    log.info(f'Skip the incomplete record of the journal {self._path}: {line}')
+        log.info(f'Replay {len(self._key_to_results_dict)} tests results from the journal {self._path}')
+        return True
+
+    def __open(self, tests_fingerprint: str) -> TextIO:
+        if does_exist(self._path) and self.__replay(tests_fingerprint):
+            journal_file = open(self._path, 'a')
+            # The incomplete record is finished not to corrupt the next one
+            journal_file.write('\n')
+        else:
+            self._key_to_results_dict.clear()
+            journal_file = open(self._path, 'w')
+            journal_file.write(json.dumps({FINGERPRINT_KEY: tests_fingerprint}) + '\n')
+        journal_file.flush()
+        return journal_file
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def __len__(self) -> int:
+        return len(self._key_to_results_dict)
+
+    def get(self, language: LANGUAGE, fragment: str, tasks: List[TASK], current_task: Optional[TASK] = None,
+            stop_after_first_false: bool = True, to_probe_tasks: bool = False,
+            checker_options: Optional[TaskCheckerOptions] = None) -> Optional[List[float]]:
+        key = get_tests_results_key(language, fragment, tasks, current_task, stop_after_first_false, to_probe_tasks,
+                                    checker_options)
+        with self._lock:
+            return self._key_to_results_dict.get(key)
+
+    def put_all(self, language: LANGUAGE, fragment_to_test_results_dict: Dict[str, List[float]], tasks: List[TASK],
+                current_task: Optional[TASK] = None, stop_after_first_false: bool = True,
+                to_probe_tasks: bool = False, checker_options: Optional[TaskCheckerOptions] = None) -> None:
+        records = []
+        for fragment, results in fragment_to_test_results_dict.items():
+            key = get_tests_results_key(language, fragment, tasks, current_task, stop_after_first_false,
+                                        to_probe_tasks, checker_options)
+            records.append((key, results))
+        with self._lock:
+            self._key_to_results_dict.update(records)
+            self._file.write(''.join(json.dumps(record) + '\n' for record in records))
+            self._file.flush()
+            if time.monotonic() - self._last_sync_time >= JOURNAL_SYNC_INTERVAL:
+                os.fsync(self._file.fileno())
+                self._last_sync_time = time.monotonic()
+
+    def put(self, language: LANGUAGE, fragment: str, tasks: List[TASK], results: List[float],
+            current_task: Optional[TASK] = None, stop_after_first_false: bool = True,
+            to_probe_tasks: bool = False, checker_options: Optional[TaskCheckerOptions] = None) -> None:
+        self.put_all(language, {fragment: results}, tasks, current_task, stop_after_first_false, to_probe_tasks,
+                     checker_options)
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+    # Is called when the running is finished, so there is nothing to resume
+    def remove(self) -> None:
+        self.close()
+        remove_file(self._path)
+
+    def __enter__(self) -> 'TestsJournal':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -0,0 +1,45 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import time
+import logging
+import datetime
+from typing import Optional
+
+from src.main.util.consts import LOGGER_NAME
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+class TestsProgress:
+    """
+    The progress of running tests on the files. The remaining time is estimated by the time spent on one unique
+    fragment and the number of the remaining unique fragments. The files are not read in advance, so the number of
+    unique fragments in each of the remaining files is estimated by the mean number in the finished ones.
+    """
+
+    def __init__(self, files_number: int):
+        self._files_number = files_number
+        self._finished_files = 0
+        self._finished_fragments = 0
+        self._start_time = time.monotonic()
+
+    @property
+    def remaining_fragments(self) -> Optional[float]:
+        if self._finished_files == 0:
+            return None
+        return self._finished_fragments / self._finished_files * (self._files_number - self._finished_files)
+
+    # Returns the estimated remaining time in seconds or None if nothing is finished yet
+    @property
+    def remaining_time(self) -> Optional[float]:
+        if self._finished_fragments == 0:
+            return None
+        return (time.monotonic() - self._start_time) / self._finished_fragments * self.remaining_fragments
+
+    def finish_file(self, unique_fragments: int) -> None:
+        self._finished_files += 1
+        self._finished_fragments += unique_fragments
+        remaining_time = self.remaining_time
+        eta = str(datetime.timedelta(seconds=round(remaining_time))) if remaining_time is not None else 'unknown'
+        log.info(f'Progress: {self._finished_files}/{self._files_number} files, {self._finished_fragments} unique '
+                 f'fragments are finished, about {round(self.remaining_fragments)} unique fragments remain, ETA: {eta}')
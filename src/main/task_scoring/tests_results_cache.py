@@ -0,0 +1,135 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+from typing import List, Optional, Dict
+
+from src.main.util.consts import LOGGER_NAME, LANGUAGE, TASK
+from src.main.util.file_util import get_all_file_system_items, match_condition, create_directory, get_parent_folder
+from src.main.task_scoring.tests_suite import get_fingerprint
+from src.main.task_scoring.task_checker import TASKS_TESTS_PATH, TaskCheckerOptions
+
+log = logging.getLogger(LOGGER_NAME)
+
+FINGERPRINT_KEY = 'tests_fingerprint'
+
+
+def get_fragment_hash(fragment: str) -> str:
+    return hashlib.sha256(fragment.encode('utf-8')).hexdigest()
+
+
+# The key of the tests results of the fragment (or its key, see FragmentNormalizer) for the parameters of the running
+# The tasks are probed only if the current task is not set (see ITaskChecker.check_tasks), so only then the keys of
+# the probed results differ, the keys of other results are the same as before the probing was added
+# In the same way, only the checker options, which change the tests results and differ from the default values, are
+# added to the key (see TaskCheckerOptions.get_results_affecting_options)
+def get_tests_results_key(language: LANGUAGE, fragment: str, tasks: List[TASK], current_task: Optional[TASK],
+                          stop_after_first_false: bool, to_probe_tasks: bool = False,
+                          checker_options: Optional[TaskCheckerOptions] = None) -> str:
+    key = [language.value, get_fragment_hash(fragment), [t.value for t in tasks],
+           current_task.value if current_task is not None else None, stop_after_first_false]
+    if to_probe_tasks and current_task is None:
+        key.append(to_probe_tasks)
+    results_affecting_options = checker_options.get_results_affecting_options() if checker_options is not None else {}
+    if results_affecting_options:
+        key.append(results_affecting_options)
+    return json.dumps(key)
+
+
+# Get a hash of all in and out files for the tasks (see get_fingerprint)
+def get_tests_fingerprint(tasks_tests_path: str = TASKS_TESTS_PATH) -> str:
+    files = get_all_file_system_items(tasks_tests_path, match_condition(r'(in|out)_\d+.txt'))
+    relative_path_to_content = {}
+    for file in files:
+        with open(file, 'rb') as f:
+            relative_path_to_content[os.path.relpath(file, tasks_tests_path)] = f.read()
+    return get_fingerprint(relative_path_to_content)
+
+
+class TestsResultsCache:
+    """
+    A persistent cache of tests results for the fragments, which is stored in a sqlite database.
+    The results are keyed by the language, the hash of the fragment or its key (see FragmentNormalizer), the tasks
+    and the parameters of the tests running.
+    If the tests fingerprint differs from the stored one, all the stored results are removed. If the tests are
+    sorted (see TestsSuite.sorted), the results are also keyed by the suite fingerprint, so the results found for
+    other orders of the same tests are kept.
+    """
+
+    def __init__(self, path: str, tests_fingerprint: Optional[str] = None, suite_fingerprint: Optional[str] = None):
+        self._path = path
+        self._hits = 0
+        self._misses = 0
+        create_directory(get_parent_folder(path))
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, results TEXT NOT NULL)')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        tests_fingerprint = tests_fingerprint if tests_fingerprint is not None else get_tests_fingerprint()
+        # The keys of the results for the unsorted tests are the same as before the sorting was added
+        self._suite_fingerprint = suite_fingerprint if suite_fingerprint != tests_fingerprint else None
+        self.__invalidate_if_needed(tests_fingerprint)
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __invalidate_if_needed(self, tests_fingerprint: str) -> None:
+        row = self._connection.execute('SELECT value FROM meta WHERE key = ?', (FINGERPRINT_KEY,)).fetchone()
+        if row is None or row[0] != tests_fingerprint:
+            log.info(f'Tests fingerprint differs from the stored one, clear the tests results cache {self._path}')
+            with self._connection:
+                self._connection.execute('DELETE FROM results')
+                self._connection.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                                         (FINGERPRINT_KEY, tests_fingerprint))
+
+    def __get_stored_key(self, key: str) -> str:
+        return key if self._suite_fingerprint is None else json.dumps([self._suite_fingerprint, key])
+
+    def get(self, language: LANGUAGE, fragment: str, tasks: List[TASK], current_task: Optional[TASK] = None,
+            stop_after_first_false: bool = True, to_probe_tasks: bool = False,
+            checker_options: Optional[TaskCheckerOptions] = None) -> Optional[List[float]]:
+        key = get_tests_results_key(language, fragment, tasks, current_task, stop_after_first_false, to_probe_tasks,
+                                    checker_options)
+        row = self._connection.execute('SELECT results FROM results WHERE key = ?',
+                                       (self.__get_stored_key(key),)).fetchone()
+        if row is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return json.loads(row[0])
+
+    def put(self, language: LANGUAGE, fragment: str, tasks: List[TASK], results: List[float],
+            current_task: Optional[TASK] = None, stop_after_first_false: bool = True,
+            to_probe_tasks: bool = False, checker_options: Optional[TaskCheckerOptions] = None) -> None:
+        key = get_tests_results_key(language, fragment, tasks, current_task, stop_after_first_false, to_probe_tasks,
+                                    checker_options)
+        with self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?)',
+                                     (self.__get_stored_key(key), json.dumps(results)))
+
+    # To put results of several fragments in one transaction
+    def put_all(self, language: LANGUAGE, fragment_to_test_results_dict: Dict[str, List[float]], tasks: List[TASK],
+                current_task: Optional[TASK] = None, stop_after_first_false: bool = True,
+                to_probe_tasks: bool = False, checker_options: Optional[TaskCheckerOptions] = None) -> None:
+        rows = [(self.__get_stored_key(get_tests_results_key(language, f, tasks, current_task, stop_after_first_false,
+                                                             to_probe_tasks, checker_options)), json.dumps(results))
+                for f, results in fragment_to_test_results_dict.items()]
+        with self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO results VALUES (?, ?)', rows)
+
+    def close(self) -> None:
+        log.info(f'Tests results cache {self._path}: {self._hits} hits, {self._misses} misses')
+        self._connection.close()
+
+    def __enter__(self) -> 'TestsResultsCache':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
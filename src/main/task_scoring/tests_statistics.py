@@ -0,0 +1,64 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import json
+import logging
+from typing import Dict, List, Optional
+
+from src.main.util.consts import LOGGER_NAME, TASK
+from src.main.task_scoring.tests_suite import TaskTest, TestsSuite
+from src.main.util.file_util import does_exist, create_file, get_name_from_path
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+class TestsStatistics:
+    """
+    The numbers of runs and failures of each test, which are stored in a json file between runs.
+    They are used to run the most failing tests of each task first (see order_tests).
+    """
+
+    def __init__(self, test_to_runs_and_failures: Optional[Dict[str, List[int]]] = None):
+        self._test_to_runs_and_failures = test_to_runs_and_failures if test_to_runs_and_failures is not None else {}
+
+    @staticmethod
+    def __get_test_key(task: TASK, test: TaskTest) -> str:
+        return f'{task.value}/{get_name_from_path(test.in_file)}'
+
+    def add(self, task: TASK, test: TaskTest, is_passed: bool) -> None:
+        runs_and_failures = self._test_to_runs_and_failures.setdefault(self.__get_test_key(task, test), [0, 0])
+        runs_and_failures[0] += 1
+        if not is_passed:
+            runs_and_failures[1] += 1
+
+    def merge(self, other: 'TestsStatistics') -> None:
+        for test, (runs, failures) in other._test_to_runs_and_failures.items():
+            runs_and_failures = self._test_to_runs_and_failures.setdefault(test, [0, 0])
+            runs_and_failures[0] += runs
+            runs_and_failures[1] += failures
+
+    # Returns 0 for the tests, which have never been run
+    def get_failure_rate(self, task: TASK, test: TaskTest) -> float:
+        runs, failures = self._test_to_runs_and_failures.get(self.__get_test_key(task, test), [0, 0])
+        return failures / runs if runs > 0 else 0.0
+
+    def order_tests(self, tests_suite: TestsSuite) -> TestsSuite:
+        """
+        Get the suite, in which the tests of each task are sorted by their failure rates, the most failing ones
+        go first. Tests with the same failure rates keep their order.
+        """
+        return tests_suite.sorted(lambda task, test: -self.get_failure_rate(task, test))
+
+    @classmethod
+    def load(cls, path: str) -> 'TestsStatistics':
+        if not does_exist(path):
+            log.info(f'Tests statistics {path} do not exist, the tests are run in the default order')
+            return cls()
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def save(self, path: str) -> None:
+        # The file is replaced atomically not to lose the statistics if the saving is interrupted
+        temporary_path = f'{path}.{os.getpid()}'
+        create_file(json.dumps(self._test_to_runs_and_failures, indent=2, sort_keys=True), temporary_path)
+        os.replace(temporary_path, path)
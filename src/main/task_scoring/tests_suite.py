@@ -0,0 +1,131 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import io
+import os
+import hashlib
+import logging
+from collections.abc import Mapping
+from typing import Dict, List, Tuple, Iterator, Callable, Optional
+
+from src.main.util.log_util import log_and_raise_error
+from src.main.util.consts import LOGGER_NAME, TASK, TASKS_TESTS, ISO_ENCODING, RUNNING_TESTS_OUTPUT_DIRECTORY
+from src.main.util.file_util import get_all_file_system_items, match_condition, pair_in_and_out_files
+
+log = logging.getLogger(LOGGER_NAME)
+
+TASKS_TESTS_PATH = TASKS_TESTS.TASKS_TESTS_PATH.value
+
+
+def get_fingerprint(relative_path_to_content: Dict[str, bytes]) -> str:
+    """
+    Get a hash of the tests files by their paths relative to the tests folder and their contents, so it changes when
+    any of the tests is changed, added or removed.
+    The version of the running tests (RUNNING_TESTS_OUTPUT_DIRECTORY) is also taken into account.
+    """
+    fingerprint = hashlib.sha256(RUNNING_TESTS_OUTPUT_DIRECTORY.encode('utf-8'))
+    for relative_path in sorted(relative_path_to_content.keys()):
+        fingerprint.update(relative_path.encode('utf-8'))
+        fingerprint.update(hashlib.sha256(relative_path_to_content[relative_path]).digest())
+    return fingerprint.hexdigest()
+
+
+class TaskTest:
+    """
+    An immutable test of the task: the input and the expected output in the form, in which they are compared with
+    the output of the fragments (see is_output_correct), and the input file for logging.
+    """
+
+    def __init__(self, in_file: str, input: str, expected_output: str):
+        self._in_file = in_file
+        self._input = input
+        self._expected_output = expected_output
+
+    @property
+    def in_file(self) -> str:
+        return self._in_file
+
+    @property
+    def input(self) -> str:
+        return self._input
+
+    @property
+    def expected_output(self) -> str:
+        return self._expected_output
+
+
+class TestsSuite(Mapping):
+    """
+    An immutable mapping from the tasks to their tests, which are read into memory once, so tests files are not read
+    again for each fragment. The fingerprint of the suite is a hash of all its tests files (see get_fingerprint) and
+    of their order if they are sorted (see sorted); the files fingerprint doesn't depend on the order.
+
+    The suite consists of plain objects, so worker processes started by fork share its memory with the parent process
+    and the other ones get it by pickling once per process.
+    """
+
+    def __init__(self, task_to_tests: Dict[TASK, Tuple[TaskTest, ...]], fingerprint: str,
+                 files_fingerprint: Optional[str] = None):
+        self._task_to_tests = dict(task_to_tests)
+        self._fingerprint = fingerprint
+        self._files_fingerprint = files_fingerprint if files_fingerprint is not None else fingerprint
+
+    @property
+    def fingerprint(self) -> str:
+        return self._fingerprint
+
+    @property
+    def files_fingerprint(self) -> str:
+        return self._files_fingerprint
+
+    def __getitem__(self, task: TASK) -> Tuple[TaskTest, ...]:
+        return self._task_to_tests[task]
+
+    def __iter__(self) -> Iterator[TASK]:
+        return iter(self._task_to_tests)
+
+    def __len__(self) -> int:
+        return len(self._task_to_tests)
+
+    def sorted(self, key: Callable[[TASK, TaskTest], float]) -> 'TestsSuite':
+        """
+        Get a suite with the same tests, which are sorted by the key for each task; the sort is stable.
+        The order of the tests is taken into account in the fingerprint of the new suite, since the results of
+        running tests till the first failed one depend on it.
+        """
+        task_to_tests = {t: tuple(sorted(tests, key=lambda test: key(t, test))) for t, tests in self.items()}
+        if task_to_tests == self._task_to_tests:
+            return self
+        fingerprint = hashlib.sha256(self._fingerprint.encode('utf-8'))
+        for task, tests in task_to_tests.items():
+            order = [task.value] + [os.path.basename(test.in_file) for test in tests]
+            fingerprint.update(' '.join(order).encode('utf-8'))
+        return TestsSuite(task_to_tests, fingerprint.hexdigest(), self._files_fingerprint)
+
+    @staticmethod
+    def __read_file(file: str) -> bytes:
+        with open(file, 'rb') as f:
+            return f.read()
+
+    # The same as get_content_from_file does: newlines are translated and the last ones are removed
+    @staticmethod
+    def __decode_test_file(content: bytes) -> str:
+        return io.TextIOWrapper(io.BytesIO(content), encoding=ISO_ENCODING).read().rstrip('\n')
+
+    @classmethod
+    def load(cls, tasks: List[TASK], tasks_tests_path: str = TASKS_TESTS_PATH) -> 'TestsSuite':
+        task_to_tests = {}
+        relative_path_to_content = {}
+        for task in tasks:
+            root = os.path.join(tasks_tests_path, task.value)
+            in_files = get_all_file_system_items(root, match_condition(r'in_\d+.txt'))
+            out_files = get_all_file_system_items(root, match_condition(r'out_\d+.txt'))
+            if len(out_files) != len(in_files):
+                log_and_raise_error('Length of out files list does not equal in files list', log)
+            tests = []
+            for in_file, out_file in pair_in_and_out_files(in_files, out_files):
+                in_content, out_content = cls.__read_file(in_file), cls.__read_file(out_file)
+                relative_path_to_content[os.path.relpath(in_file, tasks_tests_path)] = in_content
+                relative_path_to_content[os.path.relpath(out_file, tasks_tests_path)] = out_content
+                tests.append(TaskTest(in_file, cls.__decode_test_file(in_content), cls.__decode_test_file(out_content)))
+            task_to_tests[task] = tuple(tests)
+        return cls(task_to_tests, get_fingerprint(relative_path_to_content))
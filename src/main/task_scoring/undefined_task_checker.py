@@ -6,6 +6,7 @@ from typing import List, Optional
 
 from src.main.util import consts
 from src.main.util.consts import LANGUAGE, TASK
+from src.main.task_scoring.tests_statistics import TestsStatistics
 from src.main.task_scoring.task_checker import ITaskChecker, SOURCE_OBJECT_NAME, FilesDict
 
 log = logging.getLogger(consts.LOGGER_NAME)
@@ -35,6 +36,14 @@ class UndefinedTaskChecker(ITaskChecker):
         return False
 
     def check_tasks(self, tasks: list, source_code: str, in_and_out_files_dict: FilesDict,
-                    stop_after_first_false: bool = True, current_task: Optional[TASK] = None) -> List[int]:
+                    stop_after_first_false: bool = True, current_task: Optional[TASK] = None,
+                    tests_statistics: Optional[TestsStatistics] = None, to_probe_tasks: bool = False) -> List[int]:
         rate = consts.TEST_RESULT.INCORRECT_CODE.value
         return [rate] * len(tasks)
+
+    async def check_tasks_async(self, tasks: list, source_code: str, in_and_out_files_dict: FilesDict,
+                                stop_after_first_false: bool = True, current_task: Optional[TASK] = None,
+                                tests_statistics: Optional[TestsStatistics] = None,
+                                to_probe_tasks: bool = False) -> List[int]:
+        return self.check_tasks(tasks, source_code, in_and_out_files_dict, stop_after_first_false, current_task,
+                                tests_statistics, to_probe_tasks)
@@ -0,0 +1,236 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import json
+import time
+import sqlite3
+import logging
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Tuple, Iterator
+
+from src.main.util.consts import LOGGER_NAME, LANGUAGE, TASK
+from src.main.task_scoring.task_checker import TaskCheckerOptions
+from src.main.task_scoring.tests_results_cache import get_tests_results_key
+from src.main.util.file_util import create_directory, get_parent_folder
+
+log = logging.getLogger(LOGGER_NAME)
+
+# A job, which is not finished during this time in seconds, is given to another worker
+LEASE_TIME = 600
+# A job, which is leased this number of times and is not finished, for example, since it kills the workers, is failed
+MAX_JOB_ATTEMPTS = 3
+# The max number of sqlite variables in one query
+MAX_QUERY_KEYS = 500
+# How long to wait for the lock of the database in seconds
+DATABASE_TIMEOUT = 60
+
+TASKS_KEY = 'tasks'
+FINGERPRINT_KEY = 'tests_fingerprint'
+CHECKER_OPTIONS_KEY = 'checker_options'
+TO_PROBE_TASKS_KEY = 'to_probe_tasks'
+IS_CLOSED_KEY = 'is_closed'
+
+
+class WorkQueue:
+    """
+    A queue of jobs of running tests on the unique fragments, which is stored in a sqlite database, so the coordinator
+    and the workers on several machines can share it through a shared folder. Each job is a fragment with its language
+    and current task, which is None for the files with unknown tasks if the tasks are probed, it's keyed in the same
+    way as in the tests results cache (see get_tests_results_key).
+
+    The coordinator starts the queue with the tasks, the tests fingerprint, the checker options and the probing of the
+    tasks (see ITaskChecker.check_tasks), puts the jobs and closes the queue for the new jobs. Workers lease jobs for
+    LEASE_TIME seconds and post their results. If a worker dies, its jobs are leased again after the lease is expired,
+    so the clocks of the machines have to be synchronized.
+    A job fails if the worker cannot check it and posts the error or if it's leased max_job_attempts times without
+    results. The queue is finished when it's closed and all jobs have results or are failed.
+
+    The jobs and their results are kept in the database, so if the coordinator is restarted with the same tests and
+    the same checker options, which change the tests results (see TaskCheckerOptions.get_results_affecting_options),
+    the finished jobs are not run again. The failed jobs are run again with the new attempts.
+
+    Note: the shared file system has to support the file locks used by sqlite.
+    """
+
+    def __init__(self, path: str, lease_time: int = LEASE_TIME, max_job_attempts: int = MAX_JOB_ATTEMPTS):
+        self._path = path
+        self._lease_time = lease_time
+        self._max_job_attempts = max_job_attempts
+        create_directory(get_parent_folder(path))
+        # Transactions are started explicitly (see __transaction)
+        self._connection = sqlite3.connect(path, timeout=DATABASE_TIMEOUT, isolation_level=None)
+        with self.__transaction():
+            self._connection.execute('CREATE TABLE IF NOT EXISTS jobs (key TEXT PRIMARY KEY, language TEXT NOT NULL, '
+                                     'current_task TEXT, fragment TEXT NOT NULL, results TEXT, '
+                                     'lease_owner TEXT, lease_expiration REAL, attempts INTEGER NOT NULL, '
+                                     'error TEXT)')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+
+    # The database is locked for writing at the beginning of the transaction, so a job cannot be leased twice
+    @contextmanager
+    def __transaction(self) -> Iterator[None]:
+        self._connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        self._connection.execute('COMMIT')
+
+    def __get_meta(self, key: str) -> Optional[str]:
+        row = self._connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def __set_meta(self, key: str, value: str) -> None:
+        self._connection.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+
+    def start(self, tasks: List[TASK], tests_fingerprint: str, checker_options: Optional[TaskCheckerOptions] = None,
+              to_probe_tasks: bool = False) -> None:
+        options = checker_options if checker_options is not None else TaskCheckerOptions()
+        with self.__transaction():
+            if self.__get_meta(TASKS_KEY) != json.dumps([t.value for t in tasks]) \
+                    or self.__get_meta(FINGERPRINT_KEY) != tests_fingerprint:
+                log.info(f'The tests differ from the queued ones, clear the work queue {self._path}')
+                self._connection.execute('DELETE FROM jobs')
+            elif self.checker_options.get_results_affecting_options() != options.get_results_affecting_options():
+                log.info(f'The checker options change the tests results of the queued jobs, '
+                         f'clear the work queue {self._path}')
+                self._connection.execute('DELETE FROM jobs')
+            elif self.to_probe_tasks != to_probe_tasks:
+                # The tasks are probed only if the current task is not set (see get_tests_results_key)
+                log.info(f'The probing of the tasks is changed, remove the jobs without the current task from '
+                         f'the work queue {self._path}')
+                self._connection.execute('DELETE FROM jobs WHERE current_task IS NULL')
+            self._connection.execute('UPDATE jobs SET attempts = 0, error = NULL WHERE results IS NULL')
+            self.__set_meta(TASKS_KEY, json.dumps([t.value for t in tasks]))
+            self.__set_meta(FINGERPRINT_KEY, tests_fingerprint)
+            self.__set_meta(CHECKER_OPTIONS_KEY, json.dumps(vars(options)))
+            self.__set_meta(TO_PROBE_TASKS_KEY, json.dumps(to_probe_tasks))
+            self.__set_meta(IS_CLOSED_KEY, json.dumps(False))
+
+    def is_started(self) -> bool:
+        return self.__get_meta(FINGERPRINT_KEY) is not None
+
+    @property
+    def tasks(self) -> List[TASK]:
+        return [TASK(t) for t in json.loads(self.__get_meta(TASKS_KEY))]
+
+    @property
+    def tests_fingerprint(self) -> str:
+        return self.__get_meta(FINGERPRINT_KEY)
+
+    @property
+    def checker_options(self) -> TaskCheckerOptions:
+        return TaskCheckerOptions(**json.loads(self.__get_meta(CHECKER_OPTIONS_KEY)))
+
+    @property
+    def to_probe_tasks(self) -> bool:
+        return self.__get_meta(TO_PROBE_TASKS_KEY) == json.dumps(True)
+
+    @staticmethod
+    def __get_key(language: LANGUAGE, tasks: List[TASK], current_task: Optional[TASK], fragment: str,
+                  to_probe_tasks: bool) -> str:
+        return get_tests_results_key(language, fragment, tasks, current_task, True, to_probe_tasks)
+
+    # The results of the fragments, which are known in advance, for example, from the cache, can be put with the jobs
+    def put_jobs(self, language: LANGUAGE, current_task: Optional[TASK], fragments: List[str],
+                 fragment_to_test_results_dict: Optional[Dict[str, List[float]]] = None) -> None:
+        known_results = fragment_to_test_results_dict if fragment_to_test_results_dict is not None else {}
+        tasks, to_probe_tasks = self.tasks, self.to_probe_tasks
+        rows = []
+        for fragment in fragments:
+            results = known_results.get(fragment)
+            rows.append((self.__get_key(language, tasks, current_task, fragment, to_probe_tasks), language.value,
+                         current_task.value if current_task is not None else None, fragment,
+                         json.dumps(results) if results is not None else None))
+        with self.__transaction():
+            self._connection.executemany('INSERT OR IGNORE INTO jobs VALUES (?, ?, ?, ?, ?, NULL, NULL, 0, NULL)', rows)
+
+    def close_for_jobs(self) -> None:
+        with self.__transaction():
+            self.__set_meta(IS_CLOSED_KEY, json.dumps(True))
+
+    # Returns the language, the current task and the fragments of the leased jobs or None if there are no free jobs.
+    # All leased jobs have the same language and current task, so they can be checked together
+    def lease_jobs(self, worker: str, max_jobs: int) -> Optional[Tuple[LANGUAGE, Optional[TASK], List[str]]]:
+        now = time.time()
+        free_condition = 'results IS NULL AND error IS NULL AND (lease_expiration IS NULL OR lease_expiration < ?)'
+        with self.__transaction():
+            self._connection.execute(f'UPDATE jobs SET error = ?, lease_owner = NULL, lease_expiration = NULL '
+                                     f'WHERE {free_condition} AND attempts >= ?',
+                                     (f'The job is not finished after {self._max_job_attempts} attempts', now,
+                                      self._max_job_attempts))
+            row = self._connection.execute(f'SELECT language, current_task FROM jobs WHERE {free_condition} LIMIT 1',
+                                           (now,)).fetchone()
+            if row is None:
+                return None
+            language, current_task = row
+            rows = self._connection.execute(f'SELECT key, fragment FROM jobs WHERE {free_condition} '
+                                            f'AND language = ? AND current_task IS ? LIMIT ?',
+                                            (now, language, current_task, max_jobs)).fetchall()
+            self._connection.executemany('UPDATE jobs SET lease_owner = ?, lease_expiration = ?, '
+                                         'attempts = attempts + 1 WHERE key = ?',
+                                         [(worker, now + self._lease_time, key) for key, _ in rows])
+        log.info(f'Worker {worker} leases {len(rows)} jobs')
+        return LANGUAGE(language), TASK(current_task) if current_task is not None else None, \
+            [fragment for _, fragment in rows]
+
+    # The results are posted even if the lease is expired, since all workers get the same results
+    def finish_jobs(self, language: LANGUAGE, current_task: Optional[TASK],
+                    fragment_to_test_results_dict: Dict[str, List[float]]) -> None:
+        tasks, to_probe_tasks = self.tasks, self.to_probe_tasks
+        rows = [(json.dumps(results), self.__get_key(language, tasks, current_task, fragment, to_probe_tasks))
+                for fragment, results in fragment_to_test_results_dict.items()]
+        with self.__transaction():
+            self._connection.executemany('UPDATE jobs SET results = ?, lease_owner = NULL, lease_expiration = NULL '
+                                         'WHERE key = ?', rows)
+
+    # The leased jobs, which cannot be checked, are failed with the error, so they are not leased again
+    def fail_jobs(self, language: LANGUAGE, current_task: Optional[TASK], fragments: List[str], error: str) -> None:
+        tasks, to_probe_tasks = self.tasks, self.to_probe_tasks
+        rows = [(error, self.__get_key(language, tasks, current_task, fragment, to_probe_tasks))
+                for fragment in fragments]
+        with self.__transaction():
+            self._connection.executemany('UPDATE jobs SET error = ?, lease_owner = NULL, lease_expiration = NULL '
+                                         'WHERE key = ? AND results IS NULL', rows)
+
+    # Returns the values of the column for the fragments, which have them
+    def __get_values(self, column: str, language: LANGUAGE, current_task: Optional[TASK],
+                     fragments: List[str]) -> Dict[str, str]:
+        tasks, to_probe_tasks = self.tasks, self.to_probe_tasks
+        key_to_fragment_dict = {self.__get_key(language, tasks, current_task, f, to_probe_tasks): f for f in fragments}
+        keys = list(key_to_fragment_dict.keys())
+        fragment_to_value_dict = {}
+        for i in range(0, len(keys), MAX_QUERY_KEYS):
+            query_keys = keys[i:i + MAX_QUERY_KEYS]
+            rows = self._connection.execute(f'SELECT key, {column} FROM jobs WHERE {column} IS NOT NULL '
+                                            f'AND key IN ({", ".join("?" * len(query_keys))})', query_keys).fetchall()
+            fragment_to_value_dict.update({key_to_fragment_dict[k]: v for k, v in rows})
+        return fragment_to_value_dict
+
+    # Returns the results of all fragments or None if any of them is not finished yet
+    def get_results(self, language: LANGUAGE, current_task: Optional[TASK],
+                    fragments: List[str]) -> Optional[Dict[str, List[float]]]:
+        fragment_to_results_dict = self.__get_values('results', language, current_task, fragments)
+        if len(fragment_to_results_dict) < len(fragments):
+            return None
+        return {f: json.loads(results) for f, results in fragment_to_results_dict.items()}
+
+    # Returns the errors of the failed fragments
+    def get_errors(self, language: LANGUAGE, current_task: Optional[TASK], fragments: List[str]) -> Dict[str, str]:
+        return self.__get_values('error', language, current_task, fragments)
+
+    def get_unfinished_jobs_number(self) -> int:
+        row = self._connection.execute('SELECT COUNT(*) FROM jobs WHERE results IS NULL AND error IS NULL').fetchone()
+        return row[0]
+
+    def is_finished(self) -> bool:
+        return self.__get_meta(IS_CLOSED_KEY) == json.dumps(True) and self.get_unfinished_jobs_number() == 0
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> 'WorkQueue':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -197,6 +197,35 @@ class TASKS_TESTS(Enum):
     INPUT_FILE_NAME = 'in'
 
 
+class SANDBOX_CLEANUP_POLICY(Enum):
+    # Remove all files from the sandbox folder before each fragment, but keep the folder itself
+    CLEAR = 'clear'
+    # Remove the sandbox folder and create it again before each fragment
+    RECREATE = 'recreate'
+
+
+# The stages of checking fragments before running tests in the order of their application (see ITaskChecker)
+class FILTER_STAGE(Enum):
+    # A cheap syntax check in the same process
+    SYNTAX = 'syntax'
+    # A check by the external tools: compilers, mypy
+    CORRECTNESS = 'correctness'
+    LENGTH = 'length'
+    OUTPUT = 'output'
+
+
+# The kinds of the synthetic fragments of the scoring benchmark (see scoring_benchmark.py)
+class BENCHMARK_FRAGMENT_KIND(Enum):
+    # Compiles and prints something, so tests are run on it
+    CORRECT = 'correct'
+    # Has a syntax or a type error
+    INCORRECT = 'incorrect'
+    # Compiles, but it's shorter than the min symbols number of the language
+    TOO_SHORT = 'too_short'
+    # Compiles, but never finishes
+    TIMEOUT = 'timeout'
+
+
 class LANGUAGE(Enum):
     JAVA = 'java'
     PYTHON = 'python'
@@ -294,6 +323,8 @@ PREPROCESSING_DIRECTORY = 'preprocessing_result'
 # Todo: use zip
 GUMTREE_PATH = os.path.join(RESOURCES_PATH, 'gumtree/bin/gumtree')
 
+JVM_HARNESS_PATH = os.path.join(RESOURCES_PATH, 'jvm_harness')
+
 # v 2.0 - with stopping after the first break
 # v 3.0 - with java package detecting
 RUNNING_TESTS_OUTPUT_DIRECTORY = 'running_tests_result_3'
@@ -302,5 +333,11 @@ MAX_DIFF_SYMBOLS = 30
 
 TIMEOUT = 5
 
+# Memory limit in bytes for the fragments running in the forked processes and in the processes with limited resources
+MEMORY_LIMIT = 512 * 1024 * 1024
+
+# Output limit in bytes for the fragments running, the expected outputs are much smaller
+OUTPUT_LIMIT = 16 * 1024 * 1024
+
 TRUE_VALUES_SET = {'true', 't', '1', 'yes', 'y'}
 FALSE_VALUES_SET = {'false', 'f', '0', 'no', 'n'}
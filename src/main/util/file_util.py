@@ -172,6 +172,22 @@ def remove_directory(directory: str) -> None:
         shutil.rmtree(directory, ignore_errors=True)
 
 
+# To remove all files and subdirs from the directory, but keep the directory itself
+def clear_directory(directory: str, excluded_names: Optional[List[str]] = None) -> None:
+    if not os.path.exists(directory):
+        create_directory(directory)
+        return
+    excluded_names = [] if excluded_names is None else excluded_names
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name in excluded_names:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+
+
 # To get something like 'ati_239/Main_2323434_343434.csv'
 def get_file_and_parent_folder_names(file: str) -> str:
     return os.path.join(get_parent_folder_name(file), get_name_from_path(file))
@@ -1,10 +1,15 @@
 # Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
 
 import re
-from datetime import datetime
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+import pandas as pd
 
 from src.main.util import consts
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
 
 # Delete ':' symbol from hours in timestamp for the correct conversion to datetime
 # For example, 2019-12-09T18:41:28.548+03:00 -> 2019-12-09T18:41:28.548+0300
@@ -16,6 +21,29 @@ def get_datetime_by_format(date: str, datetime_format: str = consts.DATE_TIME_FO
     return datetime.strptime(corrected_time(date), datetime_format)
 
 
+# Dates without a time zone are considered to be in UTC, as pandas does
+def __get_nanoseconds(date: datetime) -> int:
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return (date - EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def get_timestamps_by_format(dates: pd.Series, datetime_format: str = consts.DATE_TIME_FORMAT) -> np.ndarray:
+    """
+    Get the dates as int64 nanoseconds since the epoch. The time zone offsets of the dates are taken into account,
+    so the dates with different offsets can be compared.
+    All dates are parsed by pandas at once. If pandas cannot parse some of them or some of them are missing, the dates
+    are parsed one by one by get_datetime_by_format, so the same errors are raised.
+    """
+    try:
+        timestamps = pd.to_datetime(dates, format=datetime_format, utc=True)
+        if not timestamps.isna().any():
+            return timestamps.dt.tz_localize(None).to_numpy().view(np.int64)
+    except ValueError:
+        pass
+    return np.array([__get_nanoseconds(get_datetime_by_format(d, datetime_format)) for d in dates], dtype=np.int64)
+
+
 class TimeoutException(Exception):
     pass
 
@@ -0,0 +1,36 @@
+// Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import java.io.OutputStream;
+import java.io.PrintStream;
+import javax.tools.JavaCompiler;
+import javax.tools.ToolProvider;
+
+/**
+ * Compiles many source files in one JVM by the system Java compiler, each of them into its own output folder.
+ * It's called by the EXEC request of the TestsHarness, the args are pairs: an output folder and a source file.
+ * For each pair one line with the javac exit code is written to the output, so 0 means the source file is correct.
+ */
+public class BatchJavac {
+    private static final PrintStream nullStream = new PrintStream(new OutputStream() {
+        @Override
+        public void write(int b) {
+        }
+    });
+
+    public int exec(PrintStream out, String[] args) {
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        if (compiler == null) {
+            return 2;
+        }
+        for (int i = 0; i + 1 < args.length; i += 2) {
+            int exitCode;
+            try {
+                exitCode = compiler.run(null, nullStream, nullStream, args[i + 1], "-d", args[i]);
+            } catch (RuntimeException e) {
+                exitCode = 4;
+            }
+            out.println(exitCode);
+        }
+        return 0;
+    }
+}
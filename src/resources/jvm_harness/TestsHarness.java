@@ -0,0 +1,207 @@
+// Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import java.io.*;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.util.Base64;
+import java.util.HashMap;
+import java.util.Map;
+import java.util.jar.JarFile;
+import java.util.jar.Manifest;
+
+/**
+ * Runs main methods of compiled programs many times in one JVM, so the JVM startup is paid only once.
+ * <p>
+ * Each request is one line: RUN classpath main_class input, all arguments are base64-encoded. The classpath entries
+ * are separated by File.pathSeparator, the main class can be empty to take it from the manifest of the first jar.
+ * Each program is loaded in a new class loader, so its static state is not shared between the runs.
+ * <p>
+ * Each response is one line: DONE exit_code output, the output is base64-encoded. The exit code is 1 if the main
+ * method has thrown an exception. If the program calls System.exit, the response is EXIT output and the harness
+ * terminates, the exit code of the program is the exit code of the harness process.
+ * <p>
+ * A request can also be: EXEC classpath class_name args, the args are separated by the zero symbol. It creates
+ * an instance of the class and calls its method exec(PrintStream, String[]), for example, to run a compiler without
+ * starting a new JVM. The class loader is kept for the next requests with the same classpath, so the loaded classes
+ * stay warm. The response is DONE exit_code output, where the output is written to the PrintStream and
+ * the exit code is the result of exec: an integer or an object with the method getCode, for example,
+ * ExitCode of the Kotlin compiler.
+ * <p>
+ * The output of a request is limited by the number of bytes given as the first argument of the harness. Once the limit
+ * is reached, the writing throws OutputLimitError, so the program is stopped, and the response is LIMIT. If the program
+ * calls System.exit after that, the response is LIMIT_EXIT instead of EXIT.
+ */
+public class TestsHarness {
+    private static final PrintStream protocolOut = new PrintStream(new FileOutputStream(FileDescriptor.out), true);
+    private static final PrintStream nullStream = new PrintStream(new OutputStream() {
+        @Override
+        public void write(int b) {
+        }
+    });
+
+    private static final Map<String, URLClassLoader> execLoaders = new HashMap<>();
+
+    private static long outputLimit = Long.MAX_VALUE;
+
+    // Is not null only while a program is running
+    private static volatile LimitedOutputStream currentOutput = null;
+
+    /**
+     * Is thrown by the writing of the output over the limit. It's an Error, so the programs don't catch it as usual
+     * exceptions, and PrintStream doesn't swallow it as IOException.
+     */
+    private static class OutputLimitError extends Error {
+    }
+
+    /**
+     * Keeps the output until the limit is reached, the bytes over the limit are not kept.
+     */
+    private static class LimitedOutputStream extends ByteArrayOutputStream {
+        private volatile boolean isExceeded = false;
+
+        boolean isExceeded() {
+            return isExceeded;
+        }
+
+        @Override
+        public synchronized void write(int b) {
+            write(new byte[]{(byte) b}, 0, 1);
+        }
+
+        @Override
+        public synchronized void write(byte[] b, int off, int len) {
+            if (isExceeded || (long) count + len > outputLimit) {
+                isExceeded = true;
+                throw new OutputLimitError();
+            }
+            super.write(b, off, len);
+        }
+    }
+
+    public static void main(String[] args) throws IOException {
+        if (args.length > 0) {
+            outputLimit = Long.parseLong(args[0]);
+        }
+        Runtime.getRuntime().addShutdownHook(new Thread(TestsHarness::reportExit));
+        BufferedReader requests = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.US_ASCII));
+        String request;
+        while ((request = requests.readLine()) != null) {
+            String[] parts = request.split(" ", -1);
+            int exitCode;
+            if (parts.length == 4 && parts[0].equals("RUN")) {
+                byte[] input = Base64.getDecoder().decode(parts[3]);
+                exitCode = run(decodeString(parts[1]).split(File.pathSeparator), decodeString(parts[2]), input);
+            } else if (parts.length == 4 && parts[0].equals("EXEC")) {
+                exitCode = exec(decodeString(parts[1]), decodeString(parts[2]), decodeString(parts[3]).split("\0"));
+            } else {
+                protocolOut.println("ERROR");
+                continue;
+            }
+            LimitedOutputStream output = currentOutput;
+            currentOutput = null;
+            if (output.isExceeded()) {
+                protocolOut.println("LIMIT");
+            } else {
+                String encodedOutput = Base64.getEncoder().encodeToString(output.toByteArray());
+                protocolOut.println("DONE " + exitCode + " " + encodedOutput);
+            }
+        }
+    }
+
+    private static String decodeString(String value) {
+        return new String(Base64.getDecoder().decode(value), StandardCharsets.UTF_8);
+    }
+
+    private static void reportExit() {
+        LimitedOutputStream output = currentOutput;
+        if (output != null) {
+            flush(System.out);
+            if (output.isExceeded()) {
+                protocolOut.println("LIMIT_EXIT");
+            } else {
+                protocolOut.println("EXIT " + Base64.getEncoder().encodeToString(output.toByteArray()));
+            }
+        }
+    }
+
+    private static URL[] toUrls(String[] classpath) throws IOException {
+        URL[] urls = new URL[classpath.length];
+        for (int i = 0; i < classpath.length; i++) {
+            urls[i] = new File(classpath[i]).toURI().toURL();
+        }
+        return urls;
+    }
+
+    private static String getMainClassFromJar(String jar) throws IOException {
+        try (JarFile jarFile = new JarFile(jar)) {
+            Manifest manifest = jarFile.getManifest();
+            return manifest == null ? null : manifest.getMainAttributes().getValue("Main-Class");
+        }
+    }
+
+    private static int run(String[] classpath, String mainClass, byte[] input) {
+        currentOutput = new LimitedOutputStream();
+        PrintStream out = new PrintStream(currentOutput, true);
+        System.setIn(new ByteArrayInputStream(input));
+        System.setOut(out);
+        System.setErr(nullStream);
+        try {
+            if (mainClass.isEmpty()) {
+                mainClass = getMainClassFromJar(classpath[0]);
+            }
+            URL[] urls = toUrls(classpath);
+            try (URLClassLoader loader = new URLClassLoader(urls, TestsHarness.class.getClassLoader().getParent())) {
+                Method main = Class.forName(mainClass, true, loader).getMethod("main", String[].class);
+                main.invoke(null, (Object) new String[0]);
+            }
+            return 0;
+        } catch (ReflectiveOperationException | IOException | RuntimeException | LinkageError | OutputLimitError e) {
+            return 1;
+        } finally {
+            flush(out);
+        }
+    }
+
+    // The output, which is flushed over the limit, is not kept anyway
+    private static void flush(PrintStream out) {
+        try {
+            out.flush();
+        } catch (OutputLimitError e) {
+            // The response is LIMIT, since the output is exceeded
+        }
+    }
+
+    private static int exec(String classpath, String className, String[] args) {
+        currentOutput = new LimitedOutputStream();
+        PrintStream out = new PrintStream(currentOutput, true);
+        System.setIn(new ByteArrayInputStream(new byte[0]));
+        System.setOut(out);
+        System.setErr(out);
+        try {
+            URLClassLoader loader = execLoaders.get(classpath);
+            if (loader == null) {
+                URL[] urls = toUrls(classpath.split(File.pathSeparator));
+                loader = new URLClassLoader(urls, TestsHarness.class.getClassLoader().getParent());
+                execLoaders.put(classpath, loader);
+            }
+            Object instance = Class.forName(className, true, loader).getConstructor().newInstance();
+            Method exec = instance.getClass().getMethod("exec", PrintStream.class, String[].class);
+            Object result = exec.invoke(instance, out, args);
+            if (result instanceof Integer) {
+                return (Integer) result;
+            }
+            return (Integer) result.getClass().getMethod("getCode").invoke(result);
+        } catch (ReflectiveOperationException | IOException | RuntimeException | LinkageError | OutputLimitError e) {
+            try {
+                e.printStackTrace(out);
+            } catch (OutputLimitError limitError) {
+                // The response is LIMIT, since the output is exceeded
+            }
+            return 1;
+        } finally {
+            flush(out);
+        }
+    }
+}
@@ -1,8 +1,21 @@
 # Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
 
+import os
+
+import pytest
+
+from src.main.task_scoring import task_checker
 from src.main.util.log_util import configure_logger
 
 
 # Set file for logger before all tests
 def pytest_configure(config):
     configure_logger(in_test_mode=True)
+
+
+# Task checkers without a sandbox write the fragments into the temporary folder of the test instead of SOURCE_FOLDER
+@pytest.fixture(autouse=True)
+def source_folder(tmp_path, monkeypatch) -> str:
+    folder = os.path.join(tmp_path, task_checker.SOURCE_OBJECT_NAME)
+    monkeypatch.setattr(task_checker, 'SOURCE_FOLDER', folder)
+    return folder
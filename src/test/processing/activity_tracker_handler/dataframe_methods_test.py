@@ -79,6 +79,19 @@ def get_data_for_filter_test() -> Tuple[pd.DataFrame, pd.DataFrame]:
     return ati_df, ati_df_right
 
 
+# The same as the unification and then the filtering, which are tested on the files above
+def get_data_for_preprocessing_test() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    folder = 'preparing'
+    ati_df = pd.read_csv(os.path.join(ath_test_folder, folder, 'ide-events_1.csv'), encoding=consts.ISO_ENCODING,
+                         names=consts.ACTIVITY_TRACKER_COLUMN.activity_tracker_columns())
+    ati_df = ath.preprocess_activity_tracker_data(ati_df)
+
+    ati_df_right = pd.read_csv(os.path.join(ath_test_folder, folder, 'ide-events_1_filter_res.csv'),
+                               encoding=consts.ISO_ENCODING,
+                               names=consts.ACTIVITY_TRACKER_COLUMN.activity_tracker_columns())
+    return ati_df, ati_df_right
+
+
 def __replace_nan_in_ati_columns(merged_data: pd.DataFrame) -> pd.DataFrame:
     activity_tracker_columns = [consts.ACTIVITY_TRACKER_COLUMN.TIMESTAMP_ATI.value,
                                 consts.ACTIVITY_TRACKER_COLUMN.EVENT_TYPE.value,
@@ -133,6 +146,67 @@ def get_data_for_merging_test_3() -> Tuple[pd.DataFrame, pd.DataFrame]:
     return ct_df, ct_df_right
 
 
+def __get_timestamp(seconds: int) -> str:
+    return f'2020-01-01T10:00:{seconds:02d}.000+03:00'
+
+
+def __get_data_for_merging() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    ct_df = pd.DataFrame({consts.TASK_TRACKER_COLUMN.FILE_NAME.value: ['task.py'] * 4,
+                          consts.TASK_TRACKER_COLUMN.DATE.value: [__get_timestamp(s) for s in [10, 20, 30, 40]],
+                          'Number': [0, 1, 2, 3]})
+    events = [(5, '/project/task.py', 'Run'), (12, '/project/task.py', 'Paste'), (35, '/project/other.py', 'Run'),
+              (31, '/project/task.py', 'Run'), (32, '/project/task.py', 'Debug'), (33, None, 'Run')]
+    ati_df = pd.DataFrame({column: [None] * len(events)
+                           for column in consts.ACTIVITY_TRACKER_COLUMN.activity_tracker_columns()})
+    ati_df[consts.ACTIVITY_TRACKER_COLUMN.TIMESTAMP_ATI.value] = [__get_timestamp(s) for s, _, _ in events]
+    ati_df[consts.ACTIVITY_TRACKER_COLUMN.CURRENT_FILE.value] = [f for _, f, _ in events]
+    ati_df[consts.ACTIVITY_TRACKER_COLUMN.EVENT_TYPE.value] = consts.ACTIVITY_TRACKER_EVENTS.ACTION.value
+    ati_df[consts.ACTIVITY_TRACKER_COLUMN.EVENT_DATA.value] = [d for _, _, d in events]
+    return ct_df, ati_df
+
+
+# The events before the second row belong to the first one, the rows with several events are repeated,
+# the rows without events get empty values
+def get_data_for_merging_with_repeated_rows_test() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    ct_df, ati_df = __get_data_for_merging()
+
+    ct_df_right = ct_df.iloc[[0, 0, 1, 2, 2, 3]].reset_index(drop=True)
+    ct_df_right[consts.ACTIVITY_TRACKER_COLUMN.TIMESTAMP_ATI.value] = \
+        [__get_timestamp(s) for s in [5, 12]] + [''] + [__get_timestamp(s) for s in [31, 32]] + ['']
+    action = consts.ACTIVITY_TRACKER_EVENTS.ACTION.value
+    ct_df_right[consts.ACTIVITY_TRACKER_COLUMN.EVENT_TYPE.value] = [action, action, '', action, action, '']
+    ct_df_right[consts.ACTIVITY_TRACKER_COLUMN.EVENT_DATA.value] = ['Run', 'Paste', '', 'Run', 'Debug', '']
+
+    return ath.merge_task_tracker_and_activity_tracker_data(ct_df, ati_df), ct_df_right
+
+
+# Only the timestamps of the events of the code tracker file are parsed, so the malformed or missing timestamps of
+# the events of other files don't matter
+def get_data_for_merging_with_malformed_timestamps_of_other_files_test() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    ct_df, ati_df = __get_data_for_merging()
+    ct_df_right = ath.merge_task_tracker_and_activity_tracker_data(ct_df.copy(), ati_df.copy())
+    ati_df.loc[ati_df[consts.ACTIVITY_TRACKER_COLUMN.CURRENT_FILE.value] != '/project/task.py',
+               consts.ACTIVITY_TRACKER_COLUMN.TIMESTAMP_ATI.value] = ['not a date', None]
+    return ath.merge_task_tracker_and_activity_tracker_data(ct_df, ati_df), ct_df_right
+
+
+# The index of the activity tracker data is built once and shared by the code tracker files, the merged data is the
+# same as without it
+def get_data_for_merging_with_shared_index_test() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    ati_folder = 'ati_1'
+    ati_df = pd.read_csv(os.path.join(ath_test_folder, ati_folder, 'ide-events_1.csv'), encoding=consts.ISO_ENCODING,
+                         names=consts.ACTIVITY_TRACKER_COLUMN.activity_tracker_columns())
+    ati_df = ath.preprocess_activity_tracker_data(ati_df)
+    ati_index = ath.ActivityTrackerIndex(ati_df)
+
+    ct_dfs = [pd.read_csv(os.path.join(ath_test_folder, ati_folder, f), encoding=consts.ISO_ENCODING)
+              for f in ['task_1.csv', 'task_2.csv']]
+    merged_dfs = [ath.merge_task_tracker_and_activity_tracker_data(ct_df.copy(), ati_df, ati_index) for ct_df in ct_dfs]
+    merged_dfs_right = [ath.merge_task_tracker_and_activity_tracker_data(ct_df, ati_df) for ct_df in ct_dfs]
+
+    return pd.concat(merged_dfs, ignore_index=True), pd.concat(merged_dfs_right, ignore_index=True)
+
+
 def is_equals(df_1: pd.DataFrame, df_2: pd.DataFrame) -> bool:
     return df_1.equals(df_2)
 
@@ -149,9 +223,13 @@ class TestDataFrameMethods:
                         get_data_for_insert_at_the_end_test,
                         get_data_for_unification_test,
                         get_data_for_filter_test,
+                        get_data_for_preprocessing_test,
                         get_data_for_merging_test_1,
                         get_data_for_merging_test_2,
-                        get_data_for_merging_test_3
+                        get_data_for_merging_test_3,
+                        get_data_for_merging_with_repeated_rows_test,
+                        get_data_for_merging_with_malformed_timestamps_of_other_files_test,
+                        get_data_for_merging_with_shared_index_test
                     ])
     def param_data_frame_methods_test(request) -> Callable:
         return request.param
@@ -0,0 +1,100 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import shutil
+from typing import Dict, Type
+
+import pytest
+import pandas as pd
+
+from src.main.util import consts
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.processing import merging_tt_with_ati as mta
+from src.main.processing.merging_tt_with_ati import merge_tt_with_ati
+from src.main.util.file_util import create_directory
+
+USERS = 3
+TASKS = ['pies', 'zero']
+BROKEN_FOLDER = os.path.join('user_0', 'task_broken')
+
+
+def get_timestamp(seconds: int) -> str:
+    return f'2020-01-01T10:{seconds // 60:02d}:{seconds % 60:02d}.000+03:00'
+
+
+def create_task_folder(task_folder: str, task: str, user: int) -> None:
+    create_directory(task_folder)
+    tt_df = pd.DataFrame({consts.TASK_TRACKER_COLUMN.DATE.value: [get_timestamp(s) for s in range(0, 300, 30)],
+                          consts.TASK_TRACKER_COLUMN.FILE_NAME.value: f'{task}_{user}_1_2_3.py',
+                          consts.TASK_TRACKER_COLUMN.FRAGMENT.value: [f'x = {i}' for i in range(10)],
+                          consts.TASK_TRACKER_COLUMN.CHOSEN_TASK.value: task})
+    tt_df.to_csv(os.path.join(task_folder, f'{task}_{user}_1_2_3.csv'), index=False)
+    ati_df = pd.DataFrame({column: '' for column in consts.ACTIVITY_TRACKER_COLUMN.activity_tracker_columns()},
+                          index=range(20))
+    ati_df[consts.ACTIVITY_TRACKER_COLUMN.TIMESTAMP_ATI.value] = [get_timestamp(s) for s in range(5, 300, 15)]
+    ati_df[consts.ACTIVITY_TRACKER_COLUMN.EVENT_TYPE.value] = consts.ACTIVITY_TRACKER_EVENTS.ACTION.value
+    ati_df[consts.ACTIVITY_TRACKER_COLUMN.EVENT_DATA.value] = 'Run'
+    ati_df[consts.ACTIVITY_TRACKER_COLUMN.CURRENT_FILE.value] = [f'{task}.py', 'other.py'] * 10
+    ati_df.to_csv(os.path.join(task_folder, f'{consts.ACTIVITY_TRACKER_FILE_NAME}_{user}.csv'), index=False,
+                  header=False)
+
+
+def create_data(path: str) -> None:
+    for user in range(USERS):
+        for task in TASKS:
+            create_task_folder(os.path.join(path, f'user_{user}', f'task_{task}'), task, user)
+
+
+# The task-tracker file of the folder has no columns except the task, so the folder cannot be handled
+def create_broken_folder(path: str) -> str:
+    broken_folder = os.path.join(path, BROKEN_FOLDER)
+    create_directory(broken_folder)
+    pd.DataFrame({consts.TASK_TRACKER_COLUMN.CHOSEN_TASK.value: ['pies']}).to_csv(
+        os.path.join(broken_folder, 'pies_0_1_2_3.csv'), index=False)
+    return broken_folder
+
+
+def read_results(output_directory: str) -> Dict[str, bytes]:
+    results = {}
+    for root, _, files in os.walk(output_directory):
+        for file in files:
+            with open(os.path.join(root, file), 'rb') as f:
+                results[os.path.relpath(os.path.join(root, file), output_directory)] = f.read()
+    return results
+
+
+def merge_in_parallel(path: str, output_directory: str) -> Dict[str, str]:
+    return mta.__merge_task_folders_in_parallel(path, output_directory, mta.__get_task_folders(path), 2)
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.PROCESSING), reason=TEST_LEVEL.PROCESSING.value)
+class TestParallelMerging:
+
+    def test_same_results(self, tmp_path) -> None:
+        sequential_path, parallel_path = os.path.join(tmp_path, 'sequential', 'data'), \
+            os.path.join(tmp_path, 'parallel', 'data')
+        create_data(sequential_path)
+        shutil.copytree(sequential_path, parallel_path)
+        sequential_results = read_results(merge_tt_with_ati(sequential_path))
+        parallel_results = read_results(merge_tt_with_ati(parallel_path, workers=2))
+        assert len(sequential_results) == USERS * len(TASKS)
+        assert parallel_results == sequential_results
+
+    # The folder, which cannot be handled, doesn't stop handling of other folders
+    def test_collected_errors(self, tmp_path) -> None:
+        path = os.path.join(tmp_path, 'data')
+        create_data(path)
+        broken_folder = create_broken_folder(path)
+        output_directory = os.path.join(tmp_path, 'result')
+        task_folder_to_error = merge_in_parallel(path, output_directory)
+        assert list(task_folder_to_error.keys()) == [broken_folder]
+        assert len(read_results(output_directory)) == USERS * len(TASKS)
+
+    # As the sequential merging, the parallel one fails if some folders cannot be handled, but only at the end
+    @pytest.mark.parametrize('workers, error', [(1, KeyError), (2, ValueError)])
+    def test_failed_merging(self, tmp_path, workers: int, error: Type[Exception]) -> None:
+        path = os.path.join(tmp_path, 'data')
+        create_data(path)
+        create_broken_folder(path)
+        with pytest.raises(error):
+            merge_tt_with_ati(path, workers=workers)
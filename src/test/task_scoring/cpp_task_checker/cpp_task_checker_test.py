@@ -0,0 +1,77 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import shutil
+from typing import List
+
+import pytest
+
+from src.main.util.consts import LANGUAGE, TASK
+from src.main.task_scoring.sandbox import Sandbox
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.cpp_task_checker import CppTaskChecker
+from src.main.task_scoring.tasks_tests_handler import create_in_and_out_dict
+from src.test.task_scoring.tasks_tests_handler.util import get_source_code, SOLUTION
+
+TASKS = [TASK.PIES, TASK.ZERO]
+
+# Fragments, which are too small or don't have any output, so tests are not run on them. The third one has
+# a compilation error and the last one has a linker error, since it doesn't have the main function
+FILTERED_FRAGMENTS = ['int main() {}',
+                      '#include <iostream>\nint main() { int a; std::cin >> a; return a; }',
+                      '#include <iostream>\nint main() { int a; std::cin >> a; return undefined_variable; }',
+                      '#include <iostream>\nint not_main() { int a; std::cin >> a; return a; }']
+
+
+def get_fragments() -> List[str]:
+    return [get_source_code(t, LANGUAGE.CPP, s.value) for t in TASKS for s in SOLUTION] + FILTERED_FRAGMENTS
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+@pytest.mark.skipif(shutil.which('g++') is None, reason='C++ compiler is not installed')
+class TestCppTaskChecker:
+
+    @staticmethod
+    def __check_fragments(checker: CppTaskChecker) -> List[List[float]]:
+        in_and_out_files_dict = create_in_and_out_dict(TASKS)
+        return [checker.check_tasks(TASKS, f, in_and_out_files_dict) for f in get_fragments()]
+
+    # Each checker uses its own compilation cache not to get the results of the other ones
+    @staticmethod
+    def __create_checker(folder: str, to_use_pch: bool = False, to_check_syntax_first: bool = False) -> CppTaskChecker:
+        return CppTaskChecker(Sandbox(os.path.join(folder, 'sandbox')), to_use_pch, to_check_syntax_first,
+                              os.path.join(folder, 'cache'))
+
+    def test_precompiled_headers(self, tmp_path) -> None:
+        expected_results = self.__check_fragments(self.__create_checker(os.path.join(tmp_path, 'default')))
+        checker = self.__create_checker(os.path.join(tmp_path, 'pch'), to_use_pch=True)
+        assert self.__check_fragments(checker) == expected_results
+
+    def test_compilation_cache(self, tmp_path) -> None:
+        cache_folder = os.path.join(tmp_path, 'cache')
+        checker = CppTaskChecker(Sandbox(os.path.join(tmp_path, 'sandbox')), compilation_cache_folder=cache_folder)
+        results = self.__check_fragments(checker)
+        cached_files = set(os.listdir(cache_folder))
+        assert len(cached_files) == len(set(get_fragments()))
+        # The second checking uses only the cached binaries and compilation errors
+        checker = CppTaskChecker(Sandbox(os.path.join(tmp_path, 'other_sandbox')),
+                                 compilation_cache_folder=cache_folder)
+        assert self.__check_fragments(checker) == results
+        assert set(os.listdir(cache_folder)) == cached_files
+
+    # The compilation cache isn't evicted, so it's used only if its folder is set
+    def test_no_compilation_cache_by_default(self, tmp_path) -> None:
+        expected_results = self.__check_fragments(self.__create_checker(os.path.join(tmp_path, 'cached')))
+        checker = CppTaskChecker(Sandbox(os.path.join(tmp_path, 'sandbox')))
+        assert checker._compilation_cache is None
+        assert self.__check_fragments(checker) == expected_results
+
+    def test_syntax_first(self, tmp_path) -> None:
+        expected_results = self.__check_fragments(self.__create_checker(os.path.join(tmp_path, 'default')))
+        checker = self.__create_checker(os.path.join(tmp_path, 'syntax'), to_check_syntax_first=True)
+        results = self.__check_fragments(checker)
+        # Only the linker error in the fragment without the main function is not found by the syntax checking
+        linker_error_index = len(get_fragments()) - 1
+        assert expected_results[linker_error_index] != results[linker_error_index]
+        del expected_results[linker_error_index], results[linker_error_index]
+        assert results == expected_results
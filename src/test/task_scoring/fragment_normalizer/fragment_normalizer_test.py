@@ -0,0 +1,70 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+from typing import List
+
+import pytest
+
+from src.main.util.consts import LANGUAGE, TASK
+from src.main.task_scoring.sandbox import Sandbox
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.java_task_checker import JavaTaskChecker
+from src.main.task_scoring.fragment_normalizer import FragmentNormalizer
+from src.main.task_scoring.python_task_checker import PythonTaskChecker
+from src.test.task_scoring.tasks_tests_handler.util import get_source_code, SOLUTION
+from src.main.task_scoring.tasks_tests_handler import check_fragments, create_in_and_out_dict
+
+TASKS = [TASK.PIES, TASK.ZERO]
+
+CODE = 'a = int(input())\nif a > 0:\n    print(a)\n'
+SAME_CODE = ['a=int( input() )  # read a\n\nif a>0:\n\tprint(a)',
+             '# The first line\na = int(\n    input()\n)\nif a > 0:  \n        print(a)  # print a\n\n']
+OTHER_CODE = ['a = int(input())\nif a > 0:\n    print(a )\nprint(a)',
+              'a = int(input())\nif a > 0:\n    print("a")',
+              'a = int(input())\nif a > 0:\n    pass\nprint(a)',
+              # Type comments are checked by mypy
+              'a = int(input())  # type: str\nif a > 0:\n    print(a)',
+              # Only the comment makes the fragment long enough to be run on tests
+              'print(input())  # print the input']
+# Inconsistent use of tabs and spaces is found by the parser, but not by the tokenizer
+INCORRECT_CODE = ['if True:\n        a = 1\n\tprint(a)', 'if True:\n        a = 1\n        print(a)']
+
+JAVA_CODE = 'class A { public static void main(String[] args) { System.out.print(1); } }'
+SAME_JAVA_CODE = ['class A {\n  // The main method\n  public static void main(String[] args) {\n'
+                  '    System.out.print( 1 ); /* print 1 */\n  }\n}\n']
+OTHER_JAVA_CODE = ['class A { public static void main(String[] args) { System.out.print("1"); } }',
+                   'class A { public static void main(String[] args) { // \\u000a System.out.print(1);\n } }']
+
+
+def get_keys(fragments: List[str], task_checker) -> List[str]:
+    return [FragmentNormalizer.get_key(f, task_checker) for f in fragments]
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestFragmentNormalizer:
+
+    def test_python_keys(self, tmp_path) -> None:
+        task_checker = PythonTaskChecker(Sandbox(str(tmp_path)))
+        key = FragmentNormalizer.get_key(CODE, task_checker)
+        assert key != CODE
+        assert all(k == key for k in get_keys(SAME_CODE, task_checker))
+        assert len(set(get_keys([CODE] + OTHER_CODE, task_checker))) == len(OTHER_CODE) + 1
+        assert get_keys(INCORRECT_CODE, task_checker)[0] == INCORRECT_CODE[0]
+
+    def test_java_keys(self, tmp_path) -> None:
+        task_checker = JavaTaskChecker(Sandbox(str(tmp_path)))
+        key = FragmentNormalizer.get_key(JAVA_CODE, task_checker)
+        assert all(k == key for k in get_keys(SAME_JAVA_CODE, task_checker))
+        assert all(k != key for k in get_keys(OTHER_JAVA_CODE, task_checker))
+        assert get_keys(OTHER_JAVA_CODE, task_checker)[1] == OTHER_JAVA_CODE[1]
+
+    def test_same_results(self) -> None:
+        in_and_out_files_dict = create_in_and_out_dict(TASKS)
+        full_solution = get_source_code(TASK.PIES, LANGUAGE.PYTHON, SOLUTION.FULL.value)
+        fragments = [full_solution, f'# The full solution\n{full_solution}\n\n', CODE] + SAME_CODE + OTHER_CODE
+        expected_results = check_fragments(TASKS, fragments, in_and_out_files_dict, LANGUAGE.PYTHON)
+        normalizer = FragmentNormalizer()
+        results = check_fragments(TASKS, fragments, in_and_out_files_dict, LANGUAGE.PYTHON, normalizer=normalizer)
+        assert results == expected_results
+        assert normalizer.avoided_checks == 3
+        # All tests of the full solution are run
+        assert normalizer.avoided_tests_runs >= len(in_and_out_files_dict[TASK.PIES])
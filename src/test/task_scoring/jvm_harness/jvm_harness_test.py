@@ -0,0 +1,64 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import shutil
+from typing import Optional
+
+import pytest
+
+from src.main.util.file_util import create_file
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.jvm_harness import JvmHarness
+from src.main.task_scoring.task_checker import check_call_safely
+
+INPUT = '5\n'
+
+# Each program prints the doubled input, the expected output is None if the running should fail
+programs_and_expected_outputs = [
+    ('System.out.println(new Scanner(System.in).nextInt() * 2);', '10\n'),
+    ('System.out.print(new Scanner(System.in).nextInt() * 2);\nSystem.exit(0);', '10'),
+    ('System.out.print(new Scanner(System.in).nextInt() * 2);\nSystem.exit(1);', None),
+    ('System.out.print(new Scanner(System.in).nextInt() * 2);\nthrow new RuntimeException();', None),
+    ('counter++;\nSystem.out.print(counter * 10);', '10'),
+    ('while (true) {}', None)
+]
+
+
+def create_program(folder: str, body: str) -> None:
+    source = f'import java.util.Scanner;\n' \
+             f'public class Main {{\n' \
+             f'static int counter = 0;\n' \
+             f'public static void main(String[] args) {{\n{body}\n}}\n}}'
+    source_file = os.path.join(folder, 'Main.java')
+    create_file(source, source_file)
+    assert check_call_safely(['javac', '-d', folder, source_file], None)
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+@pytest.mark.skipif(shutil.which('javac') is None, reason='JDK is not installed')
+class TestJvmHarness:
+
+    def test_programs(self, tmp_path) -> None:
+        with JvmHarness() as harness:
+            for i, (body, expected_output) in enumerate(programs_and_expected_outputs):
+                folder = os.path.join(tmp_path, str(i))
+                create_program(folder, body)
+                # Each program is run twice to check the harness is restarted and the static state is not shared
+                for _ in range(2):
+                    actual_output: Optional[str] = harness.run([folder], 'Main', INPUT, timeout=2)
+                    assert actual_output == expected_output, body
+
+    # The program is stopped once its output is more than the limit, and the harness runs the next programs
+    def test_output_limit(self, tmp_path) -> None:
+        programs_and_expected_outputs = [
+            ('while (true) { System.out.println("a"); }', None),
+            ('while (true) { try { System.out.print("a"); } catch (Throwable e) {} }', None),
+            ('System.out.print("a".repeat(2000));\nSystem.exit(0);', None),
+            ('System.out.print("a".repeat(1000));', 'a' * 1000),
+            ('System.out.print(new Scanner(System.in).nextInt() * 2);', '10')
+        ]
+        with JvmHarness(output_limit=1000) as harness:
+            for i, (body, expected_output) in enumerate(programs_and_expected_outputs):
+                folder = os.path.join(tmp_path, str(i))
+                create_program(folder, body)
+                assert harness.run([folder], 'Main', INPUT, timeout=2) == expected_output, body
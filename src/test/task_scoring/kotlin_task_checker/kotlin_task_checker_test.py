@@ -0,0 +1,52 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import shutil
+import zipfile
+
+import pytest
+
+from src.main.util.consts import LANGUAGE, TASK
+from src.main.task_scoring.sandbox import Sandbox
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.tasks_tests_handler import create_in_and_out_dict
+from src.test.task_scoring.tasks_tests_handler.util import get_source_code, SOLUTION
+from src.main.task_scoring.kotlin_task_checker import get_main_class_from_jar, KotlinTaskChecker
+
+MAIN_CLASS = 'very.long.package.name.which.does.not.fit.into.one.line.of.the.manifest.SourceKt'
+
+
+def create_jar(jar: str, manifest: str) -> None:
+    with zipfile.ZipFile(jar, 'w') as jar_file:
+        jar_file.writestr('META-INF/MANIFEST.MF', manifest)
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestKotlinTaskChecker:
+
+    def test_main_class_from_jar(self, tmp_path) -> None:
+        jar = os.path.join(tmp_path, 'source.jar')
+        main_class_line = f'Main-Class: {MAIN_CLASS}'
+        create_jar(jar, f'Manifest-Version: 1.0\r\n{main_class_line[:70]}\r\n {main_class_line[70:]}\r\n\r\n')
+        assert get_main_class_from_jar(jar) == MAIN_CLASS
+
+    def test_no_main_class_in_jar(self, tmp_path) -> None:
+        jar = os.path.join(tmp_path, 'source.jar')
+        create_jar(jar, 'Manifest-Version: 1.0\r\n\r\n')
+        assert get_main_class_from_jar(jar) is None
+
+    @pytest.mark.skipif(shutil.which('kotlinc') is None, reason='Kotlin compiler is not installed')
+    def test_compilation_cache(self, tmp_path) -> None:
+        cache_folder = os.path.join(tmp_path, 'cache')
+        tasks = [TASK.PIES]
+        in_and_out_files_dict = create_in_and_out_dict(tasks)
+        for s in SOLUTION:
+            code = get_source_code(TASK.PIES, LANGUAGE.KOTLIN, s.value)
+            checker = KotlinTaskChecker(Sandbox(os.path.join(tmp_path, 'sandbox')),
+                                        compilation_cache_folder=cache_folder)
+            results = checker.check_tasks(tasks, code, in_and_out_files_dict)
+            cached_files = set(os.listdir(cache_folder))
+            # The second checking uses the cached compilation result
+            assert checker.check_tasks(tasks, code, in_and_out_files_dict) == results
+            assert set(os.listdir(cache_folder)) == cached_files
+        assert len(os.listdir(cache_folder)) == len(SOLUTION)
@@ -0,0 +1,48 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+from typing import List
+
+import pytest
+
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.task_checker import is_output_correct
+from src.main.task_scoring.output_comparator import OutputComparator
+
+EXPECTED_OUTPUT = '1 2\n3'
+
+OUTPUTS = [b'1 2\n3', b'1 2\n3\n', b'1 2\r\n3\r\n\n', b'1 2\r3', b'1 2\n', b'1 2\n34', b'1 3\n3', b'', b'\n1 2\n3',
+           b'1 2 \n3']
+
+
+def is_correct(chunks: List[bytes], expected_output: str = EXPECTED_OUTPUT, margin: int = 10) -> bool:
+    comparator = OutputComparator(expected_output, margin)
+    for chunk in chunks:
+        comparator.feed(chunk)
+    return comparator.is_output_correct()
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestOutputComparator:
+
+    @pytest.mark.parametrize('output', OUTPUTS)
+    def test_same_as_is_output_correct(self, output: bytes) -> None:
+        expected_result = is_output_correct(output.replace(b'\r\n', b'\n').replace(b'\r', b'\n').decode(),
+                                            EXPECTED_OUTPUT)
+        assert is_correct([output]) == expected_result
+        # The output can be split into chunks anywhere, for example, between \r and \n
+        assert is_correct([output[i:i + 1] for i in range(len(output))]) == expected_result
+
+    def test_early_mismatch(self) -> None:
+        comparator = OutputComparator(EXPECTED_OUTPUT)
+        assert comparator.feed(b'1 2')
+        assert not comparator.feed(b'\n4')
+        assert comparator.is_mismatched
+        assert not comparator.feed(b'\n3')
+        assert not comparator.is_output_correct()
+
+    def test_margin(self) -> None:
+        assert is_correct([EXPECTED_OUTPUT.encode(), b'\n' * 10])
+        assert not is_correct([EXPECTED_OUTPUT.encode(), b'\n' * 11])
+
+    def test_undecodable_output(self) -> None:
+        assert not is_correct([b'\xff\xfe'], 'a')
@@ -0,0 +1,148 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import sys
+import time
+import asyncio
+from typing import Optional
+
+import pytest
+
+from src.main.util.consts import LANGUAGE
+from src.main.task_scoring.sandbox import Sandbox
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.task_checker import TaskCheckerOptions
+from src.main.task_scoring.output_comparator import OutputComparator
+from src.main.task_scoring.tasks_tests_handler import create_task_checker
+from src.main.task_scoring.process_executor import ProcessExecutor, can_limit_resources
+
+ECHO = 'print(input())'
+EXIT_WITH_ERROR = 'import sys; sys.exit(3)'
+INFINITE_LOOP = 'while True: pass'
+INFINITE_OUTPUT = 'while True: print("a" * 1000)'
+MEMORY_BOMB = 'a = bytearray(1024 * 1024 * 1024); print(len(a))'
+# The child process keeps the output open, so it has to be killed too
+CHILD_PROCESS = 'import subprocess, sys; subprocess.Popen([sys.executable, "-c", "import time; time.sleep(100)"])'
+
+
+def execute(executor: ProcessExecutor, code: str, input: str = '', comparator: Optional[OutputComparator] = None):
+    return executor.execute([sys.executable, '-c', code], input.encode(), comparator)
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+@pytest.mark.skipif(not can_limit_resources(), reason='Resources cannot be limited on this platform')
+class TestProcessExecutor:
+
+    def test_output(self) -> None:
+        result = execute(ProcessExecutor(), ECHO, 'some input\n')
+        assert result.is_successful and result.output == b'some input\n'
+        assert not result.is_timeout and not result.is_output_limit_exceeded
+        assert result.max_rss > 0 and result.wall_time > 0
+
+    def test_exit_code(self) -> None:
+        result = execute(ProcessExecutor(), EXIT_WITH_ERROR)
+        assert not result.is_successful and result.exit_code == 3
+
+    def test_timeout(self) -> None:
+        result = execute(ProcessExecutor(timeout=1, cpu_limit=None), INFINITE_LOOP)
+        assert result.is_timeout and not result.is_successful
+        assert result.cpu_time > 0.5
+
+    def test_cpu_limit(self) -> None:
+        result = execute(ProcessExecutor(timeout=10, cpu_limit=1), INFINITE_LOOP)
+        assert not result.is_timeout and not result.is_successful
+        assert result.wall_time < 5
+
+    def test_memory_limit(self) -> None:
+        assert execute(ProcessExecutor(), MEMORY_BOMB).is_successful
+        assert not execute(ProcessExecutor(memory_limit=256 * 1024 * 1024), MEMORY_BOMB).is_successful
+
+    def test_output_limit(self) -> None:
+        result = execute(ProcessExecutor(output_limit=1024 * 1024), INFINITE_OUTPUT)
+        assert result.is_output_limit_exceeded and not result.is_timeout and not result.is_successful
+        assert result.wall_time < 5
+
+    def test_output_mismatch(self) -> None:
+        comparator = OutputComparator('some input')
+        result = execute(ProcessExecutor(), ECHO, 'some input\n', comparator)
+        assert result.is_successful and not result.is_output_mismatched and comparator.is_output_correct()
+        # The output isn't kept, the process is killed at the first mismatch
+        assert result.output == b''
+        comparator = OutputComparator('a' * 1000 + '\nb')
+        result = execute(ProcessExecutor(output_limit=None), INFINITE_OUTPUT, comparator=comparator)
+        assert result.is_output_mismatched and not result.is_timeout and not result.is_output_limit_exceeded
+        assert not result.is_successful and not comparator.is_output_correct()
+        assert result.wall_time < 5
+
+    def test_process_group_kill(self) -> None:
+        start_time = time.monotonic()
+        result = execute(ProcessExecutor(timeout=1), CHILD_PROCESS)
+        assert result.is_timeout
+        assert time.monotonic() - start_time < 5
+
+
+def execute_async(executor: ProcessExecutor, code: str, input: str = '',
+                  comparator: Optional[OutputComparator] = None):
+    return asyncio.run(executor.execute_async([sys.executable, '-c', code], input.encode(), comparator))
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+@pytest.mark.skipif(not can_limit_resources(), reason='Resources cannot be limited on this platform')
+class TestAsyncProcessExecutor:
+
+    def test_output(self) -> None:
+        result = execute_async(ProcessExecutor(), ECHO, 'some input\n')
+        assert result.is_successful and result.output == b'some input\n'
+        assert not result.is_timeout and not result.is_output_limit_exceeded
+
+    def test_exit_code(self) -> None:
+        result = execute_async(ProcessExecutor(), EXIT_WITH_ERROR)
+        assert not result.is_successful and result.exit_code == 3
+
+    def test_memory_limit(self) -> None:
+        assert not execute_async(ProcessExecutor(memory_limit=256 * 1024 * 1024), MEMORY_BOMB).is_successful
+
+    # The process is killed when the output is not read, it's repeated to be sure its waiting is not stuck then
+    @pytest.mark.parametrize('attempt', range(3))
+    def test_output_limit(self, attempt: int) -> None:
+        result = execute_async(ProcessExecutor(output_limit=1024 * 1024), INFINITE_OUTPUT)
+        assert result.is_output_limit_exceeded and not result.is_timeout and not result.is_successful
+        assert result.wall_time < 5
+
+    def test_output_mismatch(self) -> None:
+        comparator = OutputComparator('some input')
+        result = execute_async(ProcessExecutor(), ECHO, 'some input\n', comparator)
+        assert result.is_successful and not result.is_output_mismatched and comparator.is_output_correct()
+        comparator = OutputComparator('a' * 1000 + '\nb')
+        result = execute_async(ProcessExecutor(output_limit=None), INFINITE_OUTPUT, comparator=comparator)
+        assert result.is_output_mismatched and not result.is_timeout and not result.is_output_limit_exceeded
+        assert not result.is_successful and result.wall_time < 5
+
+    def test_process_group_kill(self) -> None:
+        result = execute_async(ProcessExecutor(timeout=1), CHILD_PROCESS)
+        assert result.is_timeout and not result.is_successful
+        assert result.wall_time < 5
+
+    def test_processes_at_once(self) -> None:
+        async def execute_all():
+            executor = ProcessExecutor(timeout=10)
+            return await asyncio.gather(*[executor.execute_async([sys.executable, '-c', 'import time; time.sleep(1)'],
+                                                                 b'') for _ in range(10)])
+
+        start_time = time.monotonic()
+        results = asyncio.run(execute_all())
+        assert all(r.is_successful for r in results)
+        assert time.monotonic() - start_time < 5
+
+    # By default, only the time of the tests is limited
+    @pytest.mark.parametrize('language', [LANGUAGE.PYTHON, LANGUAGE.CPP, LANGUAGE.JAVA, LANGUAGE.KOTLIN])
+    def test_checker_limits_option(self, tmp_path, language: LANGUAGE) -> None:
+        sandbox = Sandbox(str(tmp_path))
+        assert create_task_checker(language, sandbox).executor is None
+        assert create_task_checker(language, sandbox, TaskCheckerOptions(to_limit_resources=True)).executor is not None
+
+    @pytest.mark.parametrize('to_run_python_in_fork', [False, True])
+    def test_checker_memory_limit(self, tmp_path, to_run_python_in_fork: bool) -> None:
+        options = TaskCheckerOptions(to_run_python_in_fork=to_run_python_in_fork, to_limit_resources=True)
+        task_checker = create_task_checker(LANGUAGE.PYTHON, Sandbox(str(tmp_path)), options)
+        source_file = task_checker.create_source_file(MEMORY_BOMB)
+        assert not task_checker.run_test('', str(1024 * 1024 * 1024), source_file)
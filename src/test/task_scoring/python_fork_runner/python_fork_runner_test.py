@@ -0,0 +1,76 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import time
+
+import pytest
+
+from src.main.util.consts import LANGUAGE
+from src.main.task_scoring.sandbox import Sandbox
+from src.main.util.file_util import create_file
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.task_checker import TaskCheckerOptions
+from src.main.task_scoring.tasks_tests_handler import create_task_checker
+from src.main.task_scoring.scoring_benchmark import count_started_processes, FORKED_PROCESSES_KEY
+from src.main.task_scoring.python_task_checker import PythonTaskChecker
+from src.main.task_scoring.output_comparator import OutputComparator
+from src.main.task_scoring.python_fork_runner import can_fork, compile_file_safely, run_code_in_fork
+
+INPUT = '5\n'
+EXPECTED_OUTPUT = '10'
+
+# Each code is run with INPUT and its output is compared with EXPECTED_OUTPUT
+codes = [
+    'print(int(input()) * 2)',
+    'print(int(input()) * 3)',
+    'print(int(input()) * 2)\nimport sys\nsys.exit()',
+    'print(int(input()) * 2)\nimport sys\nsys.exit(1)',
+    'print(int(input()) * 2)\nraise ValueError()',
+    'input()\ninput()\nprint(10)',
+    'import sys\nsys.stdout.write(str(int(sys.stdin.read()) * 2) + "\\r\\n\\n")',
+    'if __name__ == "__main__":\n    print(10)'
+]
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+@pytest.mark.skipif(not can_fork(), reason='fork is not supported')
+class TestPythonForkRunner:
+
+    @pytest.mark.parametrize('code', codes)
+    def test_same_results_as_interpreter(self, tmp_path, code: str) -> None:
+        source_file = os.path.join(tmp_path, 'source.py')
+        create_file(code, source_file)
+        fork_checker = PythonTaskChecker(to_run_in_fork=True)
+        interpreter_checker = PythonTaskChecker(to_run_in_fork=False)
+        assert fork_checker.run_test(INPUT, EXPECTED_OUTPUT, source_file) == \
+            interpreter_checker.run_test(INPUT, EXPECTED_OUTPUT, source_file)
+
+    # Tests are run in the forked processes only if it's set in the options
+    @pytest.mark.parametrize('to_run_python_in_fork', [False, True])
+    def test_fork_option(self, tmp_path, to_run_python_in_fork: bool) -> None:
+        task_checker = create_task_checker(LANGUAGE.PYTHON, Sandbox(os.path.join(tmp_path, 'sandbox')),
+                                           TaskCheckerOptions(to_run_python_in_fork=to_run_python_in_fork))
+        source_file = task_checker.create_source_file(codes[0])
+        with count_started_processes() as counter:
+            assert task_checker.run_test(INPUT, EXPECTED_OUTPUT, source_file)
+        assert (counter[FORKED_PROCESSES_KEY] > 0) == to_run_python_in_fork
+
+    def test_timeout(self, tmp_path) -> None:
+        source_file = os.path.join(tmp_path, 'source.py')
+        create_file('while True:\n    pass', source_file)
+        assert run_code_in_fork(compile_file_safely(source_file), source_file, INPUT, timeout=1) is None
+
+    def test_memory_limit(self, tmp_path) -> None:
+        source_file = os.path.join(tmp_path, 'source.py')
+        create_file('a = [0] * (10 ** 9)\nprint(1)', source_file)
+        assert run_code_in_fork(compile_file_safely(source_file), source_file, INPUT,
+                                memory_limit=64 * 1024 * 1024) is None
+
+    def test_output_mismatch(self, tmp_path) -> None:
+        source_file = os.path.join(tmp_path, 'source.py')
+        create_file('while True:\n    print(1)', source_file)
+        start_time = time.monotonic()
+        comparator = OutputComparator(EXPECTED_OUTPUT)
+        assert run_code_in_fork(compile_file_safely(source_file), source_file, INPUT, comparator=comparator) is None
+        assert comparator.is_mismatched
+        assert time.monotonic() - start_time < 1
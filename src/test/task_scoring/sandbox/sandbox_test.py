@@ -0,0 +1,54 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+
+import pytest
+
+from src.main.task_scoring.sandbox import Sandbox
+from src.main.util.consts import SANDBOX_CLEANUP_POLICY
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.util.file_util import create_file, does_exist
+
+
+def create_compiled_files(folder: str) -> None:
+    create_file('source', os.path.join(folder, 'source.java'))
+    create_file('class', os.path.join(folder, 'package', 'source.class'))
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestSandbox:
+
+    @pytest.mark.parametrize('cleanup_policy', [SANDBOX_CLEANUP_POLICY.CLEAR, SANDBOX_CLEANUP_POLICY.RECREATE])
+    def test_prepare(self, tmp_path, cleanup_policy: SANDBOX_CLEANUP_POLICY) -> None:
+        sandbox = Sandbox(os.path.join(tmp_path, 'sandbox'), cleanup_policy)
+        create_compiled_files(sandbox.folder)
+        sandbox.prepare()
+        assert does_exist(sandbox.folder)
+        assert os.listdir(sandbox.folder) == []
+
+    @pytest.mark.parametrize('cleanup_policy', [SANDBOX_CLEANUP_POLICY.CLEAR, SANDBOX_CLEANUP_POLICY.RECREATE])
+    def test_prepare_with_precheck_folder(self, tmp_path, cleanup_policy: SANDBOX_CLEANUP_POLICY) -> None:
+        sandbox = Sandbox(os.path.join(tmp_path, 'sandbox'), cleanup_policy)
+        precheck_folder = sandbox.prepare_precheck_folder()
+        assert os.path.dirname(precheck_folder) == sandbox.folder
+        create_compiled_files(sandbox.folder)
+        create_compiled_files(precheck_folder)
+        sandbox.prepare()
+        assert os.listdir(sandbox.folder) == [Sandbox.PRECHECK_FOLDER_NAME]
+        assert does_exist(os.path.join(precheck_folder, 'package', 'source.class'))
+
+    def test_temporary_sandbox(self, tmp_path) -> None:
+        with Sandbox.create_temporary(str(tmp_path)) as first_sandbox, \
+                Sandbox.create_temporary(str(tmp_path)) as second_sandbox:
+            assert first_sandbox.folder != second_sandbox.folder
+            create_compiled_files(first_sandbox.folder)
+            second_sandbox.prepare()
+            assert does_exist(os.path.join(first_sandbox.folder, 'source.java'))
+        assert not does_exist(first_sandbox.folder)
+        assert not does_exist(second_sandbox.folder)
+
+    def test_not_temporary_sandbox(self, tmp_path) -> None:
+        folder = os.path.join(tmp_path, 'sandbox')
+        with Sandbox(folder):
+            pass
+        assert does_exist(folder)
@@ -0,0 +1,58 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import json
+
+import pytest
+
+from src.main.util.consts import LANGUAGE, TASK, BENCHMARK_FRAGMENT_KIND
+from src.main.task_scoring.sandbox import Sandbox
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring import scoring_benchmark
+from src.main.task_scoring.tasks_tests_handler import create_task_checker
+from src.main.task_scoring.scoring_benchmark import generate_corpus, run_scoring_benchmark, LANGUAGE_TO_TOOLS, \
+    SUBPROCESSES_KEY
+
+KIND_TO_FRAGMENTS_NUMBER = {
+    BENCHMARK_FRAGMENT_KIND.CORRECT: 2,
+    BENCHMARK_FRAGMENT_KIND.INCORRECT: 2,
+    BENCHMARK_FRAGMENT_KIND.TOO_SHORT: 1,
+    BENCHMARK_FRAGMENT_KIND.TIMEOUT: 0
+}
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestScoringBenchmark:
+
+    @pytest.mark.parametrize('language', LANGUAGE_TO_TOOLS.keys())
+    def test_reproducible_corpus(self, language: LANGUAGE) -> None:
+        corpus = generate_corpus(language, TASK.PIES)
+        assert corpus == generate_corpus(language, TASK.PIES)
+        assert corpus != generate_corpus(language, TASK.PIES, seed=1)
+        assert len(set(fragment for _, fragment in corpus)) == len(corpus)
+
+    @pytest.mark.parametrize('language', LANGUAGE_TO_TOOLS.keys())
+    def test_fragments_lengths(self, tmp_path, language: LANGUAGE) -> None:
+        task_checker = create_task_checker(language, Sandbox(str(tmp_path)))
+        for kind, fragment in generate_corpus(language, TASK.PIES):
+            is_too_short = len(fragment) < task_checker.min_symbols_number
+            assert is_too_short == (kind == BENCHMARK_FRAGMENT_KIND.TOO_SHORT), fragment
+            assert task_checker.passes_cheap_filters(fragment) != is_too_short, fragment
+
+    def test_python_benchmark(self) -> None:
+        report = run_scoring_benchmark([LANGUAGE.PYTHON], [TASK.PIES, TASK.MAX_3], KIND_TO_FRAGMENTS_NUMBER)
+        assert json.loads(json.dumps(report)) == report
+        python_report = report['languages'][LANGUAGE.PYTHON.value]
+        assert python_report['fragments'] == 2 * sum(KIND_TO_FRAGMENTS_NUMBER.values())
+        # Tests are run only on the correct fragments, one test for each of them is failed
+        assert python_report['tests'] == 2 * KIND_TO_FRAGMENTS_NUMBER[BENCHMARK_FRAGMENT_KIND.CORRECT]
+        assert python_report['kinds'][BENCHMARK_FRAGMENT_KIND.TIMEOUT.value]['fragments'] == 0
+        # One of the incorrect fragments of each task has a syntax error and another one has a type error
+        assert python_report['filtered_fragments'] == {'syntax': 2, 'correctness': 2, 'length': 2, 'output': 0}
+        assert python_report[SUBPROCESSES_KEY] > 0
+        assert python_report['latency_p50'] <= python_report['latency_p99']
+
+    def test_skipped_languages(self, monkeypatch) -> None:
+        monkeypatch.setattr(scoring_benchmark.shutil, 'which', lambda tool: None)
+        report = run_scoring_benchmark(kind_to_fragments_number=KIND_TO_FRAGMENTS_NUMBER)
+        assert report['languages'] == {}
+        assert report['skipped_languages'].keys() == {l.value for l in LANGUAGE_TO_TOOLS.keys()}
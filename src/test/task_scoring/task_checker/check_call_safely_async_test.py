@@ -0,0 +1,43 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import time
+import asyncio
+
+import pytest
+
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.util.file_util import get_content_from_file
+from src.main.task_scoring.task_checker import check_call_safely_async
+
+
+# The killed process can stay a zombie until its parent waits for it
+def is_process_running(pid: int) -> bool:
+    try:
+        with open(f'/proc/{pid}/stat') as stat:
+            return stat.read().split(')')[-1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestCheckCallSafelyAsync:
+
+    @pytest.mark.parametrize('call_args, expected_result', [(['true'], True), (['false'], False)])
+    def test_exit_code(self, call_args, expected_result: bool) -> None:
+        assert asyncio.run(check_call_safely_async(call_args)) == expected_result
+
+    # The shell starts the child process, which is killed with the shell on timeout
+    @pytest.mark.skipif(not os.path.exists('/proc'), reason='/proc is needed to check the processes')
+    def test_timeout_kills_child_processes(self, tmp_path) -> None:
+        pid_file = os.path.join(tmp_path, 'pid.txt')
+        start_time = time.monotonic()
+        assert asyncio.run(check_call_safely_async([f'sleep 60 & echo $! > {pid_file}; wait'], 1, shell=True))
+        assert time.monotonic() - start_time < 30
+        pid = int(get_content_from_file(pid_file))
+        # The child can be reaped by the init process a bit later
+        for _ in range(50):
+            if not is_process_running(pid):
+                break
+            time.sleep(0.1)
+        assert not is_process_running(pid)
@@ -0,0 +1,47 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import pytest
+
+from src.main.task_scoring.sandbox import Sandbox
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.util.consts import LANGUAGE, TASK, FILTER_STAGE, TEST_RESULT
+from src.main.task_scoring.java_task_checker import has_balanced_brackets
+from src.main.task_scoring.python_task_checker import PythonTaskChecker
+from src.main.task_scoring.tasks_tests_handler import create_in_and_out_dict
+from src.test.task_scoring.tasks_tests_handler.util import get_source_code, SOLUTION
+
+TASKS = [TASK.PIES, TASK.ZERO]
+
+FRAGMENT_TO_FILTER_STAGE = {
+    'a = (\nprint(a)': FILTER_STAGE.SYNTAX,
+    'x: int = "str"\nprint(x)': FILTER_STAGE.CORRECTNESS,
+    'print(1)': FILTER_STAGE.LENGTH,
+    'a = int(input())\nb = int(input())\nc = a + b': FILTER_STAGE.OUTPUT
+}
+
+BALANCED_JAVA_FRAGMENTS = ['class A { int[] a = {1}; void f() { g("}", \'{\'); } }',
+                           'class A { /* } */ }',
+                           # Unicode escapes are not translated, so such fragments are left to javac
+                           'class A { \\u007B }',
+                           # Fragments with lexer errors are left to javac too
+                           'class A { String s = "a }']
+UNBALANCED_JAVA_FRAGMENTS = ['class A {', 'class A { void f() { ) }', 'class A { int[] a = {1]; }', '}{']
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestFilterStages:
+
+    def test_python_filter_stages(self, tmp_path) -> None:
+        in_and_out_files_dict = create_in_and_out_dict(TASKS)
+        task_checker = PythonTaskChecker(Sandbox(str(tmp_path)))
+        for fragment, stage in FRAGMENT_TO_FILTER_STAGE.items():
+            rate = TEST_RESULT.INCORRECT_CODE.value if stage in [FILTER_STAGE.SYNTAX, FILTER_STAGE.CORRECTNESS] \
+                else TEST_RESULT.CORRECT_CODE.value
+            assert task_checker.check_tasks(TASKS, fragment, in_and_out_files_dict) == [rate] * len(TASKS), fragment
+        full_solution = get_source_code(TASK.PIES, LANGUAGE.PYTHON, SOLUTION.FULL.value)
+        task_checker.check_tasks(TASKS, full_solution, in_and_out_files_dict)
+        assert task_checker.filter_stage_to_filtered_dict == {stage: 1 for stage in FILTER_STAGE}
+
+    def test_java_brackets(self) -> None:
+        assert all(has_balanced_brackets(f) for f in BALANCED_JAVA_FRAGMENTS)
+        assert not any(has_balanced_brackets(f) for f in UNBALANCED_JAVA_FRAGMENTS)
@@ -0,0 +1,63 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import asyncio
+
+import pytest
+
+from src.main.util.consts import LANGUAGE, TASK
+from src.main.task_scoring.sandbox import Sandbox
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.python_task_checker import PythonTaskChecker
+from src.main.task_scoring.tasks_tests_handler import create_in_and_out_dict
+from src.test.task_scoring.tasks_tests_handler.util import get_source_code, SOLUTION
+
+TASKS = TASK.tasks()
+
+fragments = [get_source_code(task, LANGUAGE.PYTHON, s.value) for task in [TASK.PIES, TASK.ZERO] for s in SOLUTION]
+not_full_fragments = [get_source_code(task, LANGUAGE.PYTHON, s.value) for task in [TASK.PIES, TASK.ZERO]
+                      for s in SOLUTION if s != SOLUTION.FULL]
+
+
+def get_solved_tasks(test_results: list) -> list:
+    return [task for task, rate in zip(TASKS, test_results) if rate == 1]
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestProbeTasks:
+
+    @pytest.mark.parametrize('stop_after_first_false', [True, False])
+    def test_same_solved_tasks(self, tmp_path, stop_after_first_false: bool) -> None:
+        in_and_out_files_dict = create_in_and_out_dict(TASKS)
+        task_checker = PythonTaskChecker(Sandbox(str(tmp_path)))
+        for fragment in fragments:
+            test_results = task_checker.check_tasks(TASKS, fragment, in_and_out_files_dict, stop_after_first_false)
+            probed_test_results = task_checker.check_tasks(TASKS, fragment, in_and_out_files_dict,
+                                                           stop_after_first_false, to_probe_tasks=True)
+            assert len(probed_test_results) == len(TASKS)
+            assert get_solved_tasks(probed_test_results) == get_solved_tasks(test_results), fragment
+            assert all(p <= r for p, r in zip(probed_test_results, test_results)), fragment
+
+    # Without a solved task all plausible tasks are fully tested, so the rates are the same
+    def test_same_results_without_solved_task(self, tmp_path) -> None:
+        in_and_out_files_dict = create_in_and_out_dict(TASKS)
+        task_checker = PythonTaskChecker(Sandbox(str(tmp_path)))
+        for fragment in not_full_fragments:
+            assert task_checker.check_tasks(TASKS, fragment, in_and_out_files_dict, to_probe_tasks=True) == \
+                task_checker.check_tasks(TASKS, fragment, in_and_out_files_dict), fragment
+
+    def test_fewer_tests_runs(self, tmp_path) -> None:
+        in_and_out_files_dict = create_in_and_out_dict(TASKS)
+        task_checker = PythonTaskChecker(Sandbox(str(tmp_path)))
+        full_solution = get_source_code(TASK.PIES, LANGUAGE.PYTHON, SOLUTION.FULL.value)
+        task_checker.check_tasks(TASKS, full_solution, in_and_out_files_dict, False)
+        tests_runs = task_checker.tests_runs
+        task_checker.check_tasks(TASKS, full_solution, in_and_out_files_dict, False, to_probe_tasks=True)
+        assert task_checker.tests_runs - tests_runs < tests_runs
+
+    def test_async_same_results(self, tmp_path) -> None:
+        in_and_out_files_dict = create_in_and_out_dict(TASKS)
+        task_checker = PythonTaskChecker(Sandbox(str(tmp_path)))
+        for fragment in fragments:
+            assert asyncio.run(task_checker.check_tasks_async(TASKS, fragment, in_and_out_files_dict,
+                                                              to_probe_tasks=True)) == \
+                task_checker.check_tasks(TASKS, fragment, in_and_out_files_dict, to_probe_tasks=True), fragment
@@ -0,0 +1,86 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import shutil
+import asyncio
+
+import pytest
+
+from src.main.util.consts import LANGUAGE, TASK
+from src.main.task_scoring.sandbox import Sandbox
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.java_task_checker import JavaTaskChecker
+from src.main.task_scoring.python_task_checker import PythonTaskChecker
+from src.test.task_scoring.tasks_tests_handler.util import get_source_code, SOLUTION
+from src.main.task_scoring.tasks_tests_handler import check_fragments, check_tasks, create_in_and_out_dict, \
+    check_fragments_async
+
+fragments = [get_source_code(TASK.PIES, LANGUAGE.PYTHON, s.value) for s in SOLUTION] + [
+    'x: int = "str"\nprint(x)',
+    'def f():\n    pass\nreturn 1',
+    'a = (\nprint(a)',
+    'print(1)',
+    ''
+]
+
+cpp_fragments = [get_source_code(TASK.PIES, LANGUAGE.CPP, s.value) for s in SOLUTION] + [
+    '#include <iostream>\nint main() { int a = "str"; std::cout << a; }',
+    '#include <iostream>\nint main() { while (true) { std::cout << 1; } }'
+]
+
+java_fragments = [get_source_code(TASK.PIES, LANGUAGE.JAVA, s.value) for s in SOLUTION] + [
+    'public class Main { public static void main(String[] args) { int a = "str"; } }',
+    'public class Main { public static void main(String[] args) { System.out.println(10); } }'
+]
+
+kotlin_fragments = [get_source_code(TASK.PIES, LANGUAGE.KOTLIN, s.value) for s in SOLUTION] + [
+    'fun main() { val a: Int = "str" }'
+]
+
+# The tools, which are needed to check the fragments in the event loop
+language_to_tool = {LANGUAGE.CPP: 'g++', LANGUAGE.JAVA: 'javac', LANGUAGE.KOTLIN: 'kotlinc'}
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestCheckFragments:
+
+    def test_python_fragments_correctness(self, tmp_path) -> None:
+        task_checker = PythonTaskChecker(Sandbox(str(tmp_path)))
+        fragment_to_correctness_dict = task_checker.check_fragments_correctness(fragments)
+        assert fragment_to_correctness_dict.keys() == set(fragments)
+        for fragment in fragments:
+            file = task_checker.create_source_file(fragment)
+            assert fragment_to_correctness_dict[fragment] == task_checker.is_source_file_correct(file), fragment
+
+    def test_same_results_as_check_tasks(self) -> None:
+        tasks = TASK.tasks()
+        in_and_out_files_dict = create_in_and_out_dict(tasks)
+        fragment_to_test_results_dict = check_fragments(tasks, fragments, in_and_out_files_dict, LANGUAGE.PYTHON)
+        for fragment in fragments:
+            assert fragment_to_test_results_dict[fragment] == check_tasks(tasks, fragment, in_and_out_files_dict,
+                                                                          LANGUAGE.PYTHON), fragment
+
+    @pytest.mark.skipif(shutil.which('javac') is None, reason='JDK is not installed')
+    def test_java_fragments_batch_compilation(self, tmp_path) -> None:
+        tasks = TASK.tasks()
+        in_and_out_files_dict = create_in_and_out_dict(tasks)
+        task_checker = JavaTaskChecker(Sandbox(str(tmp_path)), to_use_jvm_harness=True)
+        task_checker.precheck_fragments(java_fragments)
+        for fragment in java_fragments:
+            assert task_checker.check_tasks(tasks, fragment, in_and_out_files_dict) == \
+                check_tasks(tasks, fragment, in_and_out_files_dict, LANGUAGE.JAVA), fragment
+
+    @pytest.mark.parametrize('language, language_fragments', [(LANGUAGE.PYTHON, fragments),
+                                                              (LANGUAGE.CPP, cpp_fragments),
+                                                              (LANGUAGE.JAVA, java_fragments),
+                                                              (LANGUAGE.KOTLIN, kotlin_fragments)])
+    def test_async_same_results(self, language: LANGUAGE, language_fragments: list) -> None:
+        tool = language_to_tool.get(language)
+        if tool is not None and shutil.which(tool) is None:
+            pytest.skip(f'{tool} is not installed')
+        tasks = TASK.tasks()
+        in_and_out_files_dict = create_in_and_out_dict(tasks)
+        fragment_to_test_results_dict = asyncio.run(check_fragments_async(tasks, language_fragments,
+                                                                          in_and_out_files_dict, language,
+                                                                          checkers_number=3))
+        assert fragment_to_test_results_dict == check_fragments(tasks, language_fragments, in_and_out_files_dict,
+                                                                language)
@@ -0,0 +1,139 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import json
+
+import pytest
+import pandas as pd
+
+from src.main.util import consts
+from src.main.util.consts import LANGUAGE, TASK
+from src.main.task_scoring import tasks_tests_handler
+from src.main.task_scoring.tasks_tests_handler import run_tests
+from src.main.task_scoring.tests_progress import TestsProgress
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.test.task_scoring.tasks_tests_handler.util import get_source_code, SOLUTION
+from src.main.util.file_util import get_all_file_system_items, tt_file_condition, get_file_and_parent_folder_names
+
+FRAGMENT = consts.TASK_TRACKER_COLUMN.FRAGMENT.value
+FILE_NAME = consts.TASK_TRACKER_COLUMN.FILE_NAME.value
+
+
+# If to_add_comments is True, the fragments, which differ only in comments, are added to each file
+def create_tt_data(path: str, to_add_comments: bool = False) -> None:
+    fragments = [get_source_code(TASK.PIES, LANGUAGE.PYTHON, s.value) for s in SOLUTION]
+    for user_index in range(3):
+        task_folder = os.path.join(path, f'user_{user_index}', TASK.PIES.value)
+        os.makedirs(task_folder)
+        # Each file has repeated fragments and a fragment that is too small to run tests on it
+        file_fragments = fragments[user_index:] + fragments + ['print(1)']
+        if to_add_comments:
+            file_fragments += [f'# The user {user_index}\n{f}' for f in fragments]
+        data = pd.DataFrame({FILE_NAME: 'pies.py', FRAGMENT: file_fragments})
+        data.to_csv(os.path.join(task_folder, f'pies_{user_index}.csv'), index=False)
+
+
+# The file of the task, which is not in the TASK enum class, has the same fragments as the files of the known task
+def create_unknown_task_data(path: str) -> None:
+    fragments = [get_source_code(TASK.PIES, LANGUAGE.PYTHON, s.value) for s in SOLUTION]
+    task_folder = os.path.join(path, 'user_0', 'unknown_task')
+    os.makedirs(task_folder)
+    data = pd.DataFrame({FILE_NAME: 'unknown.py', FRAGMENT: fragments + ['print(1)']})
+    data.to_csv(os.path.join(task_folder, 'unknown_0.csv'), index=False)
+
+
+def get_results(output_directory: str) -> dict:
+    files = get_all_file_system_items(output_directory, tt_file_condition)
+    return {get_file_and_parent_folder_names(f): pd.read_csv(f, encoding=consts.ISO_ENCODING) for f in files}
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestParallelRunTests:
+
+    def test_same_results(self, tmp_path) -> None:
+        sequential_path = os.path.join(tmp_path, 'sequential')
+        parallel_path = os.path.join(tmp_path, 'parallel')
+        create_tt_data(sequential_path)
+        create_tt_data(parallel_path)
+
+        sequential_results = get_results(run_tests(sequential_path))
+        parallel_results = get_results(run_tests(parallel_path, workers=2))
+
+        assert len(sequential_results) == 3
+        assert sequential_results.keys() == parallel_results.keys()
+        for file, data in sequential_results.items():
+            pd.testing.assert_frame_equal(data, parallel_results[file])
+
+    def test_same_tests_statistics(self, tmp_path) -> None:
+        sequential_path = os.path.join(tmp_path, 'sequential')
+        parallel_path = os.path.join(tmp_path, 'parallel')
+        create_tt_data(sequential_path)
+        create_tt_data(parallel_path)
+        sequential_statistics = os.path.join(tmp_path, 'sequential_statistics.json')
+        parallel_statistics = os.path.join(tmp_path, 'parallel_statistics.json')
+
+        run_tests(sequential_path, tests_statistics_path=sequential_statistics)
+        run_tests(parallel_path, workers=2, tests_statistics_path=parallel_statistics)
+
+        with open(sequential_statistics) as sequential_file, open(parallel_statistics) as parallel_file:
+            assert json.load(sequential_file) == json.load(parallel_file)
+
+    def test_same_normalized_results(self, tmp_path) -> None:
+        sequential_path = os.path.join(tmp_path, 'sequential')
+        parallel_path = os.path.join(tmp_path, 'parallel')
+        create_tt_data(sequential_path, to_add_comments=True)
+        create_tt_data(parallel_path, to_add_comments=True)
+
+        sequential_results = get_results(run_tests(sequential_path))
+        parallel_results = get_results(run_tests(parallel_path, workers=2, to_normalize_fragments=True,
+                                                 cache_path=os.path.join(tmp_path, 'cache.db')))
+
+        assert sequential_results.keys() == parallel_results.keys()
+        for file, data in sequential_results.items():
+            pd.testing.assert_frame_equal(data, parallel_results[file])
+
+    # The sandboxes of the workers and of the normalizer checkers are removed even if the running is interrupted
+    def test_removed_sandboxes_after_interruption(self, tmp_path, monkeypatch) -> None:
+        path = os.path.join(tmp_path, 'data')
+        create_tt_data(path, to_add_comments=True)
+        sandbox_root = os.path.join(tmp_path, 'sandboxes')
+
+        def interrupt(*args) -> None:
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(tasks_tests_handler, 'write_based_on_language', interrupt)
+        with pytest.raises(KeyboardInterrupt):
+            run_tests(path, workers=2, sandbox_root=sandbox_root, to_normalize_fragments=True)
+        assert os.listdir(sandbox_root) == []
+
+    # The files with tasks, which are not in the TASK enum class, are not counted in the progress
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_progress_of_files_with_tasks(self, tmp_path, monkeypatch, workers: int) -> None:
+        path = os.path.join(tmp_path, 'data')
+        create_tt_data(path)
+        create_unknown_task_data(path)
+        progresses = []
+
+        def create_progress(files_number: int) -> TestsProgress:
+            progresses.append(TestsProgress(files_number))
+            return progresses[-1]
+
+        monkeypatch.setattr(tasks_tests_handler, 'TestsProgress', create_progress)
+        run_tests(path, workers=workers)
+        assert progresses[0].remaining_fragments == 0
+
+    # If the tasks are probed, the files with unknown tasks are tested without the current task
+    def test_same_probed_results(self, tmp_path) -> None:
+        expected_path = os.path.join(tmp_path, 'expected')
+        create_tt_data(expected_path)
+        create_unknown_task_data(expected_path)
+        expected_results = get_results(run_tests(expected_path, to_probe_tasks=True))
+        assert len(expected_results) == 4
+
+        path = os.path.join(tmp_path, 'data')
+        create_tt_data(path)
+        create_unknown_task_data(path)
+        results = get_results(run_tests(path, workers=2, to_probe_tasks=True))
+        assert results.keys() == expected_results.keys()
+        for file, data in expected_results.items():
+            pd.testing.assert_frame_equal(data, results[file])
@@ -9,7 +9,8 @@ from src.main.util import consts
 from src.main.util.consts import TASK, LANGUAGE
 from src.main.util.consts import TEST_DATA_PATH
 from src.main.util.file_util import get_content_from_file
-from src.main.task_scoring.task_checker import remove_compiled_files, FilesDict
+from src.main.task_scoring.sandbox import Sandbox
+from src.main.task_scoring.task_checker import FilesDict, SOURCE_FOLDER
 from src.main.task_scoring.tasks_tests_handler import check_tasks, create_in_and_out_dict
 
 log = logging.getLogger(consts.LOGGER_NAME)
@@ -32,7 +33,7 @@ def get_source_code(task: TASK, language: consts.LANGUAGE, solution: str) -> str
 
 
 def run_test_task(task: TASK, expected_pairs: Dict[SOLUTION, Tuple[int, int]], language: LANGUAGE) -> None:
-    remove_compiled_files()
+    Sandbox(SOURCE_FOLDER).prepare()
     in_and_out_files_dict = create_in_and_out_dict(TASK.tasks())
     for s in SOLUTION:
         code = get_source_code(task, language, s.value)
@@ -0,0 +1,131 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+
+import pytest
+import pandas as pd
+
+from src.main.util import consts
+from src.main.util.consts import LANGUAGE, TASK
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.tests_journal import TestsJournal
+from src.main.task_scoring.tests_progress import TestsProgress
+from src.main.task_scoring.tests_statistics import TestsStatistics
+from src.main.task_scoring import tasks_tests_handler
+from src.main.util.file_util import write_based_on_language
+from src.main.task_scoring.tasks_tests_handler import run_tests, create_in_and_out_dict
+from src.test.task_scoring.tasks_tests_handler.parallel_run_tests_test import create_tt_data, get_results
+from src.test.task_scoring.tasks_tests_handler.util import get_source_code, SOLUTION
+
+FRAGMENT = consts.TASK_TRACKER_COLUMN.FRAGMENT.value
+TESTS_RESULTS = consts.TASK_TRACKER_COLUMN.TESTS_RESULTS.value
+
+TASKS = TASK.tasks()
+# The results, which cannot be gotten by checking, to find out that they are replayed from the journal
+JOURNALED_RESULTS = [0.25] * len(TASKS)
+
+
+def create_journal(path: str, fingerprint: str = create_in_and_out_dict(TASKS).fingerprint) -> TestsJournal:
+    return TestsJournal(path, fingerprint)
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestTestsJournal:
+
+    def test_replay(self, tmp_path) -> None:
+        path = os.path.join(tmp_path, 'journal.jsonl')
+        with create_journal(path) as journal:
+            journal.put(LANGUAGE.PYTHON, 'a', TASKS, JOURNALED_RESULTS, TASK.PIES)
+            journal.put_all(LANGUAGE.PYTHON, {'b': [0.0] * len(TASKS), 'c': [1.0] * len(TASKS)}, TASKS, TASK.PIES)
+        with create_journal(path) as journal:
+            assert len(journal) == 3
+            assert journal.get(LANGUAGE.PYTHON, 'a', TASKS, TASK.PIES) == JOURNALED_RESULTS
+            assert journal.get(LANGUAGE.PYTHON, 'a', TASKS, TASK.ZERO) is None
+            assert journal.get(LANGUAGE.JAVA, 'a', TASKS, TASK.PIES) is None
+
+    def test_incomplete_record(self, tmp_path) -> None:
+        path = os.path.join(tmp_path, 'journal.jsonl')
+        with create_journal(path) as journal:
+            journal.put(LANGUAGE.PYTHON, 'a', TASKS, JOURNALED_RESULTS)
+        # The running is interrupted while the record is written
+        with open(path, 'a') as f:
+            f.write('["incomplete", [0.')
+        with create_journal(path) as journal:
+            assert len(journal) == 1
+            journal.put(LANGUAGE.PYTHON, 'b', TASKS, JOURNALED_RESULTS)
+        with create_journal(path) as journal:
+            assert len(journal) == 2
+
+    def test_other_fingerprint(self, tmp_path) -> None:
+        path = os.path.join(tmp_path, 'journal.jsonl')
+        with create_journal(path) as journal:
+            journal.put(LANGUAGE.PYTHON, 'a', TASKS, JOURNALED_RESULTS)
+        with create_journal(path, 'other fingerprint') as journal:
+            assert len(journal) == 0
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_resume(self, tmp_path, workers: int) -> None:
+        path = os.path.join(tmp_path, 'data')
+        create_tt_data(path)
+        journal_path = os.path.join(tmp_path, 'journal.jsonl')
+        # The full solution is checked before the interruption
+        full_solution = get_source_code(TASK.PIES, LANGUAGE.PYTHON, SOLUTION.FULL.value)
+        with create_journal(journal_path) as journal:
+            journal.put(LANGUAGE.PYTHON, full_solution, TASKS, JOURNALED_RESULTS, TASK.PIES)
+
+        results = get_results(run_tests(path, workers=workers, journal_path=journal_path))
+        assert len(results) == 3
+        for data in results.values():
+            for fragment, tests_results in zip(data[FRAGMENT], data[TESTS_RESULTS]):
+                assert (fragment == full_solution) == (tests_results == str(JOURNALED_RESULTS))
+        assert not os.path.exists(journal_path)
+
+    # If the tests statistics are used, the tests order is the same after the interruption, so the journal is replayed
+    @pytest.mark.parametrize('to_use_tests_statistics', [False, True])
+    def test_interrupted_running(self, tmp_path, monkeypatch, to_use_tests_statistics: bool) -> None:
+        expected_path = os.path.join(tmp_path, 'expected')
+        create_tt_data(expected_path)
+        expected_results = get_results(run_tests(expected_path))
+        tests_statistics_path = os.path.join(tmp_path, 'tests_statistics.json') if to_use_tests_statistics else None
+
+        path = os.path.join(tmp_path, 'data')
+        create_tt_data(path)
+        journal_path = os.path.join(tmp_path, 'journal.jsonl')
+        written_files = []
+
+        def write_only_first_file(output_directory: str, file: str, data: pd.DataFrame, language: LANGUAGE) -> None:
+            if written_files:
+                raise KeyboardInterrupt
+            written_files.append(file)
+            write_based_on_language(output_directory, file, data, language)
+
+        monkeypatch.setattr(tasks_tests_handler, 'write_based_on_language', write_only_first_file)
+        with pytest.raises(KeyboardInterrupt):
+            run_tests(path, journal_path=journal_path, tests_statistics_path=tests_statistics_path)
+        in_and_out_files_dict = create_in_and_out_dict(TASKS)
+        if to_use_tests_statistics:
+            in_and_out_files_dict = TestsStatistics.load(tests_statistics_path).order_tests(in_and_out_files_dict)
+        with create_journal(journal_path, in_and_out_files_dict.fingerprint) as journal:
+            # All unique fragments of the second file are journaled
+            assert len(journal) == len(SOLUTION) + 1
+        monkeypatch.undo()
+
+        results = get_results(run_tests(path, journal_path=journal_path, tests_statistics_path=tests_statistics_path))
+        assert results.keys() == expected_results.keys()
+        for file, data in expected_results.items():
+            pd.testing.assert_frame_equal(data, results[file])
+        assert not os.path.exists(journal_path)
+        if to_use_tests_statistics:
+            assert os.path.exists(tests_statistics_path)
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestTestsProgress:
+
+    def test_remaining_fragments(self) -> None:
+        progress = TestsProgress(4)
+        assert progress.remaining_fragments is None and progress.remaining_time is None
+        progress.finish_file(10)
+        progress.finish_file(20)
+        assert progress.remaining_fragments == 30
+        assert progress.remaining_time is not None
@@ -0,0 +1,83 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+
+import pytest
+
+from src.main.util.consts import LANGUAGE, TASK
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.task_checker import TaskCheckerOptions
+from src.main.task_scoring.tests_results_cache import TestsResultsCache
+from src.main.task_scoring.tasks_tests_handler import check_tasks, create_in_and_out_dict
+
+FINGERPRINT = 'fingerprint'
+FRAGMENT = 'a = int(input())\nprint(a)'
+TASKS = [TASK.PIES, TASK.ZERO]
+RESULTS = [0.0, 1.0]
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestTestsResultsCache:
+
+    def test_hits_and_misses(self, tmp_path) -> None:
+        with TestsResultsCache(os.path.join(tmp_path, 'cache.sqlite'), FINGERPRINT) as cache:
+            assert cache.get(LANGUAGE.PYTHON, FRAGMENT, TASKS) is None
+            cache.put(LANGUAGE.PYTHON, FRAGMENT, TASKS, RESULTS)
+            assert cache.get(LANGUAGE.PYTHON, FRAGMENT, TASKS) == RESULTS
+            # Other language, tasks and parameters of the tests running have other keys
+            assert cache.get(LANGUAGE.CPP, FRAGMENT, TASKS) is None
+            assert cache.get(LANGUAGE.PYTHON, FRAGMENT, TASKS[:1]) is None
+            assert cache.get(LANGUAGE.PYTHON, FRAGMENT, TASKS, current_task=TASK.PIES) is None
+            assert cache.get(LANGUAGE.PYTHON, FRAGMENT, TASKS, stop_after_first_false=False) is None
+            assert cache.get(LANGUAGE.PYTHON, FRAGMENT, TASKS, to_probe_tasks=True) is None
+            assert cache.hits == 1
+            assert cache.misses == 6
+
+    # The tasks are probed only if the current task is not set, so other keys don't depend on the probing
+    def test_probed_results_keys(self, tmp_path) -> None:
+        with TestsResultsCache(os.path.join(tmp_path, 'cache.sqlite'), FINGERPRINT) as cache:
+            cache.put(LANGUAGE.PYTHON, FRAGMENT, TASKS, RESULTS, current_task=TASK.ZERO)
+            assert cache.get(LANGUAGE.PYTHON, FRAGMENT, TASKS, current_task=TASK.ZERO, to_probe_tasks=True) == RESULTS
+
+    # Only the checker options, which change the tests results, are a part of the key
+    def test_checker_options_keys(self, tmp_path) -> None:
+        with TestsResultsCache(os.path.join(tmp_path, 'cache.sqlite'), FINGERPRINT) as cache:
+            cache.put(LANGUAGE.CPP, FRAGMENT, TASKS, RESULTS)
+            assert cache.get(LANGUAGE.CPP, FRAGMENT, TASKS, checker_options=TaskCheckerOptions(to_use_pch=True)) \
+                == RESULTS
+            options = TaskCheckerOptions(to_check_syntax_first=True)
+            assert cache.get(LANGUAGE.CPP, FRAGMENT, TASKS, checker_options=options) is None
+            cache.put(LANGUAGE.CPP, FRAGMENT, TASKS, [-1.0, -1.0], checker_options=options)
+            assert cache.get(LANGUAGE.CPP, FRAGMENT, TASKS, checker_options=options) == [-1.0, -1.0]
+            assert cache.get(LANGUAGE.CPP, FRAGMENT, TASKS) == RESULTS
+            assert cache.get(LANGUAGE.CPP, FRAGMENT, TASKS,
+                             checker_options=TaskCheckerOptions(to_limit_resources=True)) is None
+
+    def test_persistence_and_invalidation(self, tmp_path) -> None:
+        path = os.path.join(tmp_path, 'cache.sqlite')
+        with TestsResultsCache(path, FINGERPRINT) as cache:
+            cache.put_all(LANGUAGE.PYTHON, {FRAGMENT: RESULTS}, TASKS)
+        with TestsResultsCache(path, FINGERPRINT) as cache:
+            assert cache.get(LANGUAGE.PYTHON, FRAGMENT, TASKS) == RESULTS
+        with TestsResultsCache(path, 'new_' + FINGERPRINT) as cache:
+            assert cache.get(LANGUAGE.PYTHON, FRAGMENT, TASKS) is None
+
+    # The results for other orders of the same tests are kept, but are not used
+    def test_suite_fingerprints(self, tmp_path) -> None:
+        path = os.path.join(tmp_path, 'cache.sqlite')
+        with TestsResultsCache(path, FINGERPRINT, 'sorted_' + FINGERPRINT) as cache:
+            cache.put(LANGUAGE.PYTHON, FRAGMENT, TASKS, RESULTS)
+        with TestsResultsCache(path, FINGERPRINT, 'other_sorted_' + FINGERPRINT) as cache:
+            assert cache.get(LANGUAGE.PYTHON, FRAGMENT, TASKS) is None
+        with TestsResultsCache(path, FINGERPRINT) as cache:
+            assert cache.get(LANGUAGE.PYTHON, FRAGMENT, TASKS) is None
+        with TestsResultsCache(path, FINGERPRINT, 'sorted_' + FINGERPRINT) as cache:
+            assert cache.get(LANGUAGE.PYTHON, FRAGMENT, TASKS) == RESULTS
+
+    def test_check_tasks_with_cache(self, tmp_path) -> None:
+        in_and_out_files_dict = create_in_and_out_dict(TASKS)
+        with TestsResultsCache(os.path.join(tmp_path, 'cache.sqlite')) as cache:
+            results = check_tasks(TASKS, FRAGMENT, in_and_out_files_dict, LANGUAGE.PYTHON, cache=cache)
+            assert check_tasks(TASKS, FRAGMENT, in_and_out_files_dict, LANGUAGE.PYTHON, cache=cache) == results
+            assert cache.hits == 1
+            assert cache.misses == 1
@@ -0,0 +1,81 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+
+import pytest
+
+from src.main.util.consts import LANGUAGE, TASK
+from src.main.task_scoring.sandbox import Sandbox
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.tests_statistics import TestsStatistics
+from src.main.task_scoring.python_task_checker import PythonTaskChecker
+from src.main.task_scoring.tasks_tests_handler import create_in_and_out_dict
+from src.test.task_scoring.tasks_tests_handler.util import get_source_code, SOLUTION
+
+TASKS = [TASK.PIES, TASK.ZERO]
+WRONG_FRAGMENT = 'print("It is a wrong answer for all tests of all tasks")'
+
+
+def create_statistics_with_failing_last_tests() -> TestsStatistics:
+    tests_suite = create_in_and_out_dict(TASKS)
+    tests_statistics = TestsStatistics()
+    for task, tests in tests_suite.items():
+        for i, test in enumerate(tests):
+            tests_statistics.add(task, test, is_passed=i < len(tests) - 1)
+    return tests_statistics
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestTestsStatistics:
+
+    def test_failure_rate(self) -> None:
+        test = create_in_and_out_dict([TASK.PIES])[TASK.PIES][0]
+        tests_statistics = TestsStatistics()
+        assert tests_statistics.get_failure_rate(TASK.PIES, test) == 0
+        tests_statistics.add(TASK.PIES, test, is_passed=False)
+        other_tests_statistics = TestsStatistics()
+        for is_passed in [True, True, False]:
+            other_tests_statistics.add(TASK.PIES, test, is_passed)
+        tests_statistics.merge(other_tests_statistics)
+        assert tests_statistics.get_failure_rate(TASK.PIES, test) == 0.5
+        assert tests_statistics.get_failure_rate(TASK.ZERO, test) == 0
+
+    def test_order(self) -> None:
+        tests_suite = create_in_and_out_dict(TASKS)
+        ordered_tests_suite = create_statistics_with_failing_last_tests().order_tests(tests_suite)
+        for task in TASKS:
+            assert ordered_tests_suite[task] == tests_suite[task][-1:] + tests_suite[task][:-1]
+        assert ordered_tests_suite.fingerprint != tests_suite.fingerprint
+        assert ordered_tests_suite.files_fingerprint == tests_suite.files_fingerprint
+        # The suite is not changed if there are no failures
+        assert TestsStatistics().order_tests(tests_suite) is tests_suite
+
+    def test_save_and_load(self, tmp_path) -> None:
+        path = os.path.join(tmp_path, 'statistics.json')
+        assert TestsStatistics.load(path).order_tests(create_in_and_out_dict(TASKS)).fingerprint == \
+            create_in_and_out_dict(TASKS).fingerprint
+        create_statistics_with_failing_last_tests().save(path)
+        tests_suite = create_in_and_out_dict(TASKS)
+        assert TestsStatistics.load(path).order_tests(tests_suite).fingerprint == \
+            create_statistics_with_failing_last_tests().order_tests(tests_suite).fingerprint
+
+    def test_same_full_and_incorrect_results(self, tmp_path) -> None:
+        tests_suite = create_in_and_out_dict(TASKS)
+        ordered_tests_suite = create_statistics_with_failing_last_tests().order_tests(tests_suite)
+        task_checker = PythonTaskChecker(Sandbox(str(tmp_path)))
+        for s in [SOLUTION.FULL, SOLUTION.ERROR]:
+            code = get_source_code(TASK.PIES, LANGUAGE.PYTHON, s.value)
+            assert task_checker.check_tasks(TASKS, code, ordered_tests_suite) == \
+                task_checker.check_tasks(TASKS, code, tests_suite)
+
+    def test_collecting(self, tmp_path) -> None:
+        tests_suite = create_in_and_out_dict([TASK.PIES])
+        tests_statistics = TestsStatistics()
+        task_checker = PythonTaskChecker(Sandbox(str(tmp_path)))
+        code = get_source_code(TASK.PIES, LANGUAGE.PYTHON, SOLUTION.FULL.value)
+        task_checker.check_tasks([TASK.PIES], code, tests_suite, tests_statistics=tests_statistics)
+        assert all(tests_statistics.get_failure_rate(TASK.PIES, t) == 0 for t in tests_suite[TASK.PIES])
+        # The first test is failed, so the other ones are not run
+        task_checker.check_tasks([TASK.PIES], WRONG_FRAGMENT, tests_suite, tests_statistics=tests_statistics)
+        assert tests_statistics.get_failure_rate(TASK.PIES, tests_suite[TASK.PIES][0]) == 0.5
+        assert all(tests_statistics.get_failure_rate(TASK.PIES, t) == 0 for t in tests_suite[TASK.PIES][1:])
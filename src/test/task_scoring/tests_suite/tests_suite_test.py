@@ -0,0 +1,67 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import pickle
+
+import pytest
+
+from src.main.util.consts import TASK
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.util.file_util import get_content_from_file
+from src.main.task_scoring.task_checker import TASKS_TESTS_PATH
+from src.main.task_scoring.tests_suite import TestsSuite
+from src.main.task_scoring.tests_results_cache import get_tests_fingerprint
+
+
+def create_test_files(root: str, task: TASK, contents: list) -> None:
+    os.makedirs(os.path.join(root, task.value))
+    for i, (input, output) in enumerate(contents):
+        with open(os.path.join(root, task.value, f'in_{i}.txt'), 'wb') as f:
+            f.write(input)
+        with open(os.path.join(root, task.value, f'out_{i}.txt'), 'wb') as f:
+            f.write(output)
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestTestsSuite:
+
+    def test_contents(self) -> None:
+        suite = TestsSuite.load(TASK.tasks())
+        assert list(suite.keys()) == TASK.tasks()
+        for task, tests in suite.items():
+            assert tests
+            for test in tests:
+                in_file_name = os.path.basename(test.in_file)
+                out_file = os.path.join(os.path.dirname(test.in_file), 'out' + in_file_name[len('in'):])
+                assert test.input == get_content_from_file(test.in_file)
+                assert test.expected_output == get_content_from_file(out_file)
+
+    def test_newlines(self, tmp_path) -> None:
+        create_test_files(tmp_path, TASK.PIES, [(b'1\r\n2\r\n', b'3\n\n')])
+        test = TestsSuite.load([TASK.PIES], str(tmp_path))[TASK.PIES][0]
+        assert test.input == '1\n2'
+        assert test.expected_output == '3'
+
+    def test_fingerprint(self, tmp_path) -> None:
+        create_test_files(tmp_path, TASK.PIES, [(b'1', b'2'), (b'3', b'4')])
+        create_test_files(tmp_path, TASK.ZERO, [(b'0', b'YES')])
+        suite = TestsSuite.load([TASK.PIES, TASK.ZERO], str(tmp_path))
+        assert suite.fingerprint == get_tests_fingerprint(str(tmp_path))
+        with open(os.path.join(tmp_path, TASK.ZERO.value, 'out_0.txt'), 'wb') as f:
+            f.write(b'NO')
+        assert TestsSuite.load([TASK.PIES, TASK.ZERO], str(tmp_path)).fingerprint != suite.fingerprint
+
+    def test_immutability(self) -> None:
+        suite = TestsSuite.load([TASK.PIES], TASKS_TESTS_PATH)
+        with pytest.raises(TypeError):
+            suite[TASK.ZERO] = ()
+        with pytest.raises(AttributeError):
+            suite[TASK.PIES][0].input = ''
+
+    def test_pickling(self) -> None:
+        suite = TestsSuite.load(TASK.tasks())
+        unpickled_suite = pickle.loads(pickle.dumps(suite))
+        assert unpickled_suite.fingerprint == suite.fingerprint
+        for task in TASK.tasks():
+            assert [(t.input, t.expected_output) for t in unpickled_suite[task]] == \
+                   [(t.input, t.expected_output) for t in suite[task]]
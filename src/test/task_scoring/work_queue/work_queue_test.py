@@ -0,0 +1,190 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+import os
+import time
+from typing import List
+from multiprocessing import Process
+
+import pytest
+import pandas as pd
+
+from src.main.util.consts import LANGUAGE, TASK
+from src.main.task_scoring import tasks_tests_handler
+from src.main.task_scoring.work_queue import WorkQueue
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.task_scoring.task_checker import TaskCheckerOptions
+from src.main.task_scoring.tasks_tests_handler import run_tests, run_tests_worker, create_in_and_out_dict
+from src.test.task_scoring.tasks_tests_handler.parallel_run_tests_test import create_tt_data, get_results, \
+    create_unknown_task_data
+
+TASKS = TASK.tasks()
+FINGERPRINT = create_in_and_out_dict(TASKS).fingerprint
+RESULTS = [1.0] * len(TASKS)
+
+
+def create_queue(path: str, lease_time: int = 600, max_job_attempts: int = 3) -> WorkQueue:
+    queue = WorkQueue(os.path.join(path, 'queue.sqlite'), lease_time, max_job_attempts)
+    queue.start(TASKS, FINGERPRINT)
+    return queue
+
+
+# The private function is called outside of the class to avoid the name mangling
+def report_failed_files(queue: WorkQueue, fragments: List[str]) -> None:
+    tasks_tests_handler.__report_failed_files(queue, [('file.csv', LANGUAGE.PYTHON, None, fragments)])
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.TEST_SCORING), reason=TEST_LEVEL.TEST_SCORING.value)
+class TestWorkQueue:
+
+    def test_lease_and_finish(self, tmp_path) -> None:
+        with create_queue(tmp_path) as queue:
+            queue.put_jobs(LANGUAGE.PYTHON, TASK.PIES, ['a', 'b', 'c'], {'c': RESULTS})
+            queue.put_jobs(LANGUAGE.JAVA, TASK.PIES, ['a'])
+            queue.close_for_jobs()
+            assert queue.get_unfinished_jobs_number() == 3
+
+            language, current_task, fragments = queue.lease_jobs('worker', 10)
+            # The leased jobs have the same language and task
+            assert current_task == TASK.PIES
+            assert len(fragments) == (2 if language == LANGUAGE.PYTHON else 1)
+            assert queue.get_results(language, current_task, fragments) is None
+            queue.finish_jobs(language, current_task, {f: RESULTS for f in fragments})
+            assert queue.get_results(language, current_task, fragments) == {f: RESULTS for f in fragments}
+
+            queue.lease_jobs('worker', 10)
+            assert queue.lease_jobs('worker', 10) is None
+            assert not queue.is_finished()
+
+    def test_expired_lease(self, tmp_path) -> None:
+        with create_queue(tmp_path, lease_time=0) as queue:
+            queue.put_jobs(LANGUAGE.PYTHON, TASK.PIES, ['a'])
+            queue.close_for_jobs()
+            assert queue.lease_jobs('dead worker', 10) == (LANGUAGE.PYTHON, TASK.PIES, ['a'])
+            time.sleep(0.01)
+            assert queue.lease_jobs('worker', 10) == (LANGUAGE.PYTHON, TASK.PIES, ['a'])
+            queue.finish_jobs(LANGUAGE.PYTHON, TASK.PIES, {'a': RESULTS})
+            assert queue.is_finished()
+
+    def test_restart(self, tmp_path) -> None:
+        options = TaskCheckerOptions(to_use_pch=True)
+        with create_queue(tmp_path) as queue:
+            queue.put_jobs(LANGUAGE.PYTHON, TASK.PIES, ['a'], {'a': RESULTS})
+            queue.start(TASKS, FINGERPRINT, options)
+            # The finished jobs are kept if the tests are the same
+            assert queue.get_results(LANGUAGE.PYTHON, TASK.PIES, ['a']) == {'a': RESULTS}
+            assert queue.checker_options.to_use_pch
+            queue.start(TASKS, 'other fingerprint')
+            assert queue.get_unfinished_jobs_number() == 0
+            assert queue.get_results(LANGUAGE.PYTHON, TASK.PIES, ['a']) is None
+
+    # The jobs, which are leased max_job_attempts times without results, are failed and are not leased again
+    def test_failed_attempts(self, tmp_path) -> None:
+        with create_queue(tmp_path, lease_time=0, max_job_attempts=2) as queue:
+            queue.put_jobs(LANGUAGE.PYTHON, TASK.PIES, ['a'])
+            queue.close_for_jobs()
+            for _ in range(2):
+                assert queue.lease_jobs('dying worker', 10) == (LANGUAGE.PYTHON, TASK.PIES, ['a'])
+                time.sleep(0.01)
+            assert queue.lease_jobs('worker', 10) is None
+            assert queue.is_finished()
+            assert queue.get_results(LANGUAGE.PYTHON, TASK.PIES, ['a']) is None
+            assert list(queue.get_errors(LANGUAGE.PYTHON, TASK.PIES, ['a']).keys()) == ['a']
+
+    # The failed jobs are checked again after the restart
+    def test_failed_jobs(self, tmp_path) -> None:
+        with create_queue(tmp_path) as queue:
+            queue.put_jobs(LANGUAGE.PYTHON, TASK.PIES, ['a', 'b'])
+            queue.close_for_jobs()
+            language, current_task, fragments = queue.lease_jobs('worker', 10)
+            queue.fail_jobs(language, current_task, ['a'], 'error')
+            queue.finish_jobs(language, current_task, {'b': RESULTS})
+            assert queue.is_finished()
+            assert queue.get_errors(LANGUAGE.PYTHON, TASK.PIES, ['a', 'b']) == {'a': 'error'}
+            queue.start(TASKS, FINGERPRINT)
+            assert queue.get_errors(LANGUAGE.PYTHON, TASK.PIES, ['a', 'b']) == {}
+            assert queue.lease_jobs('worker', 10) == (LANGUAGE.PYTHON, TASK.PIES, ['a'])
+
+    # The jobs without the current task are kept only if the tasks are probed in the same way
+    # A file can be not finished even if its fragments have no errors, for example, if the jobs were removed
+    def test_report_failed_files_without_errors(self, tmp_path) -> None:
+        queue = create_queue(tmp_path)
+        with pytest.raises(ValueError):
+            report_failed_files(queue, ['print(1)'])
+
+    def test_restart_with_other_probing(self, tmp_path) -> None:
+        with create_queue(tmp_path) as queue:
+            queue.start(TASKS, FINGERPRINT, to_probe_tasks=True)
+            queue.put_jobs(LANGUAGE.PYTHON, None, ['a'])
+            queue.put_jobs(LANGUAGE.PYTHON, TASK.PIES, ['a'])
+            assert queue.get_unfinished_jobs_number() == 2
+            queue.start(TASKS, FINGERPRINT)
+            assert queue.get_unfinished_jobs_number() == 1
+            assert queue.lease_jobs('worker', 10) == (LANGUAGE.PYTHON, TASK.PIES, ['a'])
+
+    # The results found with other checker options, which change them, are not kept
+    def test_restart_with_results_affecting_options(self, tmp_path) -> None:
+        with create_queue(tmp_path) as queue:
+            queue.put_jobs(LANGUAGE.CPP, TASK.PIES, ['a'], {'a': RESULTS})
+            queue.start(TASKS, FINGERPRINT, TaskCheckerOptions(to_check_syntax_first=True))
+            assert queue.get_results(LANGUAGE.CPP, TASK.PIES, ['a']) is None
+
+    # If the tasks are probed, the files with unknown tasks are tested by the workers without the current task
+    @pytest.mark.parametrize('to_probe_tasks', [False, True])
+    def test_same_results(self, tmp_path, to_probe_tasks: bool) -> None:
+        expected_path = os.path.join(tmp_path, 'expected')
+        create_tt_data(expected_path)
+        create_unknown_task_data(expected_path)
+        expected_results = get_results(run_tests(expected_path, to_probe_tasks=to_probe_tasks))
+
+        path = os.path.join(tmp_path, 'data')
+        create_tt_data(path)
+        create_unknown_task_data(path)
+        queue_path = os.path.join(tmp_path, 'queue.sqlite')
+        workers = [Process(target=run_tests_worker, args=(queue_path,), kwargs={'polling_interval': 0.1})
+                   for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        results = get_results(run_tests(path, queue_path=queue_path, to_probe_tasks=to_probe_tasks))
+        for worker in workers:
+            worker.join()
+            assert worker.exitcode == 0
+
+        assert results.keys() == expected_results.keys()
+        for file, data in expected_results.items():
+            pd.testing.assert_frame_equal(data, results[file])
+
+    @pytest.mark.parametrize('options', [{'workers': 2}, {'journal_path': 'journal.sqlite'},
+                                         {'tests_statistics_path': 'statistics.json'},
+                                         {'to_normalize_fragments': True}])
+    def test_not_supported_options(self, tmp_path, options: dict) -> None:
+        path = os.path.join(tmp_path, 'data')
+        create_tt_data(path)
+        with pytest.raises(ValueError):
+            run_tests(path, queue_path=os.path.join(tmp_path, 'queue.sqlite'), **options)
+
+    # The fragments, which cannot be checked, don't stop the workers, and the coordinator reports them
+    def test_failed_fragments(self, tmp_path, monkeypatch) -> None:
+        path = os.path.join(tmp_path, 'data')
+        create_tt_data(path)
+        queue_path = os.path.join(tmp_path, 'queue.sqlite')
+        check_fragments = tasks_tests_handler.check_fragments
+
+        def check_fragments_with_error(tasks, fragments, *args, **kwargs) -> dict:
+            if 'print(1)' in fragments:
+                raise RuntimeError('The fragment cannot be checked')
+            return check_fragments(tasks, fragments, *args, **kwargs)
+
+        # The forked worker gets the patched check_fragments
+        monkeypatch.setattr(tasks_tests_handler, 'check_fragments', check_fragments_with_error)
+        worker = Process(target=run_tests_worker, args=(queue_path,), kwargs={'polling_interval': 0.1})
+        worker.start()
+        monkeypatch.undo()
+        with pytest.raises(ValueError):
+            run_tests(path, queue_path=queue_path)
+        worker.join()
+        assert worker.exitcode == 0
+
+        worker = Process(target=run_tests_worker, args=(queue_path,), kwargs={'polling_interval': 0.1})
+        worker.start()
+        assert len(get_results(run_tests(path, queue_path=queue_path))) == 3
+        worker.join()
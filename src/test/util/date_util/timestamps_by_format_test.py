@@ -0,0 +1,36 @@
+# Copyright (c) 2020 Anastasiia Birillo, Elena Lyulina
+
+from datetime import timedelta
+from typing import List
+
+import pytest
+import pandas as pd
+
+from src.test.test_config import to_skip, TEST_LEVEL
+from src.main.util.time_util import get_datetime_by_format, get_timestamps_by_format, EPOCH
+
+DATES = ['2019-12-09T18:41:28.548+03:00', '2019-12-09T15:41:28.549Z', '2019-12-09T10:11:28.550-05:30',
+         '2019-12-09T15:41:28.551+0000', '2020-01-01T00:00:00.000001+03:00']
+
+
+def get_expected_timestamps(dates: List[str]) -> List[int]:
+    return [(get_datetime_by_format(d) - EPOCH) // timedelta(microseconds=1) * 1000 for d in dates]
+
+
+@pytest.mark.skipif(to_skip(current_module_level=TEST_LEVEL.UTIL), reason=TEST_LEVEL.UTIL.value)
+class TestTimestampsByFormat:
+
+    # The whole column is parsed by pandas at once
+    def test_timestamps_by_format(self) -> None:
+        assert get_timestamps_by_format(pd.Series(DATES)).tolist() == get_expected_timestamps(DATES)
+
+    # The offsets are taken into account, so the dates are ordered by the time
+    def test_different_offsets(self) -> None:
+        timestamps = get_timestamps_by_format(pd.Series(DATES[:4]))
+        assert all(t1 < t2 for t1, t2 in zip(timestamps, timestamps[1:]))
+
+    # The column, which pandas cannot parse, is parsed date by date, so the errors are the same as without pandas
+    @pytest.mark.parametrize('dates', [[DATES[0], 'not a date'], [DATES[0], None]], ids=['wrong_date', 'missed_date'])
+    def test_same_errors(self, dates: List[str]) -> None:
+        with pytest.raises((ValueError, TypeError)):
+            get_timestamps_by_format(pd.Series(dates))